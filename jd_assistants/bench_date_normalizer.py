@@ -0,0 +1,67 @@
+"""
+Micro-benchmark for the CV date normalizer.
+
+Normalizes 100,000 date strings in the formats found in extracted CVs, once
+with every string distinct (no cache hits) and once with the repetition of
+real profiles, and prints the throughput.
+
+Usage: python bench_date_normalizer.py [count]
+"""
+import random
+import sys
+import time
+
+from jd_assistants.tools.date_normalizer import _normalize, normalize_date, normalize_profile_dates
+
+FORMATS = [
+    lambda y, m, d: f"{y}",
+    lambda y, m, d: f"{y}-{m}",
+    lambda y, m, d: f"{y}-{m:02d}-{d:02d}",
+    lambda y, m, d: f"{d:02d}/{m:02d}/{y}",
+    lambda y, m, d: f"{m}/{y}",
+    lambda y, m, d: f"T{m}/{y}",
+    lambda y, m, d: f"Tháng {m} năm {y}",
+    lambda y, m, d: ["Jan", "Feb.", "March", "Apr", "May", "June", "Jul.", "Aug", "Sept.", "Oct", "Nov", "December"][m - 1] + f" {y}",
+    lambda y, m, d: "Present",
+    lambda y, m, d: "Hiện tại",
+]
+
+
+def make_dates(count: int, distinct: bool):
+    rng = random.Random(42)
+    dates = []
+    for i in range(count):
+        # Distinct strings: pad with whitespace so every value misses the cache
+        pad = " " * (i // 1000) if distinct else ""
+        y, m, d = rng.randint(1990, 2025), rng.randint(1, 12), rng.randint(1, 28)
+        dates.append(rng.choice(FORMATS)(y, m, d) + pad)
+    return dates
+
+
+def bench(label: str, dates):
+    _normalize.cache_clear()
+    start = time.perf_counter()
+    for i, value in enumerate(dates):
+        normalize_date(value, last_date=i % 2 == 1)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {len(dates):>8} dates  {elapsed * 1000:8.1f} ms  {len(dates) / elapsed:>12,.0f} dates/s")
+
+
+def bench_profiles(dates):
+    profiles = [
+        {"work_experience": [{"start_date": dates[i], "end_date": dates[i + 1]} for i in range(start, start + 10, 2)]}
+        for start in range(0, len(dates) - 10, 10)
+    ]
+    _normalize.cache_clear()
+    start = time.perf_counter()
+    for profile in profiles:
+        normalize_profile_dates(profile)
+    elapsed = time.perf_counter() - start
+    print(f"{'profiles (10 dates each)':<28} {len(profiles) * 10:>8} dates  {elapsed * 1000:8.1f} ms  {len(profiles) * 10 / elapsed:>12,.0f} dates/s")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    bench("distinct strings", make_dates(count, distinct=True))
+    bench("repeated strings", make_dates(count, distinct=False))
+    bench_profiles(make_dates(count, distinct=False))
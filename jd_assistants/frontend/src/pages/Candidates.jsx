@@ -1,7 +1,9 @@
 import React, { useState, useEffect } from 'react';
 import { Table, Button, Upload, message, Space, Popconfirm } from 'antd';
 import { UploadOutlined, DeleteOutlined } from '@ant-design/icons';
-import { candidateAPI } from '../services/api';
+import { candidateAPI, jobAPI } from '../services/api';
+
+const JOB_POLL_INTERVAL_MS = 2000;
 
 function Candidates() {
     const [candidates, setCandidates] = useState([]);
@@ -30,10 +32,23 @@ function Candidates() {
         setUploading(true);
         try {
             const files = fileList.map(file => file.originFileObj);
-            const response = await candidateAPI.uploadCV(files);
-            message.success(`Uploaded ${response.data.success} CV(s) successfully!`);
-            if (response.data.errors.length > 0) {
-                response.data.errors.forEach(err => message.warning(err));
+            const { data: job } = await candidateAPI.uploadCVJob(files);
+            message.info(`Processing ${job.total} CV(s) in the background...`);
+
+            let status = job;
+            while (status.status === 'queued' || status.status === 'running') {
+                await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+                status = (await jobAPI.get(job.job_id)).data;
+            }
+
+            const { data } = await jobAPI.result(job.job_id);
+            if (data.status === 'failed' || !data.result) {
+                message.error(data.error || 'Failed to process CVs');
+                return;
+            }
+            message.success(`Uploaded ${data.result.success} CV(s) successfully!`);
+            if (data.result.errors.length > 0) {
+                data.result.errors.forEach(err => message.warning(err));
             }
             loadCandidates();
         } catch (error) {
@@ -53,6 +53,18 @@ function JDRewriting() {
                     console.error('Analysis error:', error);
                     message.error(`${t('jdRewrite.analysisFailed')}: ${error}`);
                     setStreamingProgress('');
+                },
+                // onPartial - show fields and improvements as soon as they are complete
+                (partial) => {
+                    if (partial.type === 'item' && partial.name === 'improvements') {
+                        setAnalysis(prev => {
+                            const improvements = [...(prev?.improvements || [])];
+                            improvements[partial.index] = partial.value;
+                            return { ...prev, improvements };
+                        });
+                    } else if (partial.type === 'field' && partial.name !== 'thinking') {
+                        setAnalysis(prev => ({ ...prev, [partial.name]: partial.value }));
+                    }
                 }
             );
         } catch (error) {
@@ -214,12 +226,14 @@ function JDRewriting() {
                 <Col span={12}>
                     {analysis && !rewritten && (
                         <Card title={`📊 ${t('jdRewrite.analysisResults')}`}>
-                            <Alert
-                                message={`${t('jdRewrite.overallScore')}: ${analysis.overall_score}/100`}
-                                type={analysis.overall_score >= 70 ? 'success' : 'warning'}
-                                showIcon
-                                style={{ marginBottom: 16 }}
-                            />
+                            {analysis.overall_score !== undefined && (
+                                <Alert
+                                    message={`${t('jdRewrite.overallScore')}: ${analysis.overall_score}/100`}
+                                    type={analysis.overall_score >= 70 ? 'success' : 'warning'}
+                                    showIcon
+                                    style={{ marginBottom: 16 }}
+                                />
+                            )}
 
                             <h3>🎯 {t('jdRewrite.keyRecommendations')}:</h3>
                             <List
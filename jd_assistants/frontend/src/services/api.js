@@ -62,11 +62,24 @@ export const candidateAPI = {
             headers: { 'Content-Type': 'multipart/form-data' }
         });
     },
+    uploadCVJob: (files) => {
+        const formData = new FormData();
+        files.forEach(file => formData.append('files', file));
+        return api.post('/api/v1/candidates/upload-cv/jobs', formData, {
+            headers: { 'Content-Type': 'multipart/form-data' }
+        });
+    },
     list: () => api.get('/api/v1/candidates'),
     get: (id) => api.get(`/api/v1/candidates/${id}`),
     delete: (id) => api.delete(`/api/v1/candidates/${id}`),
 };
 
+// Background Job API
+export const jobAPI = {
+    get: (jobId) => api.get(`/api/v1/jobs/${jobId}`),
+    result: (jobId) => api.get(`/api/v1/jobs/${jobId}/result`),
+};
+
 // Job Description API
 export const jobDescriptionAPI = {
     list: () => api.get('/api/v1/job-descriptions'),
@@ -95,128 +108,88 @@ export const scoringAPI = {
     getScores: (jdId) => api.get('/api/v1/scoring/scores', { params: { jd_id: jdId } }),
 };
 
-// JD AI API
-export const jdAIAPI = {
-    analyze: (jdText) => {
-        const formData = new FormData();
-        formData.append('jd_text', jdText);
-        return api.post('/api/v1/jd-ai/analyze', formData);
-    },
-    analyzeStream: async (jdText, language, onProgress, onFinal, onError) => {
-        const formData = new FormData();
-        formData.append('jd_text', jdText);
-        formData.append('language', language || 'en');
-        
-        try {
-            const response = await fetch(`${API_BASE_URL}/api/v1/jd-ai/analyze-stream`, {
-                method: 'POST',
-                headers: {
-                    'Authorization': `Bearer ${localStorage.getItem('token')}`
-                },
-                body: formData
-            });
-
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
+// Read a JD AI SSE stream in the delta protocol: each frame carries only
+// the new text ({seq, d}), so the accumulated text is rebuilt here in seq order.
+// Fields and list items finished before the final frame go to onPartial.
+const streamJDAI = async (path, jdText, language, onProgress, onFinal, onError, onPartial) => {
+    const formData = new FormData();
+    formData.append('jd_text', jdText);
+    formData.append('language', language || 'en');
+    formData.append('protocol', 'delta');
+
+    try {
+        const response = await fetch(`${API_BASE_URL}${path}`, {
+            method: 'POST',
+            headers: {
+                'Authorization': `Bearer ${localStorage.getItem('token')}`
+            },
+            body: formData
+        });
+
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        const parts = [];
+        let buffer = '';
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n');
+            buffer = lines.pop() || '';
+
+            for (const line of lines) {
+                if (line.startsWith('data: ')) {
+                    try {
+                        const data = JSON.parse(line.slice(6));
 
-            const reader = response.body.getReader();
-            const decoder = new TextDecoder();
-            let buffer = '';
-
-            while (true) {
-                const { done, value } = await reader.read();
-                if (done) break;
-
-                buffer += decoder.decode(value, { stream: true });
-                const lines = buffer.split('\n');
-                buffer = lines.pop() || '';
-
-                for (const line of lines) {
-                    if (line.startsWith('data: ')) {
-                        try {
-                            const data = JSON.parse(line.slice(6));
-                            
-                            if (data.type === 'thinking' && onProgress) {
-                                onProgress(data);
-                            } else if (data.type === 'final' && onFinal) {
-                                onFinal(data.data);
-                            } else if (data.type === 'error' && onError) {
-                                onError(data.error);
+                        if (data.d !== undefined) {
+                            parts[data.seq - 1] = data.d;
+                            if (onProgress) {
+                                onProgress({ content: data.d, accumulated: parts.join('') });
                             }
-                        } catch (e) {
-                            console.error('Error parsing SSE data:', e);
+                        } else if ((data.type === 'field' || data.type === 'item') && onPartial) {
+                            onPartial(data);
+                        } else if (data.type === 'final' && onFinal) {
+                            onFinal(data.data);
+                        } else if (data.type === 'error' && onError) {
+                            onError(data.error);
                         }
+                    } catch (e) {
+                        console.error('Error parsing SSE data:', e);
                     }
                 }
             }
-        } catch (error) {
-            if (onError) {
-                onError(error.message);
-            }
-            throw error;
         }
-    },
-    rewrite: (jdText) => {
+    } catch (error) {
+        if (onError) {
+            onError(error.message);
+        }
+        throw error;
+    }
+};
+
+// JD AI API
+export const jdAIAPI = {
+    analyze: (jdText) => {
         const formData = new FormData();
         formData.append('jd_text', jdText);
-        return api.post('/api/v1/jd-ai/rewrite', formData);
+        return api.post('/api/v1/jd-ai/analyze', formData);
     },
-    rewriteStream: async (jdText, language, onProgress, onFinal, onError) => {
+    analyzeStream: (jdText, language, onProgress, onFinal, onError, onPartial) =>
+        streamJDAI('/api/v1/jd-ai/analyze-stream', jdText, language, onProgress, onFinal, onError, onPartial),
+    rewrite: (jdText) => {
         const formData = new FormData();
         formData.append('jd_text', jdText);
-        formData.append('language', language || 'en');
-        
-        try {
-            const response = await fetch(`${API_BASE_URL}/api/v1/jd-ai/rewrite-stream`, {
-                method: 'POST',
-                headers: {
-                    'Authorization': `Bearer ${localStorage.getItem('token')}`
-                },
-                body: formData
-            });
-
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
-
-            const reader = response.body.getReader();
-            const decoder = new TextDecoder();
-            let buffer = '';
-
-            while (true) {
-                const { done, value } = await reader.read();
-                if (done) break;
-
-                buffer += decoder.decode(value, { stream: true });
-                const lines = buffer.split('\n');
-                buffer = lines.pop() || '';
-
-                for (const line of lines) {
-                    if (line.startsWith('data: ')) {
-                        try {
-                            const data = JSON.parse(line.slice(6));
-                            
-                            if (data.type === 'thinking' && onProgress) {
-                                onProgress(data);
-                            } else if (data.type === 'final' && onFinal) {
-                                onFinal(data.data);
-                            } else if (data.type === 'error' && onError) {
-                                onError(data.error);
-                            }
-                        } catch (e) {
-                            console.error('Error parsing SSE data:', e);
-                        }
-                    }
-                }
-            }
-        } catch (error) {
-            if (onError) {
-                onError(error.message);
-            }
-            throw error;
-        }
+        return api.post('/api/v1/jd-ai/rewrite', formData);
     },
+    rewriteStream: (jdText, language, onProgress, onFinal, onError, onPartial) =>
+        streamJDAI('/api/v1/jd-ai/rewrite-stream', jdText, language, onProgress, onFinal, onError, onPartial),
     generate: (requirements) => {
         const formData = new FormData();
         Object.keys(requirements).forEach(key => {
@@ -1,4 +1,7 @@
 from jd_assistants.inference import BaseInference
+from jd_assistants.cache import LLM_MEMO_ENABLED, llm_memo_key, get_memoized_response, memoize_response
+from jd_assistants.metrics import LLMCall, record_cache
+from jd_assistants.agent.partial_json import IncrementalJSONParser, drop_invalid_items, repair_json
 from langchain_core.messages import SystemMessage, HumanMessage
 from pydantic import BaseModel
 from typing import Optional, Iterator, AsyncIterator
@@ -6,52 +9,149 @@ import json
 
 
 class BaseAgent:
+    # Memoize async calls (all agents run at temperature 0); pass memoize=False to skip per call
+    MEMOIZE = True
+
     def __init__(self, name: str, llm: BaseInference, system_prompt: str = ""):
         self.name = name
         self.llm = llm
         self.system_prompt = system_prompt
 
+    def _messages(self, input_message: str):
+        if not self.system_prompt:
+            return [HumanMessage(content=input_message)]
+        return [SystemMessage(content=self.system_prompt), HumanMessage(content=input_message)]
+
+    def _memo_key(self, kind: str, input_message: str, kwargs: dict, schema: type[BaseModel] = None) -> Optional[str]:
+        """Memoization key for a request, or None when it should not be memoized.
+
+        Pops the per-call ``memoize`` flag from kwargs.
+        """
+        memoize = kwargs.pop("memoize", self.MEMOIZE)
+        if not (memoize and LLM_MEMO_ENABLED):
+            return None
+        return llm_memo_key({
+            "kind": kind,
+            "system": self.system_prompt,
+            "input": input_message,
+            "model": getattr(self.llm, "model_name", None) or type(self.llm).__name__,
+            "temperature": getattr(self.llm, "temperature", None),
+            "schema": schema.model_json_schema() if schema else None,
+            "kwargs": {k: v for k, v in kwargs.items() if k != "priority"},
+        })
+
+    async def _memo_get(self, key: Optional[str]) -> Optional[dict]:
+        if key is None:
+            return None
+        try:
+            cached = await get_memoized_response(key)
+        except Exception as e:
+            print(f"⚠️ LLM memo lookup failed: {e}")
+            cached = None
+        record_cache("llm_memo", cached is not None)
+        return cached
+
+    async def _memo_set(self, key: Optional[str], value: dict):
+        if key is None:
+            return
+        try:
+            await memoize_response(key, value)
+        except Exception as e:
+            print(f"⚠️ LLM memo write failed: {e}")
+
+    def _track(self) -> LLMCall:
+        """Metrics recorder for one LLM call made by this agent"""
+        return LLMCall(self.name, getattr(self.llm, "model_name", None) or type(self.llm).__name__)
+
+    @staticmethod
+    def _structured_result(call: LLMCall, response: dict):
+        # include_raw=True keeps the raw message so its token usage can be recorded
+        call.observe(response.get("raw"))
+        if response.get("parsing_error"):
+            raise response["parsing_error"]
+        return response.get("parsed")
+
     def invoke(self, input_message: str, **kwargs):
-        messages = [SystemMessage(content=self.system_prompt), HumanMessage(content=input_message)]
-        response = self.llm.invoke(messages, **kwargs)
+        with self._track() as call:
+            response = self.llm.invoke(self._messages(input_message), **kwargs)
+            call.observe(response)
+        return response.content
+    
+    async def ainvoke(self, input_message: str, **kwargs):
+        """Async invoke, keeping the event loop free while the LLM responds"""
+        memo_key = self._memo_key("text", input_message, kwargs)
+        cached = await self._memo_get(memo_key)
+        if cached is not None:
+            return cached["content"]
+        with self._track() as call:
+            response = await self.llm.ainvoke(self._messages(input_message), **kwargs)
+            call.observe(response)
+        await self._memo_set(memo_key, {"content": response.content})
         return response.content
     
     def stream(self, input_message: str, **kwargs):
         """Stream response tokens"""
-        messages = [SystemMessage(content=self.system_prompt), HumanMessage(content=input_message)]
-        for chunk in self.llm.stream(messages, **kwargs):
-            if hasattr(chunk, 'content'):
-                yield chunk.content
-            else:
-                yield chunk
+        messages = self._messages(input_message)
+        with self._track() as call:
+            for chunk in self.llm.stream(messages, **kwargs):
+                call.observe(chunk, streamed=True)
+                if hasattr(chunk, 'content'):
+                    yield chunk.content
+                else:
+                    yield chunk
     
     async def astream(self, input_message: str, **kwargs):
-        """Async stream response tokens"""
-        messages = [SystemMessage(content=self.system_prompt), HumanMessage(content=input_message)]
-        async for chunk in self.llm.astream(messages, **kwargs):
-            if hasattr(chunk, 'content'):
-                yield chunk.content
-            else:
-                yield chunk
+        """Async stream response tokens; memoized responses are replayed as one chunk"""
+        memo_key = self._memo_key("text", input_message, kwargs)
+        cached = await self._memo_get(memo_key)
+        if cached is not None:
+            yield cached["content"]
+            return
+        messages = self._messages(input_message)
+        parts = []
+        with self._track() as call:
+            async for chunk in self.llm.astream(messages, **kwargs):
+                call.observe(chunk, streamed=True)
+                if hasattr(chunk, 'content'):
+                    parts.append(chunk.content)
+                    yield chunk.content
+                else:
+                    yield chunk
+        await self._memo_set(memo_key, {"content": "".join(parts)})
     
     def invoke_structured(self, input_message: str, schema: type[BaseModel], **kwargs):
         """Invoke with structured output"""
-        messages = [SystemMessage(content=self.system_prompt), HumanMessage(content=input_message)]
-        structured_llm = self.llm.with_structured_output(schema, include_raw=False)
-        response = structured_llm.invoke(messages, **kwargs)
-        return response
+        messages = self._messages(input_message)
+        structured_llm = self.llm.with_structured_output(schema, include_raw=True)
+        with self._track() as call:
+            return self._structured_result(call, structured_llm.invoke(messages, **kwargs))
+    
+    async def ainvoke_structured(self, input_message: str, schema: type[BaseModel], **kwargs):
+        """Async invoke with structured output"""
+        memo_key = self._memo_key("structured", input_message, kwargs, schema)
+        cached = await self._memo_get(memo_key)
+        if cached is not None:
+            return schema.model_validate(cached["data"])
+        structured_llm = self.llm.with_structured_output(schema, include_raw=True)
+        with self._track() as call:
+            result = self._structured_result(call, await structured_llm.ainvoke(self._messages(input_message), **kwargs))
+        if isinstance(result, BaseModel):
+            await self._memo_set(memo_key, {"data": result.model_dump()})
+        return result
     
     def stream_structured(self, input_message: str, schema: type[BaseModel], **kwargs):
         """Stream with structured output - yields partial structured responses"""
-        messages = [SystemMessage(content=self.system_prompt), HumanMessage(content=input_message)]
+        messages = self._messages(input_message)
         
         # For streaming structured outputs, we need to accumulate and parse
         accumulated_content = ""
-        for chunk in self.llm.stream(messages, **kwargs):
-            if hasattr(chunk, 'content') and chunk.content:
-                accumulated_content += chunk.content
-                # Yield progress updates
-                yield {"type": "progress", "content": chunk.content, "accumulated": accumulated_content}
+        with self._track() as call:
+            for chunk in self.llm.stream(messages, **kwargs):
+                call.observe(chunk, streamed=True)
+                if hasattr(chunk, 'content') and chunk.content:
+                    accumulated_content += chunk.content
+                    # Yield progress updates
+                    yield {"type": "progress", "content": chunk.content, "accumulated": accumulated_content}
         
         # Final structured parse
         try:
@@ -65,19 +165,38 @@ class BaseAgent:
     
     async def astream_structured(self, input_message: str, schema: type[BaseModel], **kwargs):
         """Async stream with structured output"""
-        messages = [SystemMessage(content=self.system_prompt), HumanMessage(content=input_message)]
+        messages = self._messages(input_message)
         
         # Force JSON mode if not already set
         if 'response_format' not in kwargs:
             kwargs['response_format'] = {"type": "json_object"}
         
-        accumulated_content = ""
-        async for chunk in self.llm.astream(messages, **kwargs):
-            if hasattr(chunk, 'content') and chunk.content:
-                accumulated_content += chunk.content
-                yield {"type": "progress", "content": chunk.content, "accumulated": accumulated_content}
+        memo_key = self._memo_key("structured", input_message, kwargs, schema)
+        cached = await self._memo_get(memo_key)
+        
+        # Progress chunks carry only the new text; callers rebuild the rest if they need it.
+        # Completed fields and array items are reported as they arrive.
+        parser = IncrementalJSONParser(schema)
+        parts = []
+        if cached is not None:
+            # Replay the memoized result at once instead of calling the LLM
+            parts.append(json.dumps(cached["data"], ensure_ascii=False))
+            yield {"type": "progress", "content": parts[0]}
+            for event in parser.feed(parts[0]):
+                yield event
+        else:
+            with self._track() as call:
+                async for chunk in self.llm.astream(messages, **kwargs):
+                    call.observe(chunk, streamed=True)
+                    if hasattr(chunk, 'content') and chunk.content:
+                        parts.append(chunk.content)
+                        yield {"type": "progress", "content": chunk.content}
+                        for event in parser.feed(chunk.content):
+                            yield event
+        accumulated_content = "".join(parts)
         
         # Final structured parse
+        repaired = False
         try:
             # Clean up any markdown code blocks or extra whitespace
             cleaned = accumulated_content.strip()
@@ -89,11 +208,18 @@ class BaseAgent:
                 cleaned = cleaned[:-3]
             cleaned = cleaned.strip()
             
-            data = json.loads(cleaned)
+            try:
+                data = json.loads(cleaned)
+            except json.JSONDecodeError:
+                # Truncated output: keep what was generated
+                data = drop_invalid_items(repair_json(cleaned), schema)
+                repaired = True
             structured_response = schema.model_validate(data)
-            yield {"type": "final", "data": structured_response}
+            if cached is None and not repaired:
+                await self._memo_set(memo_key, {"data": structured_response.model_dump()})
+            yield {"type": "final", "data": structured_response, "repaired": repaired}
         except json.JSONDecodeError as e:
-            yield {"type": "error", "error": f"JSON parse error: {str(e)}", "raw_content": accumulated_content}
+            yield {"type": "error", "error": f"JSON parse error: {str(e)}", "raw_content": accumulated_content, "partial": parser.partial()}
         except Exception as e:
-            yield {"type": "error", "error": f"Validation error: {str(e)}", "raw_content": accumulated_content}
+            yield {"type": "error", "error": f"Validation error: {str(e)}", "raw_content": accumulated_content, "partial": parser.partial()}
 
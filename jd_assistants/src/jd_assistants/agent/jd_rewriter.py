@@ -23,9 +23,8 @@ class JDRewriterAgent(BaseAgent):
         """
         super().__init__(name="JD Rewriter Agent", llm=llm, system_prompt=system_prompt)
 
-    def analyze_jd(self, jd_text: str):
-        """Analyze a job description and provide improvement suggestions"""
-        input_text = f"""
+    def _analyze_input(self, jd_text: str) -> str:
+        return f"""
         Analyze this job description and provide improvement suggestions in JSON format:
         
         {jd_text}
@@ -36,8 +35,8 @@ class JDRewriterAgent(BaseAgent):
         - key_recommendations: array of recommendation strings
         - improvements: array of objects with section, original, improved, reason
         """
-        response = self.invoke(input_text, json=True)
-        
+
+    def _parse_analysis(self, response):
         if isinstance(response, str):
             try:
                 import re
@@ -49,9 +48,16 @@ class JDRewriterAgent(BaseAgent):
                 
         return response
 
-    def analyze_jd_structured(self, jd_text: str) -> JDAnalysisResponse:
-        """Analyze JD with structured output"""
-        input_text = f"""
+    def analyze_jd(self, jd_text: str):
+        """Analyze a job description and provide improvement suggestions"""
+        return self._parse_analysis(self.invoke(self._analyze_input(jd_text), json=True))
+
+    async def aanalyze_jd(self, jd_text: str):
+        """Async version of ``analyze_jd``"""
+        return self._parse_analysis(await self.ainvoke(self._analyze_input(jd_text), json=True))
+
+    def _analyze_structured_input(self, jd_text: str) -> str:
+        return f"""
         Analyze this job description and provide improvement suggestions:
         
         {jd_text}
@@ -62,7 +68,14 @@ class JDRewriterAgent(BaseAgent):
         3. Key recommendations for improvement
         4. Specific improvements by section
         """
-        return self.invoke_structured(input_text, JDAnalysisResponse)
+
+    def analyze_jd_structured(self, jd_text: str) -> JDAnalysisResponse:
+        """Analyze JD with structured output"""
+        return self.invoke_structured(self._analyze_structured_input(jd_text), JDAnalysisResponse)
+    
+    async def aanalyze_jd_structured(self, jd_text: str) -> JDAnalysisResponse:
+        """Async analyze JD with structured output"""
+        return await self.ainvoke_structured(self._analyze_structured_input(jd_text), JDAnalysisResponse)
     
     async def astream_analyze_jd(self, jd_text: str, language: str = "en"):
         """Async stream analysis with structured output"""
@@ -99,22 +112,27 @@ class JDRewriterAgent(BaseAgent):
         async for chunk in self.astream_structured(input_text, JDAnalysisResponse):
             yield chunk
 
-    def rewrite_jd(self, jd_text: str, focus_areas: list = None):
-        """Rewrite the entire JD with improvements"""
+    def _rewrite_input(self, jd_text: str, focus_areas: list = None) -> str:
         focus = ", ".join(focus_areas) if focus_areas else "overall quality"
-        input_text = f"""
+        return f"""
         Rewrite this job description focusing on {focus}:
         
         {jd_text}
         
         Provide the complete rewritten JD in a clear, professional format.
         """
-        return self.invoke(input_text)
 
-    def rewrite_jd_structured(self, jd_text: str, focus_areas: list = None) -> JDRewriteResponse:
-        """Rewrite JD with structured output"""
+    def rewrite_jd(self, jd_text: str, focus_areas: list = None):
+        """Rewrite the entire JD with improvements"""
+        return self.invoke(self._rewrite_input(jd_text, focus_areas))
+
+    async def arewrite_jd(self, jd_text: str, focus_areas: list = None):
+        """Async version of ``rewrite_jd``"""
+        return await self.ainvoke(self._rewrite_input(jd_text, focus_areas))
+
+    def _rewrite_structured_input(self, jd_text: str, focus_areas: list = None) -> str:
         focus = ", ".join(focus_areas) if focus_areas else "overall quality"
-        input_text = f"""
+        return f"""
         Rewrite this job description focusing on {focus}:
         
         {jd_text}
@@ -124,7 +142,14 @@ class JDRewriterAgent(BaseAgent):
         2. The complete rewritten job description
         3. A list of key changes made
         """
-        return self.invoke_structured(input_text, JDRewriteResponse)
+
+    def rewrite_jd_structured(self, jd_text: str, focus_areas: list = None) -> JDRewriteResponse:
+        """Rewrite JD with structured output"""
+        return self.invoke_structured(self._rewrite_structured_input(jd_text, focus_areas), JDRewriteResponse)
+    
+    async def arewrite_jd_structured(self, jd_text: str, focus_areas: list = None) -> JDRewriteResponse:
+        """Async rewrite JD with structured output"""
+        return await self.ainvoke_structured(self._rewrite_structured_input(jd_text, focus_areas), JDRewriteResponse)
     
     async def astream_rewrite_jd(self, jd_text: str, focus_areas: list = None, language: str = "en"):
         """Async stream rewrite with structured output"""
@@ -155,20 +180,25 @@ class JDRewriterAgent(BaseAgent):
         async for chunk in self.astream_structured(input_text, JDRewriteResponse):
             yield chunk
 
-    def improve_section(self, section_name: str, section_text: str):
-        """Improve a specific section of the JD"""
-        input_text = f"""
+    def _improve_section_input(self, section_name: str, section_text: str) -> str:
+        return f"""
         Improve this {section_name} section of a job description:
         
         {section_text}
         
         Make it more engaging and clear.
         """
-        return self.invoke(input_text)
+
+    def improve_section(self, section_name: str, section_text: str):
+        """Improve a specific section of the JD"""
+        return self.invoke(self._improve_section_input(section_name, section_text))
     
-    def generate_jd(self, requirements: dict) -> JDGenerateResponse:
-        """Generate a complete JD from requirements"""
-        input_text = f"""
+    async def aimprove_section(self, section_name: str, section_text: str):
+        """Async version of ``improve_section``"""
+        return await self.ainvoke(self._improve_section_input(section_name, section_text))
+    
+    def _generate_input(self, requirements: dict) -> str:
+        return f"""
         Generate a complete job description based on these requirements:
         
         Position: {requirements.get('position')}
@@ -184,7 +214,14 @@ class JDRewriterAgent(BaseAgent):
         3. An appropriate job title
         4. Key highlights of the position
         """
-        return self.invoke_structured(input_text, JDGenerateResponse)
+
+    def generate_jd(self, requirements: dict) -> JDGenerateResponse:
+        """Generate a complete JD from requirements"""
+        return self.invoke_structured(self._generate_input(requirements), JDGenerateResponse)
+    
+    async def agenerate_jd(self, requirements: dict) -> JDGenerateResponse:
+        """Async version of ``generate_jd``"""
+        return await self.ainvoke_structured(self._generate_input(requirements), JDGenerateResponse)
     
     async def astream_generate_jd(self, requirements: dict):
         """Async stream JD generation"""
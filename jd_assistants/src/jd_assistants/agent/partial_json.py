@@ -0,0 +1,312 @@
+"""
+Incremental parsing of streamed JSON objects.
+
+``IncrementalJSONParser`` is fed the raw text of a structured LLM response as
+it streams and reports each top-level field of the object as soon as its
+value is complete, plus each element of a top-level array (for example one
+``improvements`` entry) as soon as that element is complete. Values are
+validated against the matching field of a Pydantic schema before they are
+reported. ``repair_json`` recovers an object from output that was cut off.
+"""
+import json
+import re
+from functools import lru_cache
+from typing import Annotated, List, Optional, get_args
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+_WHITESPACE = " \t\r\n"
+# Returned by _validate when the schema has no type for a value
+_UNKNOWN = object()
+_STRING_SPECIAL_RE = re.compile(r'["\\]')
+# A \u escape cut off at the end of the text
+_DANGLING_UNICODE_RE = re.compile(r"(?<!\\)\\u[0-9a-fA-F]{0,3}$")
+
+
+@lru_cache(maxsize=None)
+def _field_adapter(schema: type[BaseModel], name: str) -> Optional[TypeAdapter]:
+    field = schema.model_fields.get(name)
+    if field is None:
+        return None
+    if field.metadata:
+        # Keep constraints such as ge/le
+        return TypeAdapter(Annotated[(field.annotation, *field.metadata)])
+    return TypeAdapter(field.annotation)
+
+
+@lru_cache(maxsize=None)
+def _item_adapter(schema: type[BaseModel], name: str) -> Optional[TypeAdapter]:
+    field = schema.model_fields.get(name)
+    args = get_args(field.annotation) if field is not None else ()
+    return TypeAdapter(args[0]) if len(args) == 1 else None
+
+
+class IncrementalJSONParser:
+    """Reports completed fields and array items of a streamed JSON object.
+
+    ``feed`` returns a list of events:
+    ``{"type": "field", "name": ..., "value": ...}`` when a top-level field is
+    complete and ``{"type": "item", "name": ..., "index": ..., "value": ...}``
+    when an element of a top-level array field is complete. With a schema,
+    unknown fields and values that fail validation are not reported. Text
+    before the opening brace (such as a code fence) is skipped.
+    """
+
+    def __init__(self, schema: Optional[type[BaseModel]] = None):
+        self.schema = schema
+        # Validated values of the fields completed so far
+        self.fields = {}
+        self._started = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        # Position inside the top-level object: key, colon, value, string, scalar, nested, after_value
+        self._state = "key"
+        self._key: Optional[str] = None
+        self._key_buf: Optional[List[str]] = None
+        self._value: Optional[List[str]] = None
+        self._item: Optional[List[str]] = None
+        self._array_value = False
+        self._item_index = 0
+
+    def feed(self, text: str) -> List[dict]:
+        events = []
+        i, n = 0, len(text)
+        while i < n and not self._done:
+            if self._in_string:
+                i = self._consume_string(text, i, events)
+                continue
+            c = text[i]
+            i += 1
+            if not self._started:
+                if c == "{":
+                    self._started = True
+                    self._depth = 1
+            elif self._depth == 1:
+                self._consume_member(c, events)
+            else:
+                self._consume_nested(c, events)
+        return events
+
+    def partial(self) -> dict:
+        """Fields completed so far, JSON-serializable"""
+        return dict(self.fields)
+
+    def _capture(self, s: str):
+        for buf in (self._key_buf, self._value, self._item):
+            if buf is not None:
+                buf.append(s)
+
+    def _consume_string(self, text: str, i: int, events: List[dict]) -> int:
+        if self._escape:
+            self._escape = False
+            self._capture(text[i])
+            return i + 1
+        match = _STRING_SPECIAL_RE.search(text, i)
+        if match is None:
+            self._capture(text[i:])
+            return len(text)
+        j = match.start()
+        self._capture(text[i:j + 1])
+        if text[j] == "\\":
+            self._escape = True
+            return j + 1
+
+        self._in_string = False
+        if self._key_buf is not None:
+            self._key = json.loads("".join(self._key_buf))
+            self._key_buf = None
+            self._state = "colon"
+        elif self._depth == 1:
+            self._end_value(events)
+        elif self._depth == 2 and self._array_value:
+            self._end_item(events)
+        return j + 1
+
+    def _consume_member(self, c: str, events: List[dict]):
+        """One character directly inside the top-level object"""
+        state = self._state
+        if c in _WHITESPACE:
+            if state == "scalar":
+                self._value.append(c)
+            return
+        if state == "key":
+            if c == '"':
+                self._key_buf = [c]
+                self._in_string = True
+            elif c == "}":
+                self._done = True
+        elif state == "colon":
+            if c == ":":
+                self._state = "value"
+        elif state == "value":
+            self._value = [c]
+            self._array_value = c == "["
+            self._item_index = 0
+            if c == '"':
+                self._in_string = True
+                self._state = "string"
+            elif c in "{[":
+                self._depth = 2
+                self._state = "nested"
+            else:
+                self._state = "scalar"
+        elif state == "scalar":
+            if c in ",}":
+                self._end_value(events)
+                self._state = "key"
+                self._done = c == "}"
+            else:
+                self._value.append(c)
+        elif state == "after_value":
+            if c == ",":
+                self._state = "key"
+            elif c == "}":
+                self._done = True
+
+    def _consume_nested(self, c: str, events: List[dict]):
+        """One character inside an object or array field value"""
+        self._value.append(c)
+        if c in _WHITESPACE:
+            if self._item is not None:
+                self._item.append(c)
+            return
+        at_items = self._array_value and self._depth == 2
+        if at_items:
+            if c == ",":
+                # Ends a number/literal item; strings and containers end on their closing char
+                self._end_item(events)
+                return
+            if c == "]":
+                self._end_item(events)
+                self._depth = 1
+                self._end_value(events)
+                return
+            if self._item is None:
+                self._item = []
+        if self._item is not None:
+            self._item.append(c)
+        if c == '"':
+            self._in_string = True
+        elif c in "{[":
+            self._depth += 1
+        elif c in "}]":
+            self._depth -= 1
+            if self._depth == 1:
+                self._end_value(events)
+            elif self._depth == 2 and self._array_value:
+                self._end_item(events)
+
+    def _end_value(self, events: List[dict]):
+        text, self._value, self._state = "".join(self._value or ()), None, "after_value"
+        try:
+            value = self._validate(_field_adapter, json.loads(text))
+        except (ValueError, ValidationError):
+            return
+        if value is not _UNKNOWN:
+            self.fields[self._key] = value
+            events.append({"type": "field", "name": self._key, "value": value})
+
+    def _end_item(self, events: List[dict]):
+        if self._item is None:
+            return
+        text, self._item = "".join(self._item), None
+        index = self._item_index
+        self._item_index += 1
+        try:
+            value = self._validate(_item_adapter, json.loads(text))
+        except (ValueError, ValidationError):
+            return
+        if value is not _UNKNOWN:
+            events.append({"type": "item", "name": self._key, "index": index, "value": value})
+
+    def _validate(self, adapter_for, value):
+        if self.schema is None:
+            return value
+        adapter = adapter_for(self.schema, self._key)
+        if adapter is None:
+            return _UNKNOWN
+        return adapter.dump_python(adapter.validate_python(value), mode="json")
+
+
+def drop_invalid_items(data: dict, schema: type[BaseModel]) -> dict:
+    """Remove list items that fail validation, such as a last item cut off mid-way"""
+    if not isinstance(data, dict):
+        return data
+    cleaned = dict(data)
+    for name, value in data.items():
+        adapter = _item_adapter(schema, name)
+        if adapter is None or not isinstance(value, list):
+            continue
+        items = []
+        for item in value:
+            try:
+                adapter.validate_python(item)
+            except ValidationError:
+                continue
+            items.append(item)
+        cleaned[name] = items
+    return cleaned
+
+
+def repair_json(text: str):
+    """Parse a JSON object whose text was cut off.
+
+    An unfinished string value is closed; an unfinished key, number or
+    literal is dropped together with any dangling colon or comma; open
+    arrays and objects are closed. Raises json.JSONDecodeError if nothing can
+    be recovered.
+    """
+    start = text.find("{")
+    if start < 0:
+        raise json.JSONDecodeError("No JSON object found", text, 0)
+    text = text[start:]
+
+    # Open containers as [char, expecting_key]
+    stack = []
+    in_string = escape = string_is_key = False
+    # Longest prefix that is valid once the containers open there are closed
+    safe_end, safe_closers = 0, ""
+
+    def closers():
+        return "".join("}" if frame[0] == "{" else "]" for frame in reversed(stack))
+
+    for i, c in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+                if not string_is_key:
+                    safe_end, safe_closers = i + 1, closers()
+            continue
+        if c == '"':
+            in_string = True
+            string_is_key = bool(stack) and stack[-1][0] == "{" and stack[-1][1]
+        elif c in "{[":
+            stack.append([c, c == "{"])
+            safe_end, safe_closers = i + 1, closers()
+        elif c in "}]":
+            if not stack:
+                break
+            stack.pop()
+            safe_end, safe_closers = i + 1, closers()
+            if not stack:
+                break
+        elif c == ":" and stack:
+            stack[-1][1] = False
+        elif c == "," and stack:
+            # Whatever came before the comma is complete
+            safe_end, safe_closers = i, closers()
+            if stack[-1][0] == "{":
+                stack[-1][1] = True
+
+    if not stack:
+        return json.loads(text[:safe_end])
+    if in_string and not string_is_key:
+        text = text[:-1] if escape else _DANGLING_UNICODE_RE.sub("", text)
+        return json.loads(text + '"' + closers())
+    return json.loads(text[:safe_end] + safe_closers)
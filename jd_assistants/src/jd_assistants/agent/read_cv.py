@@ -1,8 +1,12 @@
 from jd_assistants.agent.base import BaseAgent
 from jd_assistants.tools.read_pdf_tool import convert_response_to_json_string
+from jd_assistants.tools.date_normalizer import normalize_profile_dates
 import json
 
 class ReadCVAgent(BaseAgent):
+    # Results are cached by file hash in the ingestion pipeline
+    MEMOIZE = False
+
     def __init__(self, llm):
         system_prompt = """You are an expert in reading and extracting information from CVs/Resumes.
         Your task is to extract the following information from the provided CV content:
@@ -18,6 +22,13 @@ class ReadCVAgent(BaseAgent):
 
     def process(self, pdf_content: str, file_name: str):
         response = self.invoke(f"Extract information from this CV content:\n{pdf_content}", json=True)
+        return self._parse_response(response, file_name)
+
+    async def aprocess(self, pdf_content: str, file_name: str):
+        response = await self.ainvoke(f"Extract information from this CV content:\n{pdf_content}", json=True)
+        return self._parse_response(response, file_name)
+
+    def _parse_response(self, response, file_name: str):
         # Assuming response is already a dict if json=True in our wrapper, 
         # but the original logic used convert_response_to_json_string which handles markdown code blocks.
         # Let's check if our wrapper returns dict or str.
@@ -26,7 +37,7 @@ class ReadCVAgent(BaseAgent):
         if isinstance(response, dict):
              # We might need to clean it using the existing utility
              from jd_assistants.tools.read_pdf_tool import clean_data
-             return clean_data(response)
+             return normalize_profile_dates(clean_data(response))
         
         # If it's a string (maybe the wrapper failed to parse or returned raw string), use the utility
-        return convert_response_to_json_string(str(response), file_name)
+        return normalize_profile_dates(convert_response_to_json_string(str(response), file_name))
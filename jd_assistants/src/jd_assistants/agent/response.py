@@ -8,10 +8,16 @@ class ResponseAgent(BaseAgent):
         """
         super().__init__(name="Response Agent", llm=llm, system_prompt=system_prompt)
 
-    def process(self, candidate, proceed_with_candidate: bool):
+    def _build_input(self, candidate, proceed_with_candidate: bool) -> str:
         input_text = f"""
         Candidate Name: {candidate.name}
         Bio: {candidate.bio}
         Selected: {proceed_with_candidate}
         """
-        return self.invoke(f"Write an email for this candidate:\n{input_text}")
+        return f"Write an email for this candidate:\n{input_text}"
+
+    def process(self, candidate, proceed_with_candidate: bool):
+        return self.invoke(self._build_input(candidate, proceed_with_candidate))
+
+    async def aprocess(self, candidate, proceed_with_candidate: bool):
+        return await self.ainvoke(self._build_input(candidate, proceed_with_candidate))
@@ -1,37 +1,68 @@
 from jd_assistants.agent.base import BaseAgent
+from jd_assistants.models import CandidateScore
+from pydantic import ValidationError
+from typing import Dict, List
+import groq
 import json
 
+# Groq error codes for output that is not valid JSON (often cut off) or input that is too long
+_SPLITTABLE_ERROR_CODES = ("json_validate_failed", "context_length_exceeded")
+
+
+def _fewer_candidates_may_help(error: Exception) -> bool:
+    """Parse and length errors can go away with a smaller batch; anything else is re-raised"""
+    if isinstance(error, ValueError):
+        # JSON decoding, output parsing and validation errors
+        return True
+    if isinstance(error, groq.APIStatusError):
+        return error.status_code == 413 or (
+            error.status_code == 400 and any(code in str(error) for code in _SPLITTABLE_ERROR_CODES)
+        )
+    return False
+
+
 class ScoreAgent(BaseAgent):
+    # Bump whenever the prompt changes so cached scores are not reused
+    PROMPT_VERSION = "2"
+    # Scores are cached by candidate/JD content in ScoringEngine
+    MEMOIZE = False
+
     def __init__(self, llm):
-        system_prompt = """You are an expert HR Recruiter. Your task is to score a candidate based on their profile and the job description.
-        Score from 0 to 100. Provide a reason for the score.
-        
-        Output JSON format:
+        system_prompt = """You are an expert HR Recruiter. Your task is to score candidates based on their profile and the job description.
+        Score each candidate from 0 to 100, independently of the others. Provide a reason for each score.
+
+        Score of one candidate, as a JSON object:
         {
             "id": "candidate_id",
             "name": "candidate_name",
             "score": int,
             "reason": "explanation"
         }
+
+        When asked to score one candidate, output that object.
+        When asked to score several candidates, output {"scores": [...]} with one such object per candidate,
+        using the exact Candidate ID given for each.
         """
         super().__init__(name="Score Agent", llm=llm, system_prompt=system_prompt)
 
-    def process(self, candidate, job_description, skills, additional_instructions=""):
+    def _build_input(self, candidate, job_description, skills, additional_instructions=""):
         input_text = f"""
         Candidate ID: {candidate.id}
         Name: {candidate.name}
         Bio: {candidate.bio}
-        
+
         Job Description:
         {job_description}
-        
+
         Required Skills:
         {skills}
-        
+
         Additional Instructions:
         {additional_instructions}
         """
-        response = self.invoke(f"Score this candidate:\n{input_text}", json=True)
+        return f"Score this candidate:\n{input_text}"
+
+    def _parse_response(self, response):
         if isinstance(response, str):
              # Fallback if wrapper didn't parse json
              try:
@@ -42,3 +73,139 @@ class ScoreAgent(BaseAgent):
              except:
                  pass
         return response
+
+    def process(self, candidate, job_description, skills, additional_instructions=""):
+        response = self.invoke(self._build_input(candidate, job_description, skills, additional_instructions), json=True)
+        return self._parse_response(response)
+
+    async def aprocess(self, candidate, job_description, skills, additional_instructions=""):
+        response = await self.ainvoke(self._build_input(candidate, job_description, skills, additional_instructions), json=True)
+        return self._parse_response(response)
+
+    def _build_batch_input(self, candidates, job_description, skills, additional_instructions=""):
+        candidates_text = "\n".join(f"""
+        Candidate ID: {c.id}
+        Name: {c.name}
+        Bio: {c.bio}
+        """ for c in candidates)
+        input_text = f"""
+        Job Description:
+        {job_description}
+
+        Required Skills:
+        {skills}
+
+        Additional Instructions:
+        {additional_instructions}
+
+        Candidates:
+        {candidates_text}
+        """
+        return (
+            f"Score each of these {len(candidates)} candidates independently against the same job.\n"
+            f"Return a JSON object {{\"scores\": [...]}} with one entry per candidate, "
+            f"using the exact Candidate ID:\n{input_text}"
+        )
+
+    def _parse_batch(self, response, candidates) -> Dict[str, CandidateScore]:
+        """Validate a batch response, keeping only well-formed scores for requested candidates"""
+        if isinstance(response, str):
+            try:
+                response = json.loads(response)
+            except json.JSONDecodeError:
+                return {}
+        items = response.get("scores", []) if isinstance(response, dict) else response
+        if not isinstance(items, list):
+            return {}
+
+        requested = {c.id: c for c in candidates}
+        scores = {}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            candidate = requested.get(str(item.get("id", "")))
+            if candidate is None:
+                continue
+            try:
+                score = CandidateScore.model_validate({**item, "id": candidate.id, "name": candidate.name})
+            except ValidationError:
+                continue
+            if 0 <= score.score <= 100:
+                scores[candidate.id] = score
+        return scores
+
+    def _parse_single(self, response, candidate) -> Dict[str, CandidateScore]:
+        response = self._parse_response(response)
+        if isinstance(response, dict):
+            # Single-candidate requests are unambiguous, whatever ID the model echoes
+            response = {**response, "id": candidate.id}
+        return self._parse_batch([response], [candidate])
+
+    def _build_group_input(self, candidates, job_description, skills, additional_instructions=""):
+        if len(candidates) == 1:
+            return self._build_input(candidates[0], job_description, skills, additional_instructions)
+        return self._build_batch_input(candidates, job_description, skills, additional_instructions)
+
+    def _parse_group(self, response, candidates) -> Dict[str, CandidateScore]:
+        if len(candidates) == 1:
+            return self._parse_single(response, candidates[0])
+        return self._parse_batch(response, candidates)
+
+    @staticmethod
+    def _handle_error(error: Exception, candidates):
+        """Re-raise errors that fewer candidates per request would not fix"""
+        if not _fewer_candidates_may_help(error):
+            raise error
+        print(f"⚠️ Scoring failed for {len(candidates)} candidate(s): {error}")
+
+    @staticmethod
+    def _retry_groups(candidates, scores) -> List[list]:
+        """Candidates to send again after a request, as smaller batches"""
+        failed = [c for c in candidates if c.id not in scores]
+        if len(candidates) == 1:
+            if failed:
+                print(f"⚠️ No valid score for {failed[0].name}")
+            return []
+        if len(failed) == len(candidates):
+            # Nothing usable came back: bisect so one bad candidate cannot sink the batch
+            middle = len(failed) // 2
+            return [failed[:middle], failed[middle:]]
+        return [failed] if failed else []
+
+    def process_batch(self, candidates, job_description, skills, additional_instructions="") -> List[CandidateScore]:
+        """Score several candidates in one request against a single copy of the JD.
+
+        Candidates missing or invalid in the response, or in a request that
+        failed to parse or was too long, are retried in smaller batches down
+        to single-candidate requests; those that still fail are left out of
+        the result. Other errors (rate limits, authentication...) are raised.
+        """
+        if not candidates:
+            return []
+        try:
+            response = self.invoke(self._build_group_input(candidates, job_description, skills, additional_instructions), json=True)
+            scores = self._parse_group(response, candidates)
+        except Exception as e:
+            self._handle_error(e, candidates)
+            scores = {}
+
+        results = list(scores.values())
+        for group in self._retry_groups(candidates, scores):
+            results.extend(self.process_batch(group, job_description, skills, additional_instructions))
+        return results
+
+    async def aprocess_batch(self, candidates, job_description, skills, additional_instructions="") -> List[CandidateScore]:
+        """Async version of ``process_batch``"""
+        if not candidates:
+            return []
+        try:
+            response = await self.ainvoke(self._build_group_input(candidates, job_description, skills, additional_instructions), json=True)
+            scores = self._parse_group(response, candidates)
+        except Exception as e:
+            self._handle_error(e, candidates)
+            scores = {}
+
+        results = list(scores.values())
+        for group in self._retry_groups(candidates, scores):
+            results.extend(await self.aprocess_batch(group, job_description, skills, additional_instructions))
+        return results
@@ -2,7 +2,7 @@ from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 import os
@@ -14,6 +14,10 @@ from jd_assistants.auth import (
     Token, UserRegister, get_password_hash, ACCESS_TOKEN_EXPIRE_MINUTES
 )
 from jd_assistants.database import create_user, UserRole
+from jd_assistants.cache import start_cache_invalidation_listener, close_redis_client, get_cache_stats
+from jd_assistants.tools.pdf_pool import shutdown_pdf_pool
+from jd_assistants.artifacts import close_artifact_writer
+from jd_assistants.metrics import render_metrics, RequestMetricsMiddleware
 
 # Create FastAPI app
 app = FastAPI(
@@ -35,6 +39,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Label LLM metrics with the endpoint that triggered them and time the request
+app.add_middleware(RequestMetricsMiddleware)
+
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
@@ -66,6 +73,14 @@ async def startup_event():
     """Initialize database on startup"""
     await init_db()
     print("✅ Database initialized")
+    start_cache_invalidation_listener()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush extraction artifacts, release cache connections and PDF workers on shutdown"""
+    await close_artifact_writer()
+    await close_redis_client()
+    shutdown_pdf_pool()
 
 # Health check
 @app.get("/health")
@@ -73,6 +88,16 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "version": "2.0.0"}
 
+@app.get("/health/cache")
+async def cache_stats():
+    """Cache hit/miss/eviction counters for this worker"""
+    return get_cache_stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """LLM and request metrics for this worker in Prometheus text format"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 # ===== AUTH ENDPOINTS =====
 @app.post("/api/v1/auth/register", response_model=Token)
 async def register(
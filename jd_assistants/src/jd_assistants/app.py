@@ -11,7 +11,7 @@ from jd_assistants.database import (
     init_db, async_session_maker,
     create_candidate, get_all_candidates,
     create_job_description, get_active_jd,
-    save_candidate_score, get_candidate_scores
+    get_candidate_scores
 )
 from jd_assistants.cache import get_redis_client, close_redis_client
 from jd_assistants.inference.groq import ChatGroq
@@ -21,6 +21,7 @@ from jd_assistants.agent.score import ScoreAgent
 from jd_assistants.agent.jd_rewriter import JDRewriterAgent
 from jd_assistants.tools.read_pdf_tool import ReadPDFTool
 from jd_assistants.models import Candidate
+from jd_assistants.scoring import ScoringEngine
 
 # Initialize LLM
 api_key = os.getenv("GROQ_API_KEY")
@@ -35,6 +36,7 @@ summarization_agent = SummarizationAgent(llm)
 score_agent = ScoreAgent(llm)
 jd_rewriter_agent = JDRewriterAgent(llm)
 read_pdf_tool = ReadPDFTool()
+scoring_engine = ScoringEngine(score_agent)
 
 # Global state
 current_jd = {"description": "", "skills": "", "title": ""}
@@ -128,21 +130,9 @@ async def score_all_candidates():
         if not candidates:
             return "No candidates found. Please upload CVs first.", None
         
-        results = []
-        for candidate in candidates:
-            cand_obj = Candidate(
-                id=candidate.candidate_id,
-                name=candidate.name,
-                email=candidate.email,
-                bio=candidate.bio,
-                skills=candidate.skills
-            )
-            
-            score_data = score_agent.process(cand_obj, jd.description, jd.skills)
-            
-            if isinstance(score_data, dict):
-                await save_candidate_score(session, score_data, jd.id)
-                results.append(f"{candidate.name}: {score_data.get('score', 0)}/100")
+        outcome = await scoring_engine.run(session, jd, candidates)
+        results = [f"{s['name']}: {s['score']}/100" for s in outcome["scores"]]
+        results += [f"✗ {err}" for err in outcome["errors"]]
         
         return "✓ Scoring completed!\n" + "\n".join(results), await get_scores_table()
 
@@ -0,0 +1,133 @@
+"""
+ZIP archive ingestion.
+
+Members are read straight out of the uploaded archive (which is spooled by
+uploads.py) without extracting anything to disk: each PDF member becomes a
+``ZipMember`` that the ingestion pipeline hashes and reads on demand, so
+only the members currently being processed are held in memory.
+
+Guards against zip bombs: limits on the number of members, on the declared
+size of each member and of the whole archive, and on the compression ratio.
+Bytes are also counted while decompressing, so headers that understate a
+member's size cannot get past the limit.
+"""
+import os
+import zipfile
+from typing import BinaryIO, List, Tuple
+
+from jd_assistants.uploads import MAX_UPLOAD_SIZE, is_pdf_filename
+
+# Largest accepted archive upload, in bytes
+ZIP_MAX_UPLOAD_SIZE = int(os.getenv("ZIP_MAX_UPLOAD_SIZE", str(1024 * 1024 * 1024)))
+# Most members read from one archive
+ZIP_MAX_MEMBERS = int(os.getenv("ZIP_MAX_MEMBERS", "2000"))
+# Largest total uncompressed size of the PDF members, in bytes
+ZIP_MAX_TOTAL_SIZE = int(os.getenv("ZIP_MAX_TOTAL_SIZE", str(4 * 1024 * 1024 * 1024)))
+# Largest uncompressed/compressed size ratio accepted for a member
+ZIP_MAX_COMPRESSION_RATIO = int(os.getenv("ZIP_MAX_COMPRESSION_RATIO", "100"))
+
+_READ_CHUNK = 1024 * 1024
+
+
+# Request body schema for the ZIP upload endpoint
+ZIP_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"],
+                }
+            }
+        },
+    }
+}
+
+
+class ArchiveError(ValueError):
+    """The archive cannot be ingested as a whole"""
+
+
+class ArchiveTooLarge(ArchiveError):
+    """The archive exceeds the member count or total size limit"""
+
+
+class ZipMember:
+    """A PDF inside an open ZIP archive, decompressed only when read"""
+
+    def __init__(self, archive: zipfile.ZipFile, info: zipfile.ZipInfo, max_size: int):
+        self.archive = archive
+        self.info = info
+        self.filename = os.path.basename(info.filename)
+        self.max_size = max_size
+
+    def chunks(self):
+        """Decompressed content in chunks, stopping at the size limit"""
+        read = 0
+        with self.archive.open(self.info) as f:
+            for chunk in iter(lambda: f.read(_READ_CHUNK), b""):
+                read += len(chunk)
+                if read > self.max_size:
+                    raise ValueError(f"{self.info.filename} is larger than the {self.max_size // (1024 * 1024)} MB file limit")
+                yield chunk
+
+    def read(self) -> bytes:
+        """Whole member content (blocking)"""
+        return b"".join(self.chunks())
+
+
+def _is_pdf_member(info: zipfile.ZipInfo) -> bool:
+    name = info.filename
+    base = os.path.basename(name)
+    # Skip directories and macOS metadata such as __MACOSX/._cv.pdf
+    return (
+        not info.is_dir()
+        and is_pdf_filename(base)
+        and not base.startswith("._")
+        and "__MACOSX/" not in name
+    )
+
+
+def open_archive(file: BinaryIO, max_member_size: int = MAX_UPLOAD_SIZE) -> Tuple[zipfile.ZipFile, List[ZipMember], List[dict]]:
+    """Open a ZIP upload and list its PDF members (blocking).
+
+    Returns the open archive, the members to ingest and an error entry for
+    every member that was rejected. Raises ArchiveError when the archive is
+    not a valid ZIP, or ArchiveTooLarge when it exceeds the archive-wide limits.
+    """
+    try:
+        archive = zipfile.ZipFile(file)
+    except (zipfile.BadZipFile, OSError) as e:
+        raise ArchiveError(f"Not a valid ZIP archive: {e}")
+
+    infos = archive.infolist()
+    if len(infos) > ZIP_MAX_MEMBERS:
+        archive.close()
+        raise ArchiveTooLarge(f"Archive has {len(infos)} members, the limit is {ZIP_MAX_MEMBERS}")
+
+    members, rejected = [], []
+    total_size = 0
+    for info in infos:
+        if not _is_pdf_member(info):
+            if not info.is_dir() and "__MACOSX/" not in info.filename:
+                rejected.append({"filename": info.filename, "status": "error", "error": "Only PDF files are supported"})
+            continue
+        error = None
+        if info.flag_bits & 0x1:
+            error = "Encrypted members are not supported"
+        elif info.file_size > max_member_size:
+            error = f"Larger than the {max_member_size // (1024 * 1024)} MB file limit"
+        elif info.file_size > ZIP_MAX_COMPRESSION_RATIO * max(info.compress_size, 1):
+            error = "Compression ratio is too high"
+        if error:
+            rejected.append({"filename": info.filename, "status": "error", "error": error})
+            continue
+        total_size += info.file_size
+        members.append(ZipMember(archive, info, max_member_size))
+
+    if total_size > ZIP_MAX_TOTAL_SIZE:
+        archive.close()
+        raise ArchiveTooLarge(f"Archive expands to more than {ZIP_MAX_TOTAL_SIZE // (1024 * 1024)} MB")
+    return archive, members, rejected
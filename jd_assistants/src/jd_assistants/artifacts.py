@@ -0,0 +1,191 @@
+"""
+Optional sink for CV extraction artifacts.
+
+The raw ReadCVAgent output of each CV can be kept for auditing or offline
+analysis. Artifacts are queued without blocking and written in batches by a
+background task, so the ingestion path does no file or network I/O.
+
+EXTRACTION_ARTIFACT_SINK selects the backend:
+- none (default): artifacts are dropped
+- disk: one JSON file per CV in EXTRACTION_ARTIFACT_DIR
+- db: rows in the extraction_artifacts table (JSONB on PostgreSQL)
+- s3: one object per CV under EXTRACTION_ARTIFACT_S3_BUCKET/PREFIX (needs boto3)
+
+When the queue is full, new artifacts are dropped with a warning rather
+than slowing ingestion down.
+"""
+import asyncio
+import json
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+# Where extraction artifacts go: none, disk, db or s3
+EXTRACTION_ARTIFACT_SINK = os.getenv("EXTRACTION_ARTIFACT_SINK", "none")
+# Directory for the disk sink
+EXTRACTION_ARTIFACT_DIR = Path(os.getenv("EXTRACTION_ARTIFACT_DIR", "/app/results_json"))
+# Bucket and key prefix for the s3 sink
+EXTRACTION_ARTIFACT_S3_BUCKET = os.getenv("EXTRACTION_ARTIFACT_S3_BUCKET", "")
+EXTRACTION_ARTIFACT_S3_PREFIX = os.getenv("EXTRACTION_ARTIFACT_S3_PREFIX", "extractions/")
+# Artifacts written per batch, and seconds to wait for a batch to fill up
+ARTIFACT_BATCH_SIZE = int(os.getenv("ARTIFACT_BATCH_SIZE", "50"))
+ARTIFACT_FLUSH_INTERVAL = float(os.getenv("ARTIFACT_FLUSH_INTERVAL", "2"))
+# Artifacts waiting to be written before new ones are dropped
+ARTIFACT_QUEUE_SIZE = int(os.getenv("ARTIFACT_QUEUE_SIZE", "1000"))
+
+_UNSAFE_NAME_RE = re.compile(r"[^\w.-]+")
+_STOP = object()
+
+
+def _artifact_name(artifact: dict) -> str:
+    key = artifact.get("file_hash") or artifact.get("candidate_id") or "artifact"
+    return _UNSAFE_NAME_RE.sub("_", key) + ".json"
+
+
+def _dumps(artifact: dict) -> bytes:
+    return json.dumps(artifact, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class DiskArtifactSink:
+    """Writes each artifact to a JSON file in a directory"""
+
+    def __init__(self, directory: Path = EXTRACTION_ARTIFACT_DIR):
+        self.directory = directory
+
+    def _write(self, artifacts: List[dict]):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for artifact in artifacts:
+            (self.directory / _artifact_name(artifact)).write_bytes(_dumps(artifact))
+
+    async def write_batch(self, artifacts: List[dict]):
+        await asyncio.to_thread(self._write, artifacts)
+
+
+class DBArtifactSink:
+    """Inserts artifacts into the extraction_artifacts table"""
+
+    async def write_batch(self, artifacts: List[dict]):
+        from jd_assistants.database import async_session_maker, save_extraction_artifacts
+        async with async_session_maker() as session:
+            await save_extraction_artifacts(session, artifacts)
+
+
+class S3ArtifactSink:
+    """Uploads each artifact as a JSON object to S3-compatible storage"""
+
+    def __init__(self, bucket: str = EXTRACTION_ARTIFACT_S3_BUCKET, prefix: str = EXTRACTION_ARTIFACT_S3_PREFIX):
+        import boto3
+        if not bucket:
+            raise ValueError("EXTRACTION_ARTIFACT_S3_BUCKET not set")
+        self.client = boto3.client("s3")
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _write(self, artifacts: List[dict]):
+        for artifact in artifacts:
+            self.client.put_object(
+                Bucket=self.bucket, Key=self.prefix + _artifact_name(artifact),
+                Body=_dumps(artifact), ContentType="application/json"
+            )
+
+    async def write_batch(self, artifacts: List[dict]):
+        await asyncio.to_thread(self._write, artifacts)
+
+
+_SINKS = {"disk": DiskArtifactSink, "db": DBArtifactSink, "s3": S3ArtifactSink}
+
+
+class ArtifactWriter:
+    """Queues artifacts and writes them to a sink in batches from a background task"""
+
+    def __init__(self, sink, batch_size: int = ARTIFACT_BATCH_SIZE,
+                 flush_interval: float = ARTIFACT_FLUSH_INTERVAL, queue_size: int = ARTIFACT_QUEUE_SIZE):
+        self.sink = sink
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self._task: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+    def record(self, artifact: dict):
+        """Queue an artifact without waiting; drops it if the queue is full"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        try:
+            self._queue.put_nowait(artifact)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            print(f"⚠️ Extraction artifact queue full, dropped {self.dropped} artifact(s)")
+
+    async def _next_batch(self) -> List[dict]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size and batch[-1] is not _STOP:
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), max(deadline - loop.time(), 0)))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            stop = batch[-1] is _STOP
+            if stop:
+                batch.pop()
+            if batch:
+                try:
+                    await self.sink.write_batch(batch)
+                except Exception as e:
+                    print(f"⚠️ Writing {len(batch)} extraction artifact(s) failed: {e}")
+            if stop:
+                return
+
+    async def close(self):
+        """Write what is still queued and stop the background task"""
+        if self._task is not None:
+            await self._queue.put(_STOP)
+            await self._task
+            self._task = None
+
+
+_writer: Optional[ArtifactWriter] = None
+_writer_ready = False
+
+
+def get_artifact_writer() -> Optional[ArtifactWriter]:
+    """The configured artifact writer, or None when artifacts are disabled"""
+    global _writer, _writer_ready
+    if not _writer_ready:
+        _writer_ready = True
+        sink_class = _SINKS.get(EXTRACTION_ARTIFACT_SINK)
+        if sink_class is None:
+            if EXTRACTION_ARTIFACT_SINK != "none":
+                print(f"⚠️ Unknown EXTRACTION_ARTIFACT_SINK '{EXTRACTION_ARTIFACT_SINK}', artifacts are disabled")
+        else:
+            try:
+                _writer = ArtifactWriter(sink_class())
+            except Exception as e:
+                print(f"⚠️ Extraction artifact sink '{EXTRACTION_ARTIFACT_SINK}' unavailable, artifacts are disabled: {e}")
+    return _writer
+
+
+def record_extraction(candidate_id: str, filename: str, file_hash: Optional[str], extracted: dict):
+    """Hand a CV extraction to the artifact sink, if one is configured"""
+    writer = get_artifact_writer()
+    if writer is not None:
+        writer.record({
+            "candidate_id": candidate_id,
+            "filename": filename,
+            "file_hash": file_hash,
+            "extracted": extracted,
+            "created_at": datetime.utcnow().isoformat(),
+        })
+
+
+async def close_artifact_writer():
+    if _writer is not None:
+        await _writer.close()
@@ -1,7 +1,7 @@
 """
 Recruitment API endpoints for CV and JD management
 """
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Form, Query, Request
 from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
@@ -16,8 +16,10 @@ from jd_assistants.database import (
     get_all_candidates, get_candidate_by_id, delete_candidate,
     get_all_jds, get_jd_by_id, create_job_description,
     update_jd, delete_jd, activate_jd, get_active_jd,
-    save_candidate_score, get_candidate_scores, get_scores_by_jd,
-    create_candidate
+    get_candidate_scores, get_scores_by_jd,
+    get_candidates_page, get_candidate_scores_page, search_candidates_page,
+    stream_candidates, stream_candidate_scores,
+    CANDIDATE_LIST_FIELDS, SCORE_LIST_FIELDS
 )
 
 # Import agents from app.py
@@ -26,8 +28,18 @@ from jd_assistants.agent.read_cv import ReadCVAgent
 from jd_assistants.agent.summarization import SummarizationAgent
 from jd_assistants.agent.score import ScoreAgent
 from jd_assistants.agent.jd_rewriter import JDRewriterAgent
+from jd_assistants.agent.base import BaseAgent
 from jd_assistants.tools.read_pdf_tool import ReadPDFTool
 from jd_assistants.models import Candidate
+from jd_assistants.ingestion import CVIngestionPipeline
+from jd_assistants.scoring import ScoringEngine, SCORE_SHORTLIST_TOP_K
+from jd_assistants.semantic_index import shortlist
+from jd_assistants.skill_match import load_skill_matrix, parse_skills
+from jd_assistants.export import EXPORT_FORMATS, ndjson_stream, csv_stream
+from jd_assistants.streaming import STREAM_PROTOCOLS, sse_events, sse_response
+from jd_assistants.uploads import UPLOAD_OPENAPI, is_pdf_filename, receive_uploads
+from jd_assistants.archive import ZIP_MAX_UPLOAD_SIZE, ZIP_UPLOAD_OPENAPI, ArchiveError, ArchiveTooLarge, open_archive
+from jd_assistants.jobs import get_job_store, new_job, job_status, start_embedded_worker
 
 # Initialize LLM and agents
 api_key = os.getenv("GROQ_API_KEY")
@@ -39,99 +51,217 @@ read_cv_agent = ReadCVAgent(llm)
 summarization_agent = SummarizationAgent(llm)
 score_agent = ScoreAgent(llm)
 jd_rewriter_agent = JDRewriterAgent(llm)
+# Prompt-only agents, so generation and salary assessment are memoized and instrumented too
+jd_generator_agent = BaseAgent(name="JD Generator Agent", llm=llm)
+salary_agent = BaseAgent(name="Salary Assessment Agent", llm=llm)
 read_pdf_tool = ReadPDFTool()
 
-# Upload directory
-UPLOAD_DIR = Path("/app/uploads")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+# Upload directory, created on first write so read-only deployments can use CV_STORAGE_POLICY=none
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "/app/uploads"))
+
+ingestion_pipeline = CVIngestionPipeline(read_pdf_tool, read_cv_agent, summarization_agent, UPLOAD_DIR)
+scoring_engine = ScoringEngine(score_agent)
 
 router = APIRouter(prefix="/api/v1", tags=["recruitment"])
 
+# List endpoint paging
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Split a comma-separated fields= projection"""
+    if not fields:
+        return None
+    return [f.strip() for f in fields.split(",") if f.strip()]
+
+def _serialize_row(row: dict) -> dict:
+    """Make a projected row JSON-friendly"""
+    return {k: v.isoformat() if isinstance(v, datetime) else v for k, v in row.items()}
+
+def _export_response(chunks, fields: List[str], format: str, filename: str):
+    """Stream exported rows as NDJSON or CSV"""
+    body = csv_stream(chunks, fields) if format == "csv" else ndjson_stream(chunks)
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'}
+    )
+
+async def _list_page(fetch, limit: Optional[int], cursor: Optional[str], fields: Optional[str], **kwargs):
+    """Run a keyset list query; unpaginated requests keep returning a plain list"""
+    paginated = limit is not None or cursor is not None
+    try:
+        rows, next_cursor = await fetch(
+            limit=(limit or DEFAULT_PAGE_SIZE) if paginated else None,
+            cursor=cursor,
+            fields=_parse_fields(fields),
+            **kwargs
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    items = [_serialize_row(r) for r in rows]
+    if not paginated:
+        return items
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.on_event("startup")
+async def start_job_worker():
+    """Start the in-process background job worker"""
+    await start_embedded_worker(ingestion_pipeline)
+
 # ===== CANDIDATES ENDPOINTS =====
 
-@router.post("/candidates/upload-cv")
+@router.post("/candidates/upload-cv", openapi_extra=UPLOAD_OPENAPI)
 async def upload_cvs(
-    files: List[UploadFile] = File(...),
+    request: Request,
     session: AsyncSession = Depends(get_session)
 ):
     """Upload and process CV files"""
-    if not files:
-        raise HTTPException(status_code=400, detail="No files uploaded")
-    
-    results = []
-    errors = []
+    # Files are streamed to spooled temp files and hashed as they arrive;
+    # each one is only read into memory when the pipeline processes it
+    uploads = await receive_uploads(request)
+    try:
+        if not uploads:
+            raise HTTPException(status_code=400, detail="No files uploaded")
+        return await ingestion_pipeline.run([(u.filename, u) for u in uploads], session)
+    finally:
+        for upload in uploads:
+            upload.close()
+
+@router.post("/candidates/upload-cv/jobs", status_code=202, openapi_extra=UPLOAD_OPENAPI)
+async def upload_cvs_job(request: Request):
+    """Accept CV files and process them in a background job"""
+    uploads = await receive_uploads(request)
+    try:
+        if not uploads:
+            raise HTTPException(status_code=400, detail="No files uploaded")
+
+        # Store uploads where workers can read them; non-PDFs are rejected by the pipeline
+        stored = []
+        for upload in uploads:
+            path = None
+            if is_pdf_filename(upload.filename):
+                path = await ingestion_pipeline.store_upload(upload.filename, upload.file)
+            stored.append({"filename": upload.filename, "path": str(path) if path else None})
+    finally:
+        for upload in uploads:
+            upload.close()
     
-    for idx, file in enumerate(files):
+    store = await get_job_store()
+    job = new_job("cv_upload", total=len(stored))
+    await store.enqueue(job, {"files": stored})
+    return job_status(job)
+
+@router.post("/candidates/upload-zip", openapi_extra=ZIP_UPLOAD_OPENAPI)
+async def upload_cv_zip(
+    request: Request,
+    session: AsyncSession = Depends(get_session)
+):
+    """Upload a ZIP archive of CV files and process every PDF in it"""
+    uploads = await receive_uploads(
+        request, field="file", max_file_size=ZIP_MAX_UPLOAD_SIZE,
+        max_request_size=ZIP_MAX_UPLOAD_SIZE + 64 * 1024, max_files=1
+    )
+    try:
+        if not uploads:
+            raise HTTPException(status_code=400, detail="No ZIP file uploaded")
         try:
-            # Validate file type
-            if not file.filename.endswith('.pdf'):
-                errors.append(f"{file.filename}: Only PDF files are supported")
-                continue
-            
-            # Save file
-            file_path = UPLOAD_DIR / f"{datetime.utcnow().timestamp()}_{file.filename}"
-            content = await file.read()
-            with open(file_path, "wb") as f:
-                f.write(content)
-            
-            # Process CV
-            pdf_content = read_pdf_tool._run(str(file_path))
-            extracted_data = read_cv_agent.process(pdf_content, file.filename)
-            
-            # Extract data
-            name = extracted_data.get("personal_info", {}).get("name", "Unknown")
-            email = extracted_data.get("personal_info", {}).get("email", "")
-            skills_list = extracted_data.get("skills", [])
-            skills = ", ".join([s.get("name", "") for s in skills_list if isinstance(s, dict)])
-            
-            # Summarize
-            candidate_info = {
-                "name": name,
-                "education": extracted_data.get("education"),
-                "work_experience": extracted_data.get("work_experience"),
-                "skills": skills
-            }
-            bio = summarization_agent.process(candidate_info)
-            
-            # Save to database
-            candidate_data = {
-                "id": f"cand_{int(datetime.utcnow().timestamp())}_{idx}",
-                "name": name,
-                "email": email,
-                "bio": bio,
-                "skills": skills
-            }
-            await create_candidate(session, candidate_data)
-            
-            results.append({
-                "filename": file.filename,
-                "name": name,
-                "email": email,
-                "status": "success"
-            })
-            
-        except Exception as e:
-            errors.append(f"{file.filename}: {str(e)}")
-    
-    return {
-        "success": len(results),
-        "failed": len(errors),
-        "results": results,
-        "errors": errors
-    }
+            archive, members, rejected = await asyncio.to_thread(open_archive, uploads[0].file)
+        except ArchiveTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except ArchiveError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        try:
+            # Members are decompressed from the spooled archive as the pipeline reaches them
+            result = await ingestion_pipeline.run([(m.filename, m) for m in members], session)
+        finally:
+            archive.close()
+    finally:
+        for upload in uploads:
+            upload.close()
+
+    result["failed"] += len(rejected)
+    result["errors"] += [f"{r['filename']}: {r['error']}" for r in rejected]
+    return result
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get background job status and progress"""
+    store = await get_job_store()
+    job = await store.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_status(job)
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Get the result of a finished background job"""
+    store = await get_job_store()
+    job = await store.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] not in ("completed", "failed"):
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    result = await store.get_result(job_id)
+    return {**job_status(job), "result": result}
 
 @router.get("/candidates")
-async def list_candidates(session: AsyncSession = Depends(get_session)):
-    """Get all candidates"""
-    candidates = await get_all_candidates(session)
-    return [{
-        "id": c.candidate_id,
-        "name": c.name,
-        "email": c.email,
-        "bio": c.bio,
-        "skills": c.skills,
-        "created_at": c.created_at.isoformat()
-    } for c in candidates]
+async def list_candidates(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields, e.g. id,name,email"),
+    session: AsyncSession = Depends(get_session)
+):
+    """Get candidates, newest first.
+
+    Pass ``limit``/``cursor`` for keyset pagination ({"items", "next_cursor"})
+    and ``fields`` to skip large columns such as ``bio``.
+    """
+    return await _list_page(
+        lambda **kw: get_candidates_page(session, **kw), limit, cursor, fields
+    )
+
+@router.get("/candidates/export")
+async def export_candidates(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to export"),
+    chunk_size: int = Query(1000, ge=100, le=10000)
+):
+    """Stream every candidate as NDJSON or CSV with constant memory"""
+    selected = _parse_fields(fields) or list(CANDIDATE_LIST_FIELDS)
+    try:
+        chunks = stream_candidates(selected, chunk_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _export_response(chunks, selected, format, "candidates")
+
+@router.get("/candidates/search")
+async def search_candidates(
+    skill: Optional[List[str]] = Query(None, description="Required skill, optionally with minimum years, e.g. react:3"),
+    min_experience: Optional[float] = Query(None, ge=0, description="Minimum total years of work experience"),
+    graduated_after: Optional[int] = Query(None, description="Only candidates who graduated after this year"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields, e.g. id,name,experience_years"),
+    session: AsyncSession = Depends(get_session)
+):
+    """Filter candidates by their stored profile (no PDF parsing or LLM calls).
+
+    Supports the same ``limit``/``cursor``/``fields`` options as the candidate list.
+    """
+    skills = []
+    for value in skill or []:
+        name, _, years = value.rpartition(":") if ":" in value else (value, "", "0")
+        try:
+            skills.append((name.strip(), float(years or 0)))
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid skill filter: {value}")
+        if not name.strip():
+            raise HTTPException(status_code=400, detail=f"Invalid skill filter: {value}")
+    return await _list_page(
+        lambda **kw: search_candidates_page(session, **kw), limit, cursor, fields,
+        skills=skills, min_experience=min_experience, graduated_after=graduated_after
+    )
 
 @router.get("/candidates/{candidate_id}")
 async def get_candidate(candidate_id: str, session: AsyncSession = Depends(get_session)):
@@ -145,6 +275,7 @@ async def get_candidate(candidate_id: str, session: AsyncSession = Depends(get_s
         "email": candidate.email,
         "bio": candidate.bio,
         "skills": candidate.skills,
+        "profile": candidate.profile,
         "created_at": candidate.created_at.isoformat()
     }
 
@@ -258,8 +389,42 @@ async def set_active_jd(jd_id: int, session: AsyncSession = Depends(get_session)
 
 # ===== SCORING ENDPOINTS =====
 
+@router.get("/scoring/shortlist")
+async def get_shortlist(
+    top_k: int = Query(50, ge=1, le=5000),
+    session: AsyncSession = Depends(get_session)
+):
+    """Rank all candidates against the active JD with the local semantic index (no LLM)"""
+    jd = await get_active_jd(session)
+    if not jd:
+        raise HTTPException(status_code=400, detail="No active job description found")
+    ranked = await shortlist(session, jd.description, jd.skills, top_k)
+    return {
+        "jd_id": jd.id,
+        "results": [{"candidate_id": cid, "similarity": sim} for cid, sim in ranked]
+    }
+
+@router.get("/scoring/skill-match")
+async def get_skill_match(
+    top_k: int = Query(50, ge=1, le=5000),
+    session: AsyncSession = Depends(get_session)
+):
+    """Rank all candidates by deterministic skill overlap with the active JD (no LLM)"""
+    jd = await get_active_jd(session)
+    if not jd:
+        raise HTTPException(status_code=400, detail="No active job description found")
+    jd_skills = parse_skills(jd.skills)
+    matrix = await load_skill_matrix(session)
+    results = matrix.rank(jd_skills, top_k)
+    for r in results:
+        r.update(matrix.explain(r["candidate_id"], jd_skills))
+    return {"jd_id": jd.id, "jd_skills": jd_skills, "results": results}
+
 @router.post("/scoring/score-all")
-async def score_all_candidates(session: AsyncSession = Depends(get_session)):
+async def score_all_candidates(
+    top_k: Optional[int] = Query(None, ge=1, description="Only LLM-score the K most similar candidates"),
+    session: AsyncSession = Depends(get_session)
+):
     """Score all candidates against active JD"""
     # Get active JD
     jd = await get_active_jd(session)
@@ -271,49 +436,64 @@ async def score_all_candidates(session: AsyncSession = Depends(get_session)):
     if not candidates:
         raise HTTPException(status_code=400, detail="No candidates found")
     
-    results = []
-    for candidate in candidates:
-        cand_obj = Candidate(
-            id=candidate.candidate_id,
-            name=candidate.name,
-            email=candidate.email,
-            bio=candidate.bio,
-            skills=candidate.skills
-        )
-        
-        score_data = score_agent.process(cand_obj, jd.description, jd.skills)
-        
-        if isinstance(score_data, dict):
-            await save_candidate_score(session, score_data, jd.id)
-            results.append({
-                "name": candidate.name,
-                "score": score_data.get("score", 0),
-                "reason": score_data.get("reason", "")
-            })
+    total_candidates = len(candidates)
+    top_k = top_k or SCORE_SHORTLIST_TOP_K
+    if top_k and top_k < total_candidates:
+        # Semantic pre-filter: only the most relevant candidates reach the LLM
+        ranked = await shortlist(session, jd.description, jd.skills, top_k)
+        by_id = {c.candidate_id: c for c in candidates}
+        candidates = [by_id[cid] for cid, _ in ranked if cid in by_id]
+    
+    outcome = await scoring_engine.run(session, jd, candidates)
+    skill_scores = (await load_skill_matrix(session)).scores_by_id(parse_skills(jd.skills))
+    results = [{
+        "name": s["name"],
+        "score": s["score"],
+        "skill_score": skill_scores.get(s["id"]),
+        "reason": s["reason"]
+    } for s in outcome["scores"]]
     
     return {
         "jd_id": jd.id,
         "jd_title": jd.title,
+        "total_candidates": total_candidates,
         "total_scored": len(results),
+        "cache_hits": outcome["cache_hits"],
+        "failed": len(outcome["errors"]),
+        "errors": outcome["errors"],
         "results": sorted(results, key=lambda x: x["score"], reverse=True)
     }
 
 @router.get("/scoring/scores")
 async def get_scores(
     jd_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields, e.g. candidate_id,name,score"),
     session: AsyncSession = Depends(get_session)
 ):
-    """Get candidate scores, optionally filtered by JD"""
-    scores = await get_candidate_scores(session, jd_id)
-    return [{
-        "id": s.id,
-        "candidate_id": s.candidate_id,
-        "name": s.name,
-        "score": s.score,
-        "reason": s.reason,
-        "jd_id": s.jd_id,
-        "created_at": s.created_at.isoformat()
-    } for s in scores]
+    """Get candidate scores, optionally filtered by JD (ranked by score).
+
+    Supports the same ``limit``/``cursor``/``fields`` options as the candidate list.
+    """
+    return await _list_page(
+        lambda **kw: get_candidate_scores_page(session, jd_id=jd_id, **kw), limit, cursor, fields
+    )
+
+@router.get("/scoring/scores/export")
+async def export_scores(
+    jd_id: Optional[int] = None,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to export"),
+    chunk_size: int = Query(1000, ge=100, le=10000)
+):
+    """Stream candidate scores as NDJSON or CSV with constant memory"""
+    selected = _parse_fields(fields) or list(SCORE_LIST_FIELDS)
+    try:
+        chunks = stream_candidate_scores(jd_id, selected, chunk_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _export_response(chunks, selected, format, f"scores_jd_{jd_id}" if jd_id else "scores")
 
 # ===== JD AI ENDPOINTS =====
 
@@ -323,7 +503,7 @@ async def analyze_jd(jd_text: str = Form(...)):
     if not jd_text:
         raise HTTPException(status_code=400, detail="JD text is required")
     
-    analysis = jd_rewriter_agent.analyze_jd(jd_text)
+    analysis = await jd_rewriter_agent.aanalyze_jd(jd_text)
     
     if isinstance(analysis, dict):
         return {
@@ -336,70 +516,45 @@ async def analyze_jd(jd_text: str = Form(...)):
     return {"success": False, "error": "Failed to analyze JD"}
 
 @router.post("/jd-ai/analyze-stream")
-async def analyze_jd_stream(jd_text: str = Form(...), language: str = Form(default="en")):
-    """Analyze JD with streaming response and thinking process"""
+async def analyze_jd_stream(
+    jd_text: str = Form(...),
+    language: str = Form(default="en"),
+    protocol: str = Form(default="delta")
+):
+    """Analyze JD with streaming response and thinking process.
+
+    ``protocol=delta`` sends only new text per frame; ``legacy`` also repeats the accumulated text.
+    """
     if not jd_text:
         raise HTTPException(status_code=400, detail="JD text is required")
-    
-    async def event_generator():
-        try:
-            async for chunk in jd_rewriter_agent.astream_analyze_jd(jd_text, language):
-                # Send each chunk as SSE format
-                if chunk.get("type") == "progress":
-                    event_data = {
-                        "type": "thinking",
-                        "content": chunk.get("content", ""),
-                        "accumulated": chunk.get("accumulated", "")
-                    }
-                elif chunk.get("type") == "final":
-                    data = chunk.get("data")
-                    if data:
-                        event_data = {
-                            "type": "final",
-                            "data": {
-                                "thinking": data.thinking,
-                                "overall_score": data.overall_score,
-                                "key_recommendations": data.key_recommendations,
-                                "improvements": [
-                                    {
-                                        "section": imp.section,
-                                        "original": imp.original,
-                                        "improved": imp.improved,
-                                        "reason": imp.reason
-                                    } for imp in data.improvements[:5]
-                                ]
-                            }
-                        }
-                    else:
-                        event_data = {"type": "error", "error": "No data in final chunk"}
-                elif chunk.get("type") == "error":
-                    event_data = {
-                        "type": "error",
-                        "error": chunk.get("error", "Unknown error"),
-                        "raw_content": chunk.get("raw_content", "")
-                    }
-                else:
-                    continue
-                
-                yield f"data: {json.dumps(event_data)}\n\n"
-        except Exception as e:
-            import traceback
-            error_data = {
-                "type": "error", 
-                "error": str(e),
-                "traceback": traceback.format_exc()
-            }
-            yield f"data: {json.dumps(error_data)}\n\n"
-    
-    return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"
+    if protocol not in STREAM_PROTOCOLS:
+        raise HTTPException(status_code=400, detail=f"protocol must be one of {', '.join(STREAM_PROTOCOLS)}")
+
+    def to_final(data):
+        return {
+            "thinking": data.thinking,
+            "overall_score": data.overall_score,
+            "key_recommendations": data.key_recommendations,
+            "improvements": [
+                {
+                    "section": imp.section,
+                    "original": imp.original,
+                    "improved": imp.improved,
+                    "reason": imp.reason
+                } for imp in data.improvements[:5]  # Top 5
+            ]
         }
-    )
+
+    def to_partial(event):
+        if event["name"] != "improvements":
+            return event
+        if event["type"] == "item":
+            return event if event["index"] < 5 else None
+        return {**event, "value": event["value"][:5]}
+
+    return sse_response(sse_events(
+        jd_rewriter_agent.astream_analyze_jd(jd_text, language), to_final, protocol, to_partial=to_partial
+    ))
 
 @router.post("/jd-ai/rewrite")
 async def rewrite_jd(jd_text: str = Form(...)):
@@ -407,7 +562,7 @@ async def rewrite_jd(jd_text: str = Form(...)):
     if not jd_text:
         raise HTTPException(status_code=400, detail="JD text is required")
     
-    rewritten = jd_rewriter_agent.rewrite_jd(jd_text)
+    rewritten = await jd_rewriter_agent.arewrite_jd(jd_text)
     
     return {
         "original": jd_text,
@@ -416,61 +571,25 @@ async def rewrite_jd(jd_text: str = Form(...)):
     }
 
 @router.post("/jd-ai/rewrite-stream")
-async def rewrite_jd_stream(jd_text: str = Form(...), language: str = Form(default="en")):
-    """Rewrite JD with streaming response and thinking process"""
+async def rewrite_jd_stream(
+    jd_text: str = Form(...),
+    language: str = Form(default="en"),
+    protocol: str = Form(default="delta")
+):
+    """Rewrite JD with streaming response and thinking process (see analyze-stream for ``protocol``)"""
     if not jd_text:
         raise HTTPException(status_code=400, detail="JD text is required")
-    
-    async def event_generator():
-        try:
-            async for chunk in jd_rewriter_agent.astream_rewrite_jd(jd_text, language=language):
-                if chunk.get("type") == "progress":
-                    event_data = {
-                        "type": "thinking",
-                        "content": chunk.get("content", ""),
-                        "accumulated": chunk.get("accumulated", "")
-                    }
-                elif chunk.get("type") == "final":
-                    data = chunk.get("data")
-                    if data:
-                        event_data = {
-                            "type": "final",
-                            "data": {
-                                "thinking": data.thinking,
-                                "rewritten_jd": data.rewritten_jd,
-                                "key_changes": data.key_changes
-                            }
-                        }
-                    else:
-                        event_data = {"type": "error", "error": "No data in final chunk"}
-                elif chunk.get("type") == "error":
-                    event_data = {
-                        "type": "error",
-                        "error": chunk.get("error", "Unknown error"),
-                        "raw_content": chunk.get("raw_content", "")
-                    }
-                else:
-                    continue
-                
-                yield f"data: {json.dumps(event_data)}\n\n"
-        except Exception as e:
-            import traceback
-            error_data = {
-                "type": "error", 
-                "error": str(e),
-                "traceback": traceback.format_exc()
-            }
-            yield f"data: {json.dumps(error_data)}\n\n"
-    
-    return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"
+    if protocol not in STREAM_PROTOCOLS:
+        raise HTTPException(status_code=400, detail=f"protocol must be one of {', '.join(STREAM_PROTOCOLS)}")
+
+    def to_final(data):
+        return {
+            "thinking": data.thinking,
+            "rewritten_jd": data.rewritten_jd,
+            "key_changes": data.key_changes
         }
-    )
+
+    return sse_response(sse_events(jd_rewriter_agent.astream_rewrite_jd(jd_text, language=language), to_final, protocol))
 
 @router.post("/jd-ai/generate")
 async def generate_jd_from_requirements(
@@ -536,8 +655,7 @@ Make it professional, detailed, and attractive to top candidates. Use clear, pro
 
     try:
         # Use LLM to generate JD
-        response = llm.invoke(prompt)
-        generated_jd = response.content if hasattr(response, 'content') else str(response)
+        generated_jd = await jd_generator_agent.ainvoke(prompt)
         
         return {
             "success": True,
@@ -620,8 +738,7 @@ Be realistic and data-driven in your assessment."""
 
     try:
         # Use LLM for salary assessment
-        response = llm.invoke(prompt)
-        content = response.content if hasattr(response, 'content') else str(response)
+        content = await salary_agent.ainvoke(prompt)
         
         # Try to parse JSON from response
         import json
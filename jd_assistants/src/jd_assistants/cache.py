@@ -1,56 +1,503 @@
 import redis.asyncio as redis
+import asyncio
+import hashlib
 import json
 import os
+import sqlite3
+import time
+import uuid
+from collections import OrderedDict
 from typing import Any, Optional
 
 # Redis configuration
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "1.0"))
 
-# Redis client (will be initialized on first use)
+# In-process cache tier in front of Redis
+LOCAL_CACHE_MAX_ENTRIES = int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", "2048"))
+# Upper bound on how long a local entry may be served without asking Redis
+LOCAL_CACHE_TTL = int(os.getenv("LOCAL_CACHE_TTL", "60"))
+# Broadcast writes/deletes so other workers drop their local copies
+CACHE_PUBSUB_INVALIDATION = os.getenv("CACHE_PUBSUB_INVALIDATION", "1") == "1"
+CACHE_INVALIDATION_CHANNEL = "cache:invalidate"
+
+# Backend used instead of Redis while it is unavailable: memory, disk or none
+CACHE_FALLBACK_BACKEND = os.getenv("CACHE_FALLBACK_BACKEND", "memory")
+CACHE_FALLBACK_MAX_ENTRIES = int(os.getenv("CACHE_FALLBACK_MAX_ENTRIES", "10000"))
+CACHE_DISK_PATH = os.getenv("CACHE_DISK_PATH", "/tmp/jd_assistants_cache.sqlite3")
+# Consecutive Redis failures before the circuit opens, and seconds between reconnect probes
+CACHE_BREAKER_THRESHOLD = int(os.getenv("CACHE_BREAKER_THRESHOLD", "3"))
+CACHE_BREAKER_RETRY_INTERVAL = float(os.getenv("CACHE_BREAKER_RETRY_INTERVAL", "30"))
+
+# Memoized LLM responses (see BaseAgent); entries beyond the cap are evicted oldest first
+LLM_MEMO_ENABLED = os.getenv("LLM_MEMO_ENABLED", "1") == "1"
+LLM_MEMO_TTL = int(os.getenv("LLM_MEMO_TTL", "86400"))
+LLM_MEMO_MAX_ENTRIES = int(os.getenv("LLM_MEMO_MAX_ENTRIES", "5000"))
+LLM_MEMO_INDEX = "llm:memo:index"
+
+# Identifies this process in invalidation messages
+_instance_id = uuid.uuid4().hex
+
+# Redis clients (will be initialized on first use)
 _redis_client: Optional[redis.Redis] = None
+_blocking_redis_client: Optional[redis.Redis] = None
 
 async def get_redis_client() -> redis.Redis:
     """Get or create Redis client"""
     global _redis_client
     if _redis_client is None:
-        _redis_client = await redis.from_url(REDIS_URL, decode_responses=True)
+        _redis_client = await redis.from_url(
+            REDIS_URL,
+            decode_responses=True,
+            socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+            socket_timeout=REDIS_SOCKET_TIMEOUT
+        )
     return _redis_client
 
+async def get_blocking_redis_client() -> redis.Redis:
+    """Get or create the Redis client for blocking commands (BRPOP, BLMOVE) and pub/sub.
+
+    Those wait on the server for longer than REDIS_SOCKET_TIMEOUT, so their
+    connections have no read timeout; callers bound the wait themselves.
+    """
+    global _blocking_redis_client
+    if _blocking_redis_client is None:
+        _blocking_redis_client = await redis.from_url(
+            REDIS_URL,
+            decode_responses=True,
+            socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+            socket_timeout=None
+        )
+    return _blocking_redis_client
+
 async def close_redis_client():
-    """Close Redis client"""
-    global _redis_client
+    """Close Redis clients"""
+    global _redis_client, _blocking_redis_client
+    await stop_cache_invalidation_listener()
+    await breaker.stop()
     if _redis_client:
         await _redis_client.close()
         _redis_client = None
+    if _blocking_redis_client:
+        await _blocking_redis_client.close()
+        _blocking_redis_client = None
+
+# In-process LRU tier
+class LocalLRUCache:
+    """Bounded, TTL-aware LRU cache kept in process memory.
+
+    Values are shared between callers, so treat them as read-only.
+    """
+
+    def __init__(self, max_entries: int = LOCAL_CACHE_MAX_ENTRIES, max_ttl: int = LOCAL_CACHE_TTL):
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: str):
+        """Return (found, value)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, value
+
+    def set(self, key: str, value: Any, ttl: int):
+        if self.max_entries <= 0:
+            return
+        ttl = min(ttl, self.max_ttl) if ttl else self.max_ttl
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str):
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+local_cache = LocalLRUCache()
+
+# Shared cache backends. Values are strings; get() returns (value, remaining ttl).
+class RedisCacheBackend:
+    """Shared cache in Redis"""
+    name = "redis"
+
+    async def get(self, key: str):
+        client = await get_redis_client()
+        pipe = client.pipeline(transaction=False)
+        pipe.get(key)
+        pipe.ttl(key)
+        value, ttl = await pipe.execute()
+        return value, ttl if ttl and ttl > 0 else None
+
+    async def set(self, key: str, value: str, expiry: int):
+        client = await get_redis_client()
+        await client.setex(key, expiry, value)
+
+    async def delete(self, key: str):
+        client = await get_redis_client()
+        await client.delete(key)
+
+    async def exists(self, key: str) -> bool:
+        client = await get_redis_client()
+        return await client.exists(key) > 0
+
+    async def incrby(self, key: str, amount: int) -> int:
+        client = await get_redis_client()
+        return await client.incrby(key, amount)
+
+    async def ping(self):
+        client = await get_redis_client()
+        await client.ping()
+
+class MemoryCacheBackend:
+    """Process-local stand-in for Redis"""
+    name = "memory"
+
+    def __init__(self, max_entries: int = CACHE_FALLBACK_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def _get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def get(self, key: str):
+        entry = self._get(key)
+        if entry is None:
+            return None, None
+        expires_at, value = entry
+        return value, int(expires_at - time.time()) if expires_at is not None else None
+
+    async def set(self, key: str, value: str, expiry: Optional[int]):
+        self._entries[key] = (time.time() + expiry if expiry else None, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    async def exists(self, key: str) -> bool:
+        return self._get(key) is not None
+
+    async def incrby(self, key: str, amount: int) -> int:
+        entry = self._get(key)
+        expires_at, value = entry if entry else (None, 0)
+        value = int(value) + amount
+        self._entries[key] = (expires_at, str(value))
+        return value
+
+class DiskCacheBackend:
+    """SQLite file cache, shared by workers on the same host"""
+    name = "disk"
+
+    def __init__(self, path: str = CACHE_DISK_PATH):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, expires_at REAL)"
+            )
+        return self._conn
+
+    def _get(self, key: str):
+        row = self._connect().execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None, None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            self._connect().execute("DELETE FROM cache WHERE key = ?", (key,))
+            return None, None
+        return value, int(expires_at - time.time()) if expires_at is not None else None
+
+    def _set(self, key: str, value: str, expiry: Optional[int]):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, time.time() + expiry if expiry else None)
+        )
+
+    def _incrby(self, key: str, amount: int) -> int:
+        value, ttl = self._get(key)
+        value = int(value or 0) + amount
+        self._set(key, str(value), ttl)
+        return value
+
+    async def get(self, key: str):
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: str, expiry: Optional[int]):
+        await asyncio.to_thread(self._set, key, value, expiry)
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self._connect().execute, "DELETE FROM cache WHERE key = ?", (key,))
+
+    async def exists(self, key: str) -> bool:
+        value, _ = await self.get(key)
+        return value is not None
+
+    async def incrby(self, key: str, amount: int) -> int:
+        return await asyncio.to_thread(self._incrby, key, amount)
+
+class NullCacheBackend:
+    """Caching disabled: every lookup misses"""
+    name = "none"
+
+    async def get(self, key: str):
+        return None, None
+
+    async def set(self, key: str, value: str, expiry: Optional[int]):
+        pass
+
+    async def delete(self, key: str):
+        pass
+
+    async def exists(self, key: str) -> bool:
+        return False
+
+    async def incrby(self, key: str, amount: int) -> int:
+        return amount
+
+def _build_fallback_backend():
+    if CACHE_FALLBACK_BACKEND == "disk":
+        return DiskCacheBackend()
+    if CACHE_FALLBACK_BACKEND == "none":
+        return NullCacheBackend()
+    return MemoryCacheBackend()
+
+class CircuitBreaker:
+    """Stops sending cache traffic to Redis after repeated failures.
+
+    While open, a background task pings Redis every retry interval and
+    closes the circuit as soon as it answers again.
+    """
+
+    def __init__(self, backend: RedisCacheBackend, failure_threshold: int = CACHE_BREAKER_THRESHOLD,
+                 retry_interval: float = CACHE_BREAKER_RETRY_INTERVAL):
+        self.backend = backend
+        self.failure_threshold = failure_threshold
+        self.retry_interval = retry_interval
+        self.state = "closed"
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.opened_count = 0
+        self._probe_task: Optional[asyncio.Task] = None
+
+    def allow(self) -> bool:
+        return self.state == "closed"
+
+    def record_success(self):
+        self.failures = 0
+
+    def record_failure(self, error: Exception):
+        self.failures += 1
+        self.last_error = str(error)
+        if self.state == "closed" and self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_count += 1
+            print(f"⚠️ Redis unavailable, using {fallback_backend.name} cache backend: {error}")
+            self._probe_task = asyncio.create_task(self._probe())
+
+    async def _probe(self):
+        while self.state == "open":
+            await asyncio.sleep(self.retry_interval)
+            try:
+                await self.backend.ping()
+            except Exception as e:
+                self.last_error = str(e)
+                continue
+            self.state = "closed"
+            self.failures = 0
+            # Entries written while Redis was down never reached other workers
+            local_cache.clear()
+            print("✅ Redis reachable again, cache circuit closed")
+        self._probe_task = None
+
+    async def stop(self):
+        if self._probe_task:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.opened_count,
+            "last_error": self.last_error,
+        }
+
+redis_backend = RedisCacheBackend()
+fallback_backend = _build_fallback_backend()
+breaker = CircuitBreaker(redis_backend)
+
+async def _call(op: str, *args):
+    """Run a backend operation on Redis, or on the fallback backend when Redis is unavailable"""
+    if breaker.allow():
+        try:
+            result = await getattr(redis_backend, op)(*args)
+            breaker.record_success()
+            return result
+        except (redis.RedisError, OSError, asyncio.TimeoutError) as e:
+            breaker.record_failure(e)
+    return await getattr(fallback_backend, op)(*args)
+
+# Shared tier counters (Redis or its fallback)
+_shared_stats = {"hits": 0, "misses": 0}
+
+def _decode(value: Any) -> Any:
+    try:
+        return json.loads(value)
+    except (json.JSONDecodeError, TypeError):
+        return value
+
+async def _publish_invalidation(key: str):
+    if not CACHE_PUBSUB_INVALIDATION or not breaker.allow():
+        return
+    try:
+        client = await get_redis_client()
+        await client.publish(CACHE_INVALIDATION_CHANNEL, json.dumps({"origin": _instance_id, "key": key}))
+    except (redis.RedisError, OSError, asyncio.TimeoutError) as e:
+        breaker.record_failure(e)
 
 # Cache operations
 async def cache_set(key: str, value: Any, expiry: int = 3600):
     """Set a value in cache with expiry (default 1 hour)"""
-    client = await get_redis_client()
     if isinstance(value, (dict, list)):
+        local_value = value
         value = json.dumps(value)
-    await client.setex(key, expiry, value)
+    else:
+        local_value = _decode(str(value))
+    await _call("set", key, str(value), expiry)
+    local_cache.set(key, local_value, expiry)
+    await _publish_invalidation(key)
 
 async def cache_get(key: str) -> Optional[Any]:
-    """Get a value from cache"""
-    client = await get_redis_client()
-    value = await client.get(key)
+    """Get a value from cache, serving hot keys from the in-process tier"""
+    found, value = local_cache.get(key)
+    if found:
+        return value
+    value, ttl = await _call("get", key)
     if value:
-        try:
-            return json.loads(value)
-        except (json.JSONDecodeError, TypeError):
-            return value
+        _shared_stats["hits"] += 1
+        value = _decode(value)
+        local_cache.set(key, value, ttl or LOCAL_CACHE_TTL)
+        return value
+    _shared_stats["misses"] += 1
     return None
 
 async def cache_delete(key: str):
     """Delete a key from cache"""
-    client = await get_redis_client()
-    await client.delete(key)
+    local_cache.delete(key)
+    await _call("delete", key)
+    await _publish_invalidation(key)
 
 async def cache_exists(key: str) -> bool:
     """Check if key exists in cache"""
-    client = await get_redis_client()
-    return await client.exists(key) > 0
+    found, _ = local_cache.get(key)
+    if found:
+        return True
+    return await _call("exists", key)
+
+def get_cache_stats() -> dict:
+    """Hit/miss/eviction counters for both cache tiers"""
+    return {
+        "local": local_cache.stats(),
+        "shared": dict(_shared_stats),
+        "backend": redis_backend.name if breaker.allow() else fallback_backend.name,
+        "circuit": breaker.stats(),
+        "pubsub_invalidation": CACHE_PUBSUB_INVALIDATION and _invalidation_task is not None,
+    }
+
+# Cross-worker invalidation
+_invalidation_task: Optional[asyncio.Task] = None
+
+async def _listen_for_invalidations():
+    while True:
+        if not breaker.allow():
+            await asyncio.sleep(CACHE_BREAKER_RETRY_INTERVAL)
+            continue
+        try:
+            client = await get_blocking_redis_client()
+            pubsub = client.pubsub()
+            await pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+            while breaker.allow():
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if not message or message.get("type") != "message":
+                    continue
+                data = json.loads(message["data"])
+                if data.get("origin") != _instance_id:
+                    local_cache.delete(data.get("key"))
+            await pubsub.close()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Anything could have changed while we were disconnected
+            local_cache.clear()
+            print(f"⚠️ Cache invalidation listener error: {e}")
+            await asyncio.sleep(5)
+
+def start_cache_invalidation_listener():
+    """Subscribe to invalidation messages from other workers"""
+    global _invalidation_task
+    if CACHE_PUBSUB_INVALIDATION and _invalidation_task is None:
+        _invalidation_task = asyncio.create_task(_listen_for_invalidations())
+    return _invalidation_task
+
+async def stop_cache_invalidation_listener():
+    """Stop the invalidation subscriber"""
+    global _invalidation_task
+    if _invalidation_task:
+        _invalidation_task.cancel()
+        try:
+            await _invalidation_task
+        except asyncio.CancelledError:
+            pass
+        _invalidation_task = None
 
 # Agent memory operations
 async def store_agent_memory(agent_id: str, conversation: list, expiry: int = 7200):
@@ -90,16 +537,56 @@ async def get_cached_extraction(file_hash: str) -> Optional[dict]:
     key = f"extraction:{file_hash}"
     return await cache_get(key)
 
-async def cache_score_result(candidate_id: str, jd_id: str, score_data: dict, expiry: int = 3600):
-    """Cache score result"""
-    key = f"score:{candidate_id}:{jd_id}"
+def score_cache_key(candidate_bio: str, candidate_skills: str, jd_description: str, jd_skills: str,
+                    prompt_version: str, model: str) -> str:
+    """Content hash identifying a score; edits to the bio, skills or JD produce a new key"""
+    content = json.dumps(
+        [candidate_bio or "", candidate_skills or "", jd_description or "", jd_skills or "", prompt_version, model],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+async def cache_score_result(content_hash: str, score_data: dict, expiry: int = 604800):
+    """Cache score result by content hash (7 days)"""
+    key = f"score:{content_hash}"
     await cache_set(key, score_data, expiry)
 
-async def get_cached_score(candidate_id: str, jd_id: str) -> Optional[dict]:
-    """Get cached score"""
-    key = f"score:{candidate_id}:{jd_id}"
+async def get_cached_score(content_hash: str) -> Optional[dict]:
+    """Get cached score by content hash"""
+    key = f"score:{content_hash}"
     return await cache_get(key)
 
+# LLM response memoization
+def llm_memo_key(payload: dict) -> str:
+    """Cache key for an LLM request described by ``payload`` (prompt, model, schema, kwargs)"""
+    content = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return f"llm:memo:{hashlib.sha256(content.encode('utf-8')).hexdigest()}"
+
+async def get_memoized_response(key: str) -> Optional[dict]:
+    """Get a memoized LLM response"""
+    value = await cache_get(key)
+    return value if isinstance(value, dict) else None
+
+async def memoize_response(key: str, value: dict):
+    """Store an LLM response and keep the number of memoized entries under the cap"""
+    await cache_set(key, value, LLM_MEMO_TTL)
+    # Fallback backends are bounded on their own; the index only tracks Redis
+    if not breaker.allow():
+        return
+    try:
+        client = await get_redis_client()
+        now = time.time()
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.zadd(LLM_MEMO_INDEX, {key: now})
+            pipe.zremrangebyscore(LLM_MEMO_INDEX, 0, now - LLM_MEMO_TTL)
+            pipe.zcard(LLM_MEMO_INDEX)
+            *_, size = await pipe.execute()
+        if size > LLM_MEMO_MAX_ENTRIES:
+            for evicted, _ in await client.zpopmin(LLM_MEMO_INDEX, size - LLM_MEMO_MAX_ENTRIES):
+                await cache_delete(evicted)
+    except (redis.RedisError, OSError, asyncio.TimeoutError) as e:
+        breaker.record_failure(e)
+
 # Analytics caching
 async def cache_analytics(key: str, data: Any, expiry: int = 600):
     """Cache analytics data (10 minutes)"""
@@ -114,11 +601,9 @@ async def get_cached_analytics(key: str) -> Optional[Any]:
 # Utility functions
 async def increment_counter(key: str, amount: int = 1) -> int:
     """Increment a counter"""
-    client = await get_redis_client()
-    return await client.incrby(key, amount)
+    return await _call("incrby", key, amount)
 
 async def get_counter(key: str) -> int:
     """Get counter value"""
-    client = await get_redis_client()
-    value = await client.get(key)
+    value, _ = await _call("get", key)
     return int(value) if value else 0
@@ -1,7 +1,10 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base, relationship
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, JSON, ForeignKey, Boolean, Date, Time, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, JSON, ForeignKey, Boolean, Date, Time, Enum, Index
+from sqlalchemy.dialects.postgresql import JSONB, JSONPATH
 from datetime import datetime
+import base64
+import json
 import os
 import enum
 
@@ -120,9 +123,21 @@ class DBCandidate(Base):
     email = Column(String, index=True)
     bio = Column(Text)
     skills = Column(Text)
+    file_hash = Column(String, index=True)  # SHA-256 of the uploaded CV file
+    # Structured CV (see profiles.build_profile); JSONB on PostgreSQL
+    profile = Column(JSON().with_variant(JSONB(), "postgresql"))
+    experience_years = Column(Float, index=True)
+    graduation_year = Column(Integer, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Keyset pagination: newest first
+        Index("ix_candidates_created_at_id", "created_at", "id"),
+        # Profile searches (skill_years paths) on PostgreSQL
+        Index("ix_candidates_profile", "profile", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+
 class DBJobDescription(Base):
     __tablename__ = "job_descriptions"
     
@@ -140,16 +155,60 @@ class DBCandidateScore(Base):
     id = Column(Integer, primary_key=True, index=True)
     candidate_id = Column(String, index=True)
     name = Column(String)
-    score = Column(Integer)
+    # Not nullable: keyset pages compare (score, id) tuples, which skip NULLs
+    score = Column(Integer, nullable=False)
     reason = Column(Text)
     jd_id = Column(Integer, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Keyset pagination: per-JD ranking and newest first
+        Index("ix_candidate_scores_jd_id_score_id", "jd_id", "score", "id"),
+        Index("ix_candidate_scores_created_at_id", "created_at", "id"),
+    )
+
+class DBCandidateEmbedding(Base):
+    __tablename__ = "candidate_embeddings"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    candidate_id = Column(String, unique=True, index=True)
+    model = Column(String)  # embedder that produced the vector, e.g. "bm25"
+    vector = Column(JSON)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class DBExtractionArtifact(Base):
+    __tablename__ = "extraction_artifacts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    candidate_id = Column(String, index=True)
+    filename = Column(String)
+    file_hash = Column(String, index=True)
+    data = Column(JSON().with_variant(JSONB(), "postgresql"))  # raw ReadCVAgent output
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 # Database initialization
+def _migrate(conn):
+    """Bring existing tables up to date, then create the missing ones"""
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import inspect
+
+    config = Config()
+    config.set_main_option("script_location", "jd_assistants:migrations")
+    config.attributes["connection"] = conn
+    # create_all() never alters existing tables, so databases that already
+    # have the schema are migrated, while new ones are created at the latest revision
+    existing = inspect(conn).has_table(DBCandidate.__tablename__)
+    if existing:
+        command.upgrade(config, "head")
+    Base.metadata.create_all(conn)
+    if not existing:
+        command.stamp(config, "head")
+
 async def init_db():
     """Initialize database tables"""
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_migrate)
 
 async def get_session():
     """Get database session"""
@@ -157,7 +216,82 @@ async def get_session():
         yield session
 
 # CRUD Operations (keep existing + add new)
-from sqlalchemy import select
+from sqlalchemy import select, insert, delete, tuple_, and_, cast, func
+from jd_assistants.profiles import skill_key
+
+# Fields that list endpoints may project, mapped to their columns
+CANDIDATE_LIST_FIELDS = {
+    "id": DBCandidate.candidate_id,
+    "name": DBCandidate.name,
+    "email": DBCandidate.email,
+    "bio": DBCandidate.bio,
+    "skills": DBCandidate.skills,
+    "experience_years": DBCandidate.experience_years,
+    "graduation_year": DBCandidate.graduation_year,
+    "created_at": DBCandidate.created_at,
+}
+
+SCORE_LIST_FIELDS = {
+    "id": DBCandidateScore.id,
+    "candidate_id": DBCandidateScore.candidate_id,
+    "name": DBCandidateScore.name,
+    "score": DBCandidateScore.score,
+    "reason": DBCandidateScore.reason,
+    "jd_id": DBCandidateScore.jd_id,
+    "created_at": DBCandidateScore.created_at,
+}
+
+def encode_cursor(values: list) -> str:
+    """Encode the sort key of the last row of a page"""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+def decode_cursor(cursor: str, order_columns: list) -> list:
+    """Decode a cursor produced by encode_cursor for the same ordering"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(payload, list) or len(payload) != len(order_columns):
+        raise ValueError("Invalid cursor")
+    return [
+        datetime.fromisoformat(v) if v is not None and isinstance(col.type, DateTime) else v
+        for v, col in zip(payload, order_columns)
+    ]
+
+def _select_fields(available: dict, fields: list = None) -> dict:
+    if not fields:
+        return available
+    unknown = [f for f in fields if f not in available]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return {f: available[f] for f in fields}
+
+async def keyset_page(session: AsyncSession, fields: dict, order_columns: list, limit: int = None,
+                      cursor: str = None, where=None):
+    """Fetch rows ordered by ``order_columns`` (descending) that come after ``cursor``.
+
+    ``order_columns`` must not contain NULLs, since the cursor comparison
+    would skip those rows. Only the requested columns are loaded. Returns
+    (rows, next_cursor).
+    """
+    sort_keys = [col.label(f"_k{i}") for i, col in enumerate(order_columns)]
+    stmt = select(*[col.label(name) for name, col in fields.items()], *sort_keys)
+    if where is not None:
+        stmt = stmt.where(where)
+    if cursor:
+        stmt = stmt.where(tuple_(*order_columns) < tuple_(*decode_cursor(cursor, order_columns)))
+    stmt = stmt.order_by(*[col.desc() for col in order_columns])
+    if limit:
+        stmt = stmt.limit(limit + 1)
+
+    result = await session.execute(stmt)
+    rows = result.mappings().all()
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1][f"_k{i}"] for i in range(len(order_columns))])
+    return [{name: row[name] for name in fields} for row in rows], next_cursor
 
 async def create_user(session: AsyncSession, email: str, password_hash: str, role: UserRole = UserRole.EMPLOYEE):
     """Create a new user"""
@@ -199,16 +333,27 @@ async def create_candidate(session: AsyncSession, candidate_data: dict):
         existing.email = candidate_data["email"]
         existing.bio = candidate_data["bio"]
         existing.skills = candidate_data["skills"]
+        if candidate_data.get("file_hash"):
+            existing.file_hash = candidate_data["file_hash"]
+        if candidate_data.get("profile"):
+            existing.profile = candidate_data["profile"]
+            existing.experience_years = candidate_data["profile"].get("experience_years")
+            existing.graduation_year = candidate_data["profile"].get("graduation_year")
         existing.updated_at = datetime.utcnow()
         await session.commit()
         return existing
     else:
+        profile = candidate_data.get("profile")
         db_candidate = DBCandidate(
             candidate_id=candidate_data["id"],
             name=candidate_data["name"],
             email=candidate_data["email"],
             bio=candidate_data["bio"],
-            skills=candidate_data["skills"]
+            skills=candidate_data["skills"],
+            file_hash=candidate_data.get("file_hash"),
+            profile=profile,
+            experience_years=profile.get("experience_years") if profile else None,
+            graduation_year=profile.get("graduation_year") if profile else None
         )
         session.add(db_candidate)
         await session.commit()
@@ -221,18 +366,93 @@ async def get_all_candidates(session: AsyncSession):
     result = await session.execute(stmt)
     return result.scalars().all()
 
+async def stream_rows(fields: dict, order_by: list, where=None, chunk_size: int = 1000):
+    """Yield lists of rows read through a server-side cursor in ``chunk_size`` batches.
+
+    Opens its own session so it can outlive the request's dependency scope
+    (e.g. inside a StreamingResponse).
+    """
+    stmt = select(*[col.label(name) for name, col in fields.items()]).order_by(*order_by)
+    if where is not None:
+        stmt = stmt.where(where)
+    async with async_session_maker() as session:
+        result = await session.stream(stmt.execution_options(yield_per=chunk_size))
+        async for partition in result.mappings().partitions():
+            yield [dict(row) for row in partition]
+
+def stream_candidates(fields: list = None, chunk_size: int = 1000):
+    """Stream all candidates in chunks, oldest first"""
+    return stream_rows(
+        _select_fields(CANDIDATE_LIST_FIELDS, fields),
+        [DBCandidate.created_at, DBCandidate.id], chunk_size=chunk_size
+    )
+
+def stream_candidate_scores(jd_id: int = None, fields: list = None, chunk_size: int = 1000):
+    """Stream scores in chunks, optionally for a single JD"""
+    return stream_rows(
+        _select_fields(SCORE_LIST_FIELDS, fields),
+        [DBCandidateScore.created_at, DBCandidateScore.id],
+        where=DBCandidateScore.jd_id == jd_id if jd_id else None,
+        chunk_size=chunk_size
+    )
+
+async def get_candidates_page(session: AsyncSession, limit: int = None, cursor: str = None, fields: list = None):
+    """Get candidates newest first, one keyset page at a time"""
+    return await keyset_page(
+        session, _select_fields(CANDIDATE_LIST_FIELDS, fields),
+        [DBCandidate.created_at, DBCandidate.id], limit, cursor
+    )
+
+def _skill_years_path(skill: str) -> str:
+    # Quotes and backslashes cannot appear in a quoted JSON path key
+    key = skill.replace('"', "").replace("\\", "")
+    return f'$.skill_years."{key}"'
+
+def skill_filter(skill: str, min_years: float = 0):
+    """Condition: the candidate profile lists ``skill`` with at least ``min_years`` years"""
+    path = _skill_years_path(skill_key(skill))
+    if engine.dialect.name == "postgresql":
+        # jsonpath containment can use the GIN index on profile
+        return DBCandidate.profile.op("@?")(cast(f"{path} ? (@ >= {float(min_years)})", JSONPATH))
+    return func.json_extract(DBCandidate.profile, path) >= min_years
+
+async def search_candidates_page(session: AsyncSession, skills: list = None, min_experience: float = None,
+                                 graduated_after: int = None, limit: int = None, cursor: str = None,
+                                 fields: list = None):
+    """Candidates matching profile filters, newest first.
+
+    ``skills`` is a list of (skill, min_years) pairs that must all match.
+    """
+    conditions = [skill_filter(skill, years) for skill, years in skills or []]
+    if min_experience is not None:
+        conditions.append(DBCandidate.experience_years >= min_experience)
+    if graduated_after is not None:
+        conditions.append(DBCandidate.graduation_year > graduated_after)
+    return await keyset_page(
+        session, _select_fields(CANDIDATE_LIST_FIELDS, fields),
+        [DBCandidate.created_at, DBCandidate.id], limit, cursor,
+        where=and_(*conditions) if conditions else None
+    )
+
 async def get_candidate_by_id(session: AsyncSession, candidate_id: str):
     """Get candidate by ID"""
     stmt = select(DBCandidate).where(DBCandidate.candidate_id == candidate_id)
     result = await session.execute(stmt)
     return result.scalar_one_or_none()
 
+async def get_candidate_by_file_hash(session: AsyncSession, file_hash: str):
+    """Get the candidate created from a CV file with this content hash"""
+    stmt = select(DBCandidate).where(DBCandidate.file_hash == file_hash).order_by(DBCandidate.created_at).limit(1)
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
+
 async def delete_candidate(session: AsyncSession, candidate_id: str):
     """Delete a candidate"""
     stmt = select(DBCandidate).where(DBCandidate.candidate_id == candidate_id)
     result = await session.execute(stmt)
     candidate = result.scalar_one_or_none()
     if candidate:
+        await session.execute(delete(DBCandidateEmbedding).where(DBCandidateEmbedding.candidate_id == candidate_id))
         await session.delete(candidate)
         await session.commit()
         return True
@@ -325,6 +545,41 @@ async def save_candidate_score(session: AsyncSession, score_data: dict, jd_id: i
     await session.refresh(score)
     return score
 
+async def save_candidate_scores(session: AsyncSession, scores: list, jd_id: int, chunk_size: int = 500):
+    """Save many candidate scores with bulk inserts and a single commit"""
+    if not scores:
+        return 0
+    now = datetime.utcnow()
+    rows = [{
+        "candidate_id": s.get("id"),
+        "name": s.get("name"),
+        "score": s.get("score"),
+        "reason": s.get("reason"),
+        "jd_id": jd_id,
+        "created_at": now
+    } for s in scores]
+    for start in range(0, len(rows), chunk_size):
+        await session.execute(insert(DBCandidateScore), rows[start:start + chunk_size])
+    await session.commit()
+    return len(rows)
+
+async def save_extraction_artifacts(session: AsyncSession, artifacts: list, chunk_size: int = 500):
+    """Save CV extraction artifacts with bulk inserts and a single commit"""
+    if not artifacts:
+        return 0
+    now = datetime.utcnow()
+    rows = [{
+        "candidate_id": a.get("candidate_id"),
+        "filename": a.get("filename"),
+        "file_hash": a.get("file_hash"),
+        "data": a.get("extracted"),
+        "created_at": now
+    } for a in artifacts]
+    for start in range(0, len(rows), chunk_size):
+        await session.execute(insert(DBExtractionArtifact), rows[start:start + chunk_size])
+    await session.commit()
+    return len(rows)
+
 async def get_candidate_scores(session: AsyncSession, jd_id: int = None):
     """Get candidate scores, optionally filtered by JD"""
     if jd_id:
@@ -334,6 +589,19 @@ async def get_candidate_scores(session: AsyncSession, jd_id: int = None):
     result = await session.execute(stmt)
     return result.scalars().all()
 
+async def get_candidate_scores_page(session: AsyncSession, jd_id: int = None, limit: int = None,
+                                    cursor: str = None, fields: list = None):
+    """Get scores one keyset page at a time: by score within a JD, otherwise newest first"""
+    selected = _select_fields(SCORE_LIST_FIELDS, fields)
+    if jd_id:
+        return await keyset_page(
+            session, selected, [DBCandidateScore.score, DBCandidateScore.id], limit, cursor,
+            where=DBCandidateScore.jd_id == jd_id
+        )
+    return await keyset_page(
+        session, selected, [DBCandidateScore.created_at, DBCandidateScore.id], limit, cursor
+    )
+
 async def get_scores_by_jd(session: AsyncSession, jd_id: int):
     """Get all scores for a specific JD"""
     stmt = select(DBCandidateScore).where(DBCandidateScore.jd_id == jd_id).order_by(DBCandidateScore.score.desc())
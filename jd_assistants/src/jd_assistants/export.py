@@ -0,0 +1,44 @@
+"""
+Streaming serializers for bulk exports.
+
+Rows arrive in chunks from a server-side cursor and are encoded one chunk at
+a time, so memory stays constant regardless of table size.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, List
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+async def ndjson_stream(chunks: AsyncIterator[List[dict]]):
+    """Encode row chunks as newline-delimited JSON"""
+    async for rows in chunks:
+        yield "".join(json.dumps(row, ensure_ascii=False, default=_json_default) + "\n" for row in rows)
+
+
+async def csv_stream(chunks: AsyncIterator[List[dict]], fields: List[str]):
+    """Encode row chunks as CSV with a header row"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    yield buffer.getvalue()
+    async for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            [row[f].isoformat() if isinstance(row[f], datetime) else row[f] for f in fields]
+            for row in rows
+        )
+        yield buffer.getvalue()
@@ -1,5 +1,7 @@
 from langchain_groq import ChatGroq as LangchainChatGroq
 from langchain_core.messages import AIMessage
+from jd_assistants.inference.scheduler import get_scheduler, estimate_tokens, LLM_SCHEDULER_ENABLED
+import asyncio
 import json as json_lib
 from typing import AsyncIterator, Iterator
 from pydantic import BaseModel
@@ -7,29 +9,76 @@ from pydantic import BaseModel
 
 class ChatGroq(LangchainChatGroq):
     def __init__(self, model: str, api_key: str, temperature: float = 0, base_url: str = None):
-        super().__init__(model_name=model, groq_api_key=api_key, temperature=temperature)
+        # Retries are handled by the request scheduler when it is enabled
+        super().__init__(
+            model_name=model, groq_api_key=api_key, temperature=temperature,
+            max_retries=0 if LLM_SCHEDULER_ENABLED else 2
+        )
 
-    def invoke(self, input, json: bool = False, **kwargs):
+    def _estimate_tokens(self, input, kwargs) -> int:
+        return estimate_tokens(input, kwargs.get("max_tokens") or self.max_tokens)
+
+    @staticmethod
+    def _parse_json(res):
+        try:
+            if isinstance(res.content, str):
+                data = json_lib.loads(res.content)
+                res.content = data
+        except:
+            pass
+        return res
+
+    # config stays second and positional: RunnableBinding/RunnableSequence pass it that way
+    def invoke(self, input, config=None, *, json: bool = False, priority: int = None, **kwargs):
         if json:
             kwargs["response_format"] = {"type": "json_object"}
-            res = super().invoke(input, **kwargs)
-            try:
-                if isinstance(res.content, str):
-                    data = json_lib.loads(res.content)
-                    res.content = data
-            except:
-                pass
-            return res
-        return super().invoke(input, **kwargs)
+        scheduler = get_scheduler(self.model_name)
+        if scheduler:
+            res = scheduler.run_sync(
+                lambda: LangchainChatGroq.invoke(self, input, config, **kwargs), self._estimate_tokens(input, kwargs)
+            )
+        else:
+            res = super().invoke(input, config, **kwargs)
+        return self._parse_json(res) if json else res
+    
+    async def ainvoke(self, input, config=None, *, json: bool = False, priority: int = None, **kwargs):
+        """Async invoke through the Groq async client, within the shared rate limits"""
+        if json:
+            kwargs["response_format"] = {"type": "json_object"}
+        scheduler = get_scheduler(self.model_name)
+        if scheduler:
+            res = await scheduler.run(
+                lambda: LangchainChatGroq.ainvoke(self, input, config, **kwargs), self._estimate_tokens(input, kwargs), priority
+            )
+        else:
+            res = await super().ainvoke(input, config, **kwargs)
+        return self._parse_json(res) if json else res
     
-    def stream(self, input, **kwargs):
+    def stream(self, input, config=None, **kwargs):
         """Stream response tokens"""
-        return super().stream(input, **kwargs)
+        return super().stream(input, config, **kwargs)
     
-    async def astream(self, input, **kwargs):
-        """Async stream response tokens"""
-        async for chunk in super().astream(input, **kwargs):
-            yield chunk
+    async def astream(self, input, config=None, *, priority: int = None, **kwargs):
+        """Async stream response tokens, within the shared rate limits"""
+        scheduler = get_scheduler(self.model_name)
+        if not scheduler:
+            async for chunk in super().astream(input, config, **kwargs):
+                yield chunk
+            return
+        tokens = self._estimate_tokens(input, kwargs)
+        for attempt in range(scheduler.max_retries + 1):
+            await scheduler.acquire(tokens, priority)
+            started = False
+            try:
+                async for chunk in super().astream(input, config, **kwargs):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                # Only retry if nothing was sent to the caller yet
+                if started:
+                    raise
+                await asyncio.sleep(await scheduler.on_error(e, attempt))
     
     def stream_structured(self, input, schema: type[BaseModel], **kwargs):
         """Stream with structured output"""
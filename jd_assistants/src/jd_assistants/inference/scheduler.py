@@ -0,0 +1,335 @@
+"""
+Rate-limit-aware scheduling for Groq requests.
+
+Every call reserves one request and an estimated number of tokens from two
+token buckets (requests-per-minute and tokens-per-minute). The buckets live
+in Redis so all API and worker processes share one budget, with an
+in-process bucket as fallback while Redis is unavailable. Waiting calls are
+served by priority, so interactive requests overtake bulk scoring and
+ingestion. Rate-limit and transient errors are retried with jittered
+exponential backoff that honors Retry-After.
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Optional
+
+import groq
+import redis.asyncio as redis
+
+from jd_assistants.cache import get_redis_client, breaker
+from jd_assistants.metrics import record_retry
+
+# Set to 0 to send LLM requests without scheduling
+LLM_SCHEDULER_ENABLED = os.getenv("LLM_SCHEDULER_ENABLED", "1") == "1"
+# Budgets per model, shared by all processes (0 = unlimited)
+GROQ_RPM_LIMIT = int(os.getenv("GROQ_RPM_LIMIT", "30"))
+GROQ_TPM_LIMIT = int(os.getenv("GROQ_TPM_LIMIT", "12000"))
+# Completion tokens reserved per request when max_tokens is not set
+LLM_COMPLETION_TOKEN_ESTIMATE = int(os.getenv("LLM_COMPLETION_TOKEN_ESTIMATE", "512"))
+# Retries for 429, 5xx and connection errors
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1.0"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "60"))
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 10
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar("llm_priority", default=PRIORITY_INTERACTIVE)
+
+
+@contextmanager
+def llm_priority(priority: int):
+    """Run LLM calls made inside the block (and tasks started from it) at ``priority``"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+def estimate_tokens(messages, max_tokens: Optional[int] = None) -> int:
+    """Rough prompt + completion token count (about 4 characters per token)"""
+    if isinstance(messages, str):
+        chars = len(messages)
+    else:
+        chars = sum(len(str(getattr(m, "content", m))) for m in messages)
+    return chars // 4 + (max_tokens or LLM_COMPLETION_TOKEN_ESTIMATE)
+
+
+class LocalTokenBucket:
+    """Token bucket refilled continuously up to ``capacity`` per minute"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.rate = capacity / 60.0
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, amount: float) -> float:
+        """Take ``amount`` tokens, or return the seconds to wait before it can succeed"""
+        with self._lock:
+            self._refill()
+            # Requests larger than the bucket would never fit; let them drain it instead
+            amount = min(amount, self.capacity)
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return 0.0
+            return (amount - self.tokens) / self.rate
+
+    def adjust(self, amount: float):
+        """Charge (or refund, if negative) tokens after the real usage is known"""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+
+# KEYS[1] bucket hash; ARGV: capacity, refill per second, amount
+# Returns 0 when the tokens were taken, otherwise milliseconds to wait
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local amount = math.min(tonumber(ARGV[3]), capacity)
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= amount then
+  tokens = tokens - amount
+else
+  wait = math.ceil((amount - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], 120)
+return wait
+"""
+
+
+class RedisTokenBucket:
+    """Token bucket stored in Redis and updated atomically by a Lua script"""
+
+    def __init__(self, key: str, capacity: int):
+        self.key = key
+        self.capacity = capacity
+        self.rate = capacity / 60.0
+        self._script = None
+
+    async def take(self, amount: float) -> float:
+        client = await get_redis_client()
+        if self._script is None or self._script.registered_client is not client:
+            self._script = client.register_script(_TAKE_SCRIPT)
+        wait_ms = await self._script(keys=[self.key], args=[self.capacity, self.rate, amount])
+        return int(wait_ms) / 1000.0
+
+    async def adjust(self, amount: float):
+        client = await get_redis_client()
+        await client.hincrbyfloat(self.key, "tokens", -amount)
+
+
+class SharedTokenBucket:
+    """Redis bucket when reachable, in-process bucket otherwise"""
+
+    def __init__(self, key: str, capacity: int):
+        self.capacity = capacity
+        self.redis_bucket = RedisTokenBucket(key, capacity)
+        self.local_bucket = LocalTokenBucket(capacity)
+
+    async def take(self, amount: float) -> float:
+        if breaker.allow():
+            try:
+                wait = await self.redis_bucket.take(amount)
+                breaker.record_success()
+                return wait
+            except (redis.RedisError, OSError, asyncio.TimeoutError) as e:
+                breaker.record_failure(e)
+        return self.local_bucket.take(amount)
+
+    async def adjust(self, amount: float):
+        if breaker.allow():
+            try:
+                await self.redis_bucket.adjust(amount)
+                return
+            except (redis.RedisError, OSError, asyncio.TimeoutError) as e:
+                breaker.record_failure(e)
+        self.local_bucket.adjust(amount)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors and connection problems are worth retrying"""
+    if isinstance(error, (groq.RateLimitError, groq.APIConnectionError, groq.InternalServerError)):
+        return True
+    return isinstance(error, groq.APIStatusError) and error.status_code >= 500
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds requested by the server's Retry-After header, if any"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def backoff_delay(attempt: int, error: Optional[Exception] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than Retry-After"""
+    delay = random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+    server_delay = retry_after(error) if error is not None else None
+    if server_delay is not None:
+        delay = max(delay, server_delay) + random.uniform(0, LLM_BACKOFF_BASE)
+    return delay
+
+
+class RequestScheduler:
+    """Admits LLM calls for one model within its RPM/TPM budget, by priority"""
+
+    def __init__(self, model: str, rpm: int = GROQ_RPM_LIMIT, tpm: int = GROQ_TPM_LIMIT,
+                 max_retries: int = LLM_MAX_RETRIES):
+        self.model = model
+        self.max_retries = max_retries
+        self.request_bucket = SharedTokenBucket(f"llm:ratelimit:{model}:rpm", rpm) if rpm > 0 else None
+        self.token_bucket = SharedTokenBucket(f"llm:ratelimit:{model}:tpm", tpm) if tpm > 0 else None
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._condition: Optional[asyncio.Condition] = None
+        self._loop = None
+        # Set after a 429 so other callers stop too instead of hitting the limit again
+        self._paused_until = 0.0
+        self.stats = {"requests": 0, "retries": 0, "rate_limited": 0, "wait_seconds": 0.0}
+
+    def _get_condition(self) -> asyncio.Condition:
+        # asyncio primitives belong to one event loop (sync callers may start several)
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._loop is not loop:
+            self._condition = asyncio.Condition()
+            self._loop = loop
+            self._waiters = []
+        return self._condition
+
+    async def _try_take(self, tokens: int) -> float:
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            return pause
+        if self.request_bucket:
+            wait = await self.request_bucket.take(1)
+            if wait > 0:
+                return wait
+        if self.token_bucket:
+            wait = await self.token_bucket.take(tokens)
+            if wait > 0:
+                if self.request_bucket:
+                    await self.request_bucket.adjust(-1)
+                return wait
+        return 0.0
+
+    async def acquire(self, tokens: int, priority: Optional[int] = None):
+        """Wait until this call may be sent; lower priority values go first"""
+        priority = current_priority() if priority is None else priority
+        condition = self._get_condition()
+        entry = (priority, next(self._sequence))
+        started = time.monotonic()
+        self.stats["requests"] += 1
+        async with condition:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    wait = None
+                    if self._waiters[0] == entry:
+                        wait = await self._try_take(tokens)
+                        if wait <= 0:
+                            return
+                    try:
+                        await asyncio.wait_for(condition.wait(), timeout=wait)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                condition.notify_all()
+                self.stats["wait_seconds"] += time.monotonic() - started
+
+    async def record_usage(self, estimated: int, actual: Optional[int]):
+        """Correct the token bucket once the real token count is known"""
+        if self.token_bucket and actual is not None and actual != estimated:
+            await self.token_bucket.adjust(actual - estimated)
+
+    async def on_error(self, error: Exception, attempt: int) -> float:
+        """Backoff before the next attempt, or re-raise if the call should not be retried"""
+        if attempt >= self.max_retries or not is_retryable(error):
+            raise error
+        self.stats["retries"] += 1
+        record_retry(self.model, "rate_limit" if isinstance(error, groq.RateLimitError) else "error")
+        delay = backoff_delay(attempt, error)
+        if isinstance(error, groq.RateLimitError):
+            self.stats["rate_limited"] += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        return delay
+
+    async def run(self, call: Callable[[], Awaitable], tokens: int, priority: Optional[int] = None):
+        """Run ``call`` within budget, retrying transient failures"""
+        for attempt in range(self.max_retries + 1):
+            await self.acquire(tokens, priority)
+            try:
+                result = await call()
+            except Exception as e:
+                await asyncio.sleep(await self.on_error(e, attempt))
+                continue
+            await self.record_usage(tokens, usage_tokens(result))
+            return result
+
+    def run_sync(self, call: Callable, tokens: int):
+        """Blocking variant for sync callers; budget is tracked in process only"""
+        for attempt in range(self.max_retries + 1):
+            for bucket, amount in ((self.request_bucket, 1), (self.token_bucket, tokens)):
+                if bucket:
+                    while (wait := bucket.local_bucket.take(amount)) > 0:
+                        time.sleep(wait)
+            self.stats["requests"] += 1
+            try:
+                return call()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                self.stats["retries"] += 1
+                record_retry(self.model, "rate_limit" if isinstance(e, groq.RateLimitError) else "error")
+                time.sleep(backoff_delay(attempt, e))
+
+
+def usage_tokens(response) -> Optional[int]:
+    """Total tokens reported by the provider for a response, if present"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        return usage.get("total_tokens")
+    return None
+
+
+_schedulers = {}
+
+
+def get_scheduler(model: str) -> Optional[RequestScheduler]:
+    """Shared scheduler for a model, or None when scheduling is disabled"""
+    if not LLM_SCHEDULER_ENABLED:
+        return None
+    if model not in _schedulers:
+        _schedulers[model] = RequestScheduler(model)
+    return _schedulers[model]
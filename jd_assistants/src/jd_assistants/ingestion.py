@@ -0,0 +1,329 @@
+"""
+Concurrent CV ingestion pipeline.
+
+Uploaded PDFs are parsed straight from memory in the PDF worker process
+pool (tools/pdf_pool.py); with CV_STORAGE_POLICY=disk the original is also
+written to the upload directory in the background, off the parsing path. The LLM
+extraction and summarization steps run concurrently under a configurable
+parallelism limit, and every file gets its own result or error entry.
+
+Files are identified by the SHA-256 of their bytes: a re-uploaded CV reuses
+the cached extraction and bio instead of calling the LLM again, and (unless
+CV_DEDUPE_EXISTING=0) maps to the candidate row it already created.
+"""
+import asyncio
+import hashlib
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, BinaryIO, Callable, List, Optional, Tuple, Union
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from jd_assistants.archive import ZipMember
+from jd_assistants.artifacts import record_extraction
+from jd_assistants.cache import cache_candidate_extraction, get_cached_extraction
+from jd_assistants.database import create_candidate, get_candidate_by_file_hash
+from jd_assistants.inference.scheduler import llm_priority, PRIORITY_BULK
+from jd_assistants.metrics import record_cache
+from jd_assistants.profiles import build_profile
+from jd_assistants.semantic_index import index_candidates
+from jd_assistants.uploads import StreamedUpload, is_pdf_filename
+
+# Maximum number of CVs going through the LLM steps at the same time
+CV_INGEST_CONCURRENCY = int(os.getenv("CV_INGEST_CONCURRENCY", "8"))
+# Worker threads used for writing and hashing PDF files
+PDF_PARSE_WORKERS = int(os.getenv("PDF_PARSE_WORKERS", str(os.cpu_count() or 4)))
+# Keep a copy of uploaded CVs: disk (upload directory) or none (parse in memory only)
+CV_STORAGE_POLICY = os.getenv("CV_STORAGE_POLICY", "disk")
+
+# Raw bytes, the path of a stored file, a streamed upload (hashed while it was
+# received) or a member of an uploaded ZIP archive (read on demand)
+CVContent = Union[bytes, Path, StreamedUpload, ZipMember]
+# Reuse the existing candidate when the same CV file is uploaded again
+CV_DEDUPE_EXISTING = os.getenv("CV_DEDUPE_EXISTING", "1") == "1"
+
+
+def extract_candidate_fields(extracted_data: dict):
+    """Get name, email and comma-joined skills from a ReadCVAgent result"""
+    personal_info = extracted_data.get("personal_info", {}) or {}
+    name = personal_info.get("name", "Unknown")
+    email = personal_info.get("email", "")
+    skills_list = extracted_data.get("skills", [])
+    skills = ", ".join([s.get("name", "") for s in skills_list if isinstance(s, dict)])
+    return name, email, skills
+
+
+class CVIngestionPipeline:
+    """Process a batch of uploaded CVs with bounded concurrency"""
+
+    def __init__(
+        self,
+        read_pdf_tool,
+        read_cv_agent,
+        summarization_agent,
+        upload_dir: Path,
+        concurrency: int = CV_INGEST_CONCURRENCY,
+        pdf_workers: int = PDF_PARSE_WORKERS,
+        storage_policy: str = CV_STORAGE_POLICY,
+    ):
+        self.read_pdf_tool = read_pdf_tool
+        self.read_cv_agent = read_cv_agent
+        self.summarization_agent = summarization_agent
+        self.upload_dir = upload_dir
+        self.concurrency = max(1, concurrency)
+        self.storage_policy = storage_policy
+        self._executor = ThreadPoolExecutor(max_workers=max(1, pdf_workers), thread_name_prefix="pdf-io")
+        # Background writes of uploaded originals, kept referenced until done
+        self._pending_writes = set()
+
+    @staticmethod
+    def _store(file_path: Path, content: Union[bytes, BinaryIO]):
+        """Write the upload to disk, copying file objects in chunks (runs in the worker pool)"""
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(file_path, "wb") as f:
+            if isinstance(content, bytes):
+                f.write(content)
+            else:
+                content.seek(0)
+                shutil.copyfileobj(content, f, 1024 * 1024)
+
+    @staticmethod
+    def _hash_content(content: CVContent) -> str:
+        """SHA-256 of the file bytes (runs in the worker pool)"""
+        digest = hashlib.sha256()
+        if isinstance(content, Path):
+            with open(content, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+        elif isinstance(content, ZipMember):
+            # Archive members are hashed while decompressing, without holding the whole file
+            for chunk in content.chunks():
+                digest.update(chunk)
+        else:
+            digest.update(content)
+        return digest.hexdigest()
+
+    async def hash_file(self, content: CVContent) -> str:
+        """Hash a file without blocking the event loop"""
+        if isinstance(content, StreamedUpload):
+            return content.sha256
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._hash_content, content)
+
+    def stored_path(self, filename: str) -> Path:
+        """Build a unique upload path for a file"""
+        return self.upload_dir / f"{datetime.utcnow().timestamp()}_{filename}"
+
+    async def store_upload(self, filename: str, content: Union[bytes, BinaryIO]) -> Path:
+        """Write an upload to the upload directory and return its path"""
+        file_path = self.stored_path(filename)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._store, file_path, content)
+        return file_path
+
+    def _persist_in_background(self, filename: str, content: bytes):
+        async def _persist():
+            try:
+                await self.store_upload(filename, content)
+            except Exception as e:
+                print(f"⚠️ Could not store {filename}: {e}")
+
+        task = asyncio.create_task(_persist())
+        self._pending_writes.add(task)
+        task.add_done_callback(self._pending_writes.discard)
+
+    async def parse_pdf(self, filename: str, content: CVContent) -> str:
+        """Parse a PDF without blocking the event loop.
+
+        ``content`` is either the raw upload, parsed in memory, or the path of
+        an already stored file. Raw uploads are stored in the background when
+        the storage policy is "disk".
+        """
+        if isinstance(content, (StreamedUpload, ZipMember)):
+            # Only read into memory once the file is being processed
+            loop = asyncio.get_running_loop()
+            content = await loop.run_in_executor(self._executor, content.read)
+        if isinstance(content, Path):
+            source = str(content)
+        else:
+            source = content
+            if self.storage_policy == "disk":
+                self._persist_in_background(filename, content)
+        pdf_content = await self.read_pdf_tool._arun(source)
+        if pdf_content == "Error":
+            raise ValueError("Could not read PDF content")
+        return pdf_content
+
+    async def _get_cached(self, file_hash: str) -> Optional[dict]:
+        try:
+            return await get_cached_extraction(file_hash)
+        except Exception as e:
+            print(f"⚠️ Extraction cache lookup failed: {e}")
+            return None
+
+    async def _set_cached(self, file_hash: str, data: dict):
+        try:
+            await cache_candidate_extraction(file_hash, data)
+        except Exception as e:
+            print(f"⚠️ Extraction cache write failed: {e}")
+
+    async def _index(self, session: AsyncSession, candidate_data: dict):
+        """Add a saved candidate to the semantic index; failures only delay indexing"""
+        try:
+            await index_candidates(session, [(candidate_data["id"], candidate_data["bio"], candidate_data["skills"])])
+        except Exception as e:
+            await session.rollback()
+            print(f"⚠️ Indexing {candidate_data['id']} failed, it will be indexed on the next shortlist: {e}")
+
+    async def process_file(self, filename: str, content: CVContent, candidate_id: str,
+                           file_hash: Optional[str] = None) -> dict:
+        """Parse, extract and summarize a single CV, reusing cached results by file hash"""
+        if file_hash:
+            cached = await self._get_cached(file_hash)
+            record_cache("extraction", isinstance(cached, dict) and "bio" in cached)
+            if isinstance(cached, dict) and "bio" in cached:
+                return {
+                    "id": candidate_id,
+                    "name": cached.get("name", "Unknown"),
+                    "email": cached.get("email", ""),
+                    "bio": cached["bio"],
+                    "skills": cached.get("skills", ""),
+                    "profile": build_profile(cached.get("extracted")),
+                    "file_hash": file_hash,
+                    "cached": True
+                }
+
+        pdf_content = await self.parse_pdf(filename, content)
+        extracted_data = await self.read_cv_agent.aprocess(pdf_content, filename)
+        record_extraction(candidate_id, filename, file_hash, extracted_data)
+        name, email, skills = extract_candidate_fields(extracted_data)
+
+        candidate_info = {
+            "name": name,
+            "education": extracted_data.get("education"),
+            "work_experience": extracted_data.get("work_experience"),
+            "skills": skills
+        }
+        bio = await self.summarization_agent.aprocess(candidate_info)
+
+        if file_hash:
+            await self._set_cached(file_hash, {
+                "extracted": extracted_data,
+                "name": name,
+                "email": email,
+                "skills": skills,
+                "bio": bio
+            })
+
+        return {
+            "id": candidate_id,
+            "name": name,
+            "email": email,
+            "bio": bio,
+            "skills": skills,
+            "profile": build_profile(extracted_data),
+            "file_hash": file_hash,
+            "cached": False
+        }
+
+    async def run(
+        self,
+        files: List[Tuple[str, CVContent]],
+        session: AsyncSession,
+        on_progress: Optional[Callable[[dict], Awaitable[None]]] = None,
+    ) -> dict:
+        """Ingest a batch of (filename, content) pairs and save candidates.
+
+        ``on_progress`` is awaited with each per-file outcome as soon as it is known.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        db_lock = asyncio.Lock()
+        # file hash -> future outcome of the first file in this batch with that content
+        batch_hashes = {}
+
+        async def _ingest(filename: str, content: CVContent):
+            outcome = await _ingest_one(filename, content)
+            if on_progress:
+                await on_progress(outcome)
+            return outcome
+
+        async def _ingest_one(filename: str, content: CVContent):
+            if not is_pdf_filename(filename):
+                return {"filename": filename, "status": "error", "error": "Only PDF files are supported"}
+            try:
+                file_hash = await self.hash_file(content)
+            except Exception as e:
+                return {"filename": filename, "status": "error", "error": str(e)}
+
+            if file_hash in batch_hashes:
+                # Same content as an earlier file: report what happened to that one
+                original = await asyncio.shield(batch_hashes[file_hash])
+                outcome = {k: v for k, v in original.items() if k != "cached"}
+                outcome.update(filename=filename, duplicate=True)
+                return outcome
+
+            first = asyncio.get_running_loop().create_future()
+            batch_hashes[file_hash] = first
+            try:
+                outcome = await _ingest_new(filename, content, file_hash)
+            except BaseException:
+                first.cancel()
+                raise
+            first.set_result(outcome)
+            return outcome
+
+        async def _ingest_new(filename: str, content: CVContent, file_hash: str):
+            try:
+                if CV_DEDUPE_EXISTING:
+                    # AsyncSession is not safe for concurrent use
+                    async with db_lock:
+                        existing = await get_candidate_by_file_hash(session, file_hash)
+                    if existing:
+                        return {
+                            "filename": filename,
+                            "candidate_id": existing.candidate_id,
+                            "name": existing.name,
+                            "email": existing.email,
+                            "status": "success",
+                            "duplicate": True
+                        }
+
+                # Unique across batches, so concurrent jobs never upsert each other's rows
+                candidate_id = f"cand_{uuid.uuid4().hex}"
+                async with semaphore:
+                    candidate_data = await self.process_file(filename, content, candidate_id, file_hash)
+                cached = candidate_data.pop("cached")
+                async with db_lock:
+                    await create_candidate(session, candidate_data)
+                    await self._index(session, candidate_data)
+                return {
+                    "filename": filename,
+                    "candidate_id": candidate_id,
+                    "name": candidate_data["name"],
+                    "email": candidate_data["email"],
+                    "status": "success",
+                    "cached": cached
+                }
+            except Exception as e:
+                async with db_lock:
+                    await session.rollback()
+                return {"filename": filename, "status": "error", "error": str(e)}
+
+        # Bulk work yields the LLM budget to interactive requests
+        with llm_priority(PRIORITY_BULK):
+            outcomes = await asyncio.gather(*[
+                _ingest(filename, content) for filename, content in files
+            ])
+
+        results = [o for o in outcomes if o["status"] == "success"]
+        errors = [f"{o['filename']}: {o['error']}" for o in outcomes if o["status"] == "error"]
+        return {
+            "success": len(results),
+            "failed": len(errors),
+            "results": results,
+            "errors": errors
+        }
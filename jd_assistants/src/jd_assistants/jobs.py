@@ -0,0 +1,310 @@
+"""
+Background job queue for bulk CV uploads.
+
+Jobs live in Redis (through the client from cache.py) so that dedicated worker
+processes can consume them. A worker claims a job by atomically moving it to
+its own processing list and removes it from there once the job is finished.
+Workers refresh a heartbeat key while they run; jobs left in the processing
+list of a worker whose heartbeat has expired (crashed or redeployed) are put
+back on the queue by the other workers. When Redis is not reachable, jobs are
+kept in process and executed by the embedded worker, which is enough for
+local runs.
+"""
+import asyncio
+import json
+import os
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Tuple
+
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+from jd_assistants.cache import get_blocking_redis_client, get_redis_client
+from jd_assistants.database import async_session_maker
+
+CV_UPLOAD_QUEUE = "jobs:queue:cv_upload"
+# How long job status and results are kept (default 24 hours)
+JOB_TTL = int(os.getenv("JOB_TTL", "86400"))
+# Set to 0 when dedicated worker processes consume the Redis queue
+JOB_INLINE_WORKER = os.getenv("JOB_INLINE_WORKER", "1") == "1"
+# Seconds without a heartbeat after which a worker's claimed jobs are requeued
+JOB_WORKER_TIMEOUT = int(os.getenv("JOB_WORKER_TIMEOUT", "60"))
+
+_INT_FIELDS = ("total", "processed", "succeeded", "failed")
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def new_job(job_type: str, total: int) -> dict:
+    """Build the initial status record of a job"""
+    now = _now()
+    return {
+        "id": uuid.uuid4().hex,
+        "type": job_type,
+        "status": "queued",
+        "total": total,
+        "processed": 0,
+        "succeeded": 0,
+        "failed": 0,
+        "error": "",
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+class RedisJobStore:
+    """Job status, payloads and results stored in Redis"""
+
+    def __init__(self, client, blocking_client=None):
+        self.client = client
+        # BLMOVE waits longer than the shared client's socket timeout
+        self.blocking_client = blocking_client or client
+        self.worker_id = uuid.uuid4().hex
+
+    @staticmethod
+    def _processing_list(queue: str, worker_id: str) -> str:
+        return f"{queue}:processing:{worker_id}"
+
+    @staticmethod
+    def _heartbeat_key(worker_id: str) -> str:
+        return f"jobs:worker:{worker_id}"
+
+    async def enqueue(self, job: dict, payload: dict, queue: str = CV_UPLOAD_QUEUE):
+        """Store a new job and push it onto the queue"""
+        key = f"job:{job['id']}"
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={k: str(v) for k, v in job.items()})
+            pipe.expire(key, JOB_TTL)
+            pipe.setex(f"{key}:payload", JOB_TTL, json.dumps(payload))
+            pipe.lpush(queue, job["id"])
+            await pipe.execute()
+
+    async def dequeue(self, queue: str = CV_UPLOAD_QUEUE, timeout: int = 5) -> Optional[Tuple[str, dict]]:
+        """Claim the next job, waiting up to ``timeout`` seconds; ``ack`` it when done"""
+        try:
+            job_id = await self.blocking_client.blmove(
+                queue, self._processing_list(queue, self.worker_id), timeout, src="RIGHT", dest="LEFT"
+            )
+        except (RedisTimeoutError, asyncio.TimeoutError):
+            # The socket timed out before the server answered: nothing was moved
+            return None
+        if not job_id:
+            return None
+        payload = await self.client.get(f"job:{job_id}:payload")
+        return job_id, json.loads(payload) if payload else {}
+
+    async def ack(self, job_id: str, queue: str = CV_UPLOAD_QUEUE):
+        """Release a finished job from this worker's processing list"""
+        await self.client.lrem(self._processing_list(queue, self.worker_id), 1, job_id)
+
+    async def heartbeat(self):
+        """Mark this worker as alive"""
+        await self.client.set(self._heartbeat_key(self.worker_id), _now(), ex=JOB_WORKER_TIMEOUT)
+
+    async def requeue_stale(self, queue: str = CV_UPLOAD_QUEUE) -> int:
+        """Put jobs claimed by workers without a heartbeat back on the queue"""
+        requeued = 0
+        prefix = self._processing_list(queue, "")
+        async for processing in self.client.scan_iter(match=prefix + "*"):
+            worker_id = processing[len(prefix):]
+            if worker_id == self.worker_id or await self.client.exists(self._heartbeat_key(worker_id)):
+                continue
+            # Requeued jobs go to the consuming end so they run next
+            while (job_id := await self.client.lmove(processing, queue, src="RIGHT", dest="RIGHT")):
+                await self.update(job_id, status="queued", processed=0, succeeded=0, failed=0)
+                print(f"⚠️ Requeued job {job_id} from stale worker {worker_id}")
+                requeued += 1
+        return requeued
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        """Get job status"""
+        job = await self.client.hgetall(f"job:{job_id}")
+        if not job:
+            return None
+        for field in _INT_FIELDS:
+            job[field] = int(job.get(field, 0))
+        return job
+
+    async def update(self, job_id: str, **fields):
+        """Update job status fields"""
+        fields["updated_at"] = _now()
+        await self.client.hset(f"job:{job_id}", mapping={k: str(v) for k, v in fields.items()})
+
+    async def record_progress(self, job_id: str, succeeded: bool):
+        """Count one processed item"""
+        key = f"job:{job_id}"
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hincrby(key, "processed", 1)
+            pipe.hincrby(key, "succeeded" if succeeded else "failed", 1)
+            pipe.hset(key, "updated_at", _now())
+            await pipe.execute()
+
+    async def set_result(self, job_id: str, result: dict):
+        """Store the final job result"""
+        await self.client.setex(f"job:{job_id}:result", JOB_TTL, json.dumps(result))
+
+    async def get_result(self, job_id: str) -> Optional[dict]:
+        """Get the final job result"""
+        result = await self.client.get(f"job:{job_id}:result")
+        return json.loads(result) if result else None
+
+
+class LocalJobStore:
+    """In-process job store used when Redis is unavailable"""
+
+    def __init__(self):
+        self.jobs = {}
+        self.results = {}
+        self.queues = {}
+
+    def _queue(self, queue: str) -> asyncio.Queue:
+        if queue not in self.queues:
+            self.queues[queue] = asyncio.Queue()
+        return self.queues[queue]
+
+    async def enqueue(self, job: dict, payload: dict, queue: str = CV_UPLOAD_QUEUE):
+        self.jobs[job["id"]] = dict(job)
+        await self._queue(queue).put((job["id"], payload))
+
+    async def dequeue(self, queue: str = CV_UPLOAD_QUEUE, timeout: int = 5) -> Optional[Tuple[str, dict]]:
+        try:
+            return await asyncio.wait_for(self._queue(queue).get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def ack(self, job_id: str, queue: str = CV_UPLOAD_QUEUE):
+        pass
+
+    async def heartbeat(self):
+        pass
+
+    async def requeue_stale(self, queue: str = CV_UPLOAD_QUEUE) -> int:
+        # In-process jobs die with the process that would run them
+        return 0
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        job = self.jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def update(self, job_id: str, **fields):
+        fields["updated_at"] = _now()
+        self.jobs[job_id].update(fields)
+
+    async def record_progress(self, job_id: str, succeeded: bool):
+        job = self.jobs[job_id]
+        job["processed"] += 1
+        job["succeeded" if succeeded else "failed"] += 1
+        job["updated_at"] = _now()
+
+    async def set_result(self, job_id: str, result: dict):
+        self.results[job_id] = result
+
+    async def get_result(self, job_id: str) -> Optional[dict]:
+        return self.results.get(job_id)
+
+
+_job_store = None
+
+
+async def get_job_store():
+    """Get the Redis job store, falling back to the in-process store"""
+    global _job_store
+    if _job_store is None:
+        try:
+            client = await get_redis_client()
+            await client.ping()
+            _job_store = RedisJobStore(client, await get_blocking_redis_client())
+        except Exception as e:
+            print(f"⚠️ Redis unavailable for job queue, using in-process jobs: {e}")
+            _job_store = LocalJobStore()
+    return _job_store
+
+
+def job_status(job: dict) -> dict:
+    """Format a job record for API responses"""
+    total = job["total"]
+    return {
+        "job_id": job["id"],
+        "type": job["type"],
+        "status": job["status"],
+        "total": total,
+        "processed": job["processed"],
+        "succeeded": job["succeeded"],
+        "failed": job["failed"],
+        "progress": round(job["processed"] / total, 4) if total else 1.0,
+        "error": job.get("error") or None,
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
+
+
+async def process_cv_upload_job(store, pipeline, job_id: str, payload: dict):
+    """Run one CV upload job through the ingestion pipeline"""
+    await store.update(job_id, status="running")
+    files = [(f["filename"], Path(f["path"]) if f["path"] else b"") for f in payload.get("files", [])]
+
+    async def on_progress(outcome: dict):
+        await store.record_progress(job_id, outcome["status"] == "success")
+
+    try:
+        async with async_session_maker() as session:
+            result = await pipeline.run(files, session, on_progress=on_progress)
+        await store.set_result(job_id, result)
+        await store.update(job_id, status="completed")
+    except Exception as e:
+        await store.update(job_id, status="failed", error=str(e))
+
+
+async def _keep_alive(store, queue: str):
+    """Refresh this worker's heartbeat and requeue jobs of dead workers"""
+    interval = max(JOB_WORKER_TIMEOUT / 3, 1)
+    while True:
+        try:
+            await store.heartbeat()
+            await store.requeue_stale(queue)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ Job heartbeat error: {e}")
+        await asyncio.sleep(interval)
+
+
+async def run_worker(pipeline, store=None, queue: str = CV_UPLOAD_QUEUE):
+    """Consume CV upload jobs forever"""
+    store = store or await get_job_store()
+    keep_alive = asyncio.create_task(_keep_alive(store, queue))
+    try:
+        while True:
+            try:
+                item = await store.dequeue(queue)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Job queue error: {e}")
+                await asyncio.sleep(5)
+                continue
+            if item:
+                job_id, payload = item
+                await process_cv_upload_job(store, pipeline, job_id, payload)
+                await store.ack(job_id, queue)
+    finally:
+        keep_alive.cancel()
+
+
+_worker_task: Optional[asyncio.Task] = None
+
+
+async def start_embedded_worker(pipeline):
+    """Start a worker inside the API process when needed.
+
+    The in-process store always needs one; with Redis it is controlled by
+    JOB_INLINE_WORKER so workers can be scaled separately.
+    """
+    global _worker_task
+    store = await get_job_store()
+    if _worker_task is None and (JOB_INLINE_WORKER or isinstance(store, LocalJobStore)):
+        _worker_task = asyncio.create_task(run_worker(pipeline, store))
+    return _worker_task
@@ -0,0 +1,258 @@
+"""
+Prometheus-style metrics for LLM calls.
+
+BaseAgent records one sample per call (agent, model, tokens, cost, latency,
+time to first token), the request scheduler records retries, and the
+scoring/ingestion caches record hits and misses. Every sample is labelled
+with the API route that triggered it, read from the request scope that an
+HTTP middleware stores in a context variable. ``render_metrics`` produces the text exposition format
+served on ``/metrics``; counters are per process.
+"""
+import abc
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# USD per million (input, output) tokens
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+    "llama-3.1-8b-instant": (0.05, 0.08),
+}
+
+_request_scope: ContextVar[Optional[dict]] = ContextVar("metrics_request_scope", default=None)
+_agent: ContextVar[str] = ContextVar("metrics_agent", default="none")
+
+
+def set_request_scope(scope: dict):
+    """Remember the ASGI scope of the request being handled"""
+    return _request_scope.set(scope)
+
+
+def current_endpoint() -> str:
+    """Route template (e.g. /api/v1/candidates/{candidate_id}) of the current request"""
+    scope = _request_scope.get()
+    if scope is None:
+        return "none"
+    # Filled in by the router once the request has been matched
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def current_agent() -> str:
+    return _agent.get()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class _Metric(abc.ABC):
+    type = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...]):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    @abc.abstractmethod
+    def _samples(self):
+        """(suffix, labels, value) for every sample; called with the lock held"""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            for suffix, labels, value in self._samples():
+                lines.append(f"{self.name}{suffix}{_format_labels(labels)} {value:g}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self):
+        for key, value in self._values.items():
+            yield "", dict(zip(self.labelnames, key)), value
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...], buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def _samples(self):
+        for key, (counts, total, count) in self._values.items():
+            labels = dict(zip(self.labelnames, key))
+            for bound, bucket_count in zip(self.buckets, counts):
+                yield "_bucket", {**labels, "le": f"{bound:g}"}, bucket_count
+            yield "_bucket", {**labels, "le": "+Inf"}, count
+            yield "_sum", labels, total
+            yield "_count", labels, count
+
+
+_LLM_LABELS = ("agent", "model", "endpoint")
+
+llm_requests = Counter("llm_requests_total", "LLM calls by outcome", _LLM_LABELS + ("status",))
+llm_prompt_tokens = Counter("llm_prompt_tokens_total", "Prompt tokens sent to the LLM", _LLM_LABELS)
+llm_completion_tokens = Counter("llm_completion_tokens_total", "Completion tokens returned by the LLM", _LLM_LABELS)
+llm_cost = Counter("llm_cost_usd_total", "Estimated LLM spend in USD", _LLM_LABELS)
+llm_latency = Histogram("llm_request_duration_seconds", "Total LLM call latency", _LLM_LABELS)
+llm_ttft = Histogram("llm_time_to_first_token_seconds", "Time to first streamed token", _LLM_LABELS)
+llm_in_flight = Gauge("llm_requests_in_flight", "LLM calls currently running", ("agent", "model"))
+llm_retries = Counter("llm_retries_total", "LLM calls retried by the scheduler", _LLM_LABELS + ("reason",))
+llm_cache = Counter("llm_cache_requests_total", "LLM result cache lookups", ("cache", "endpoint", "result"))
+http_latency = Histogram("http_request_duration_seconds", "API request latency", ("endpoint", "method", "status"))
+
+REGISTRY = (
+    llm_requests, llm_prompt_tokens, llm_completion_tokens, llm_cost, llm_latency, llm_ttft,
+    llm_in_flight, llm_retries, llm_cache, http_latency,
+)
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware storing the request scope for metric labels and timing each request.
+
+    A request is timed until the last chunk of its body has been sent, so
+    streamed (SSE) responses count their whole duration rather than the
+    time to their headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        set_request_scope(scope)
+        started = time.perf_counter()
+        status_code = 500
+        observed = False
+
+        def observe():
+            nonlocal observed
+            if not observed:
+                observed = True
+                http_latency.observe(
+                    time.perf_counter() - started, endpoint=current_endpoint(), method=scope["method"], status=status_code
+                )
+
+        async def send_timed(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                observe()
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            # Errors and clients that disconnect mid-stream
+            observe()
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+def record_cache(cache: str, hit: bool):
+    """Count one lookup in an LLM result cache"""
+    llm_cache.inc(cache=cache, endpoint=current_endpoint(), result="hit" if hit else "miss")
+
+
+def record_retry(model: str, reason: str):
+    """Count one scheduler retry for the agent currently calling the LLM"""
+    llm_retries.inc(agent=current_agent(), model=model, endpoint=current_endpoint(), reason=reason)
+
+
+class LLMCall:
+    """Times one agent call and records its metrics when the block exits.
+
+    Feed responses or streamed chunks to ``observe`` so token usage and time
+    to first token can be taken from them.
+    """
+
+    def __init__(self, agent: str, model: str):
+        self.labels = {"agent": agent, "model": model}
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.first_token_at: Optional[float] = None
+        self._token = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self._token = _agent.set(self.labels["agent"])
+        llm_in_flight.inc(**self.labels)
+        return self
+
+    def observe(self, message, streamed: bool = False):
+        if streamed and self.first_token_at is None and getattr(message, "content", None):
+            self.first_token_at = time.perf_counter()
+        usage = getattr(message, "usage_metadata", None)
+        if usage:
+            self.prompt_tokens += usage.get("input_tokens", 0) or 0
+            self.completion_tokens += usage.get("output_tokens", 0) or 0
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        labels = {**self.labels, "endpoint": current_endpoint()}
+        llm_in_flight.dec(**self.labels)
+        if exc_type is None:
+            status = "ok"
+        elif exc_type is GeneratorExit or exc_type.__name__ == "CancelledError":
+            status = "cancelled"
+        else:
+            status = "error"
+        llm_requests.inc(**labels, status=status)
+        llm_latency.observe(elapsed, **labels)
+        if self.first_token_at is not None:
+            llm_ttft.observe(self.first_token_at - self.started, **labels)
+        if self.prompt_tokens or self.completion_tokens:
+            llm_prompt_tokens.inc(self.prompt_tokens, **labels)
+            llm_completion_tokens.inc(self.completion_tokens, **labels)
+            price_in, price_out = MODEL_PRICES.get(self.labels["model"], (0.0, 0.0))
+            llm_cost.inc((self.prompt_tokens * price_in + self.completion_tokens * price_out) / 1_000_000, **labels)
+        try:
+            _agent.reset(self._token)
+        except ValueError:
+            # Async generators may be closed from a different context
+            pass
+        return False
@@ -0,0 +1,146 @@
+"""Candidate file hashes, structured profiles and pagination indexes
+
+Adds the columns and indexes that create_all() does not add to tables that
+already exist, then builds a profile for every candidate that has none:
+from its latest stored extraction (extraction_artifacts) when there is one,
+otherwise from the comma-joined skills column.
+
+Databases created before migrations existed may already have some of these
+columns (create_all on a fresh table), so each one is only added if missing.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+from jd_assistants.profiles import build_profile
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_PROFILE_TYPE = sa.JSON().with_variant(JSONB(), "postgresql")
+_BACKFILL_BATCH = 500
+
+_COLUMNS = (
+    ("file_hash", sa.String),
+    ("profile", _PROFILE_TYPE),
+    ("experience_years", sa.Float),
+    ("graduation_year", sa.Integer),
+)
+
+# (table, index name, columns, extra options)
+_INDEXES = (
+    ("candidates", "ix_candidates_file_hash", ["file_hash"], {}),
+    ("candidates", "ix_candidates_experience_years", ["experience_years"], {}),
+    ("candidates", "ix_candidates_graduation_year", ["graduation_year"], {}),
+    ("candidates", "ix_candidates_created_at_id", ["created_at", "id"], {}),
+    ("candidate_scores", "ix_candidate_scores_jd_id_score_id", ["jd_id", "score", "id"], {}),
+    ("candidate_scores", "ix_candidate_scores_created_at_id", ["created_at", "id"], {}),
+)
+
+candidates = sa.table(
+    "candidates",
+    sa.column("id", sa.Integer),
+    sa.column("candidate_id", sa.String),
+    sa.column("name", sa.String),
+    sa.column("email", sa.String),
+    sa.column("skills", sa.Text),
+    sa.column("profile", _PROFILE_TYPE),
+    sa.column("experience_years", sa.Float),
+    sa.column("graduation_year", sa.Integer),
+)
+
+extraction_artifacts = sa.table(
+    "extraction_artifacts",
+    sa.column("id", sa.Integer),
+    sa.column("candidate_id", sa.String),
+    sa.column("data", _PROFILE_TYPE),
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("candidates"):
+        # Fresh database: init_db creates the full schema
+        return
+
+    existing = {c["name"] for c in inspector.get_columns("candidates")}
+    for name, type_ in _COLUMNS:
+        if name not in existing:
+            op.add_column("candidates", sa.Column(name, type_))
+
+    for table, name, columns, options in _INDEXES:
+        if inspector.has_table(table) and name not in {i["name"] for i in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns, **options)
+    if bind.dialect.name == "postgresql" and "ix_candidates_profile" not in {i["name"] for i in inspector.get_indexes("candidates")}:
+        op.create_index("ix_candidates_profile", "candidates", ["profile"], postgresql_using="gin")
+
+    _backfill_profiles(bind, inspector.has_table("extraction_artifacts"))
+
+
+def _latest_extractions(bind, candidate_ids):
+    """candidate_id -> most recently stored ReadCVAgent output"""
+    rows = bind.execute(
+        sa.select(extraction_artifacts.c.candidate_id, extraction_artifacts.c.data)
+        .where(extraction_artifacts.c.candidate_id.in_(candidate_ids))
+        .order_by(extraction_artifacts.c.id)
+    )
+    return {candidate_id: data for candidate_id, data in rows}
+
+
+def _backfill_profiles(bind, has_artifacts: bool):
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(candidates.c.id, candidates.c.candidate_id, candidates.c.name,
+                      candidates.c.email, candidates.c.skills)
+            .where(candidates.c.profile.is_(None), candidates.c.id > last_id)
+            .order_by(candidates.c.id)
+            .limit(_BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        extractions = _latest_extractions(bind, [r.candidate_id for r in rows]) if has_artifacts else {}
+        for row in rows:
+            extracted = extractions.get(row.candidate_id)
+            if isinstance(extracted, dict):
+                profile = build_profile(extracted)
+            else:
+                # Only the flattened fields were kept for older candidates
+                profile = build_profile({
+                    "personal_info": {"name": row.name, "email": row.email},
+                    "skills": [{"name": s.strip()} for s in (row.skills or "").split(",") if s.strip()],
+                })
+                # Unknown rather than none at all
+                profile["experience_years"] = None
+            bind.execute(
+                candidates.update()
+                .where(candidates.c.id == row.id)
+                .values(
+                    profile=profile,
+                    experience_years=profile["experience_years"],
+                    graduation_year=profile["graduation_year"],
+                )
+            )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.drop_index("ix_candidates_profile", table_name="candidates")
+    for table, name, _, _ in reversed(_INDEXES):
+        op.drop_index(name, table_name=table)
+    with op.batch_alter_table("candidates") as batch:
+        for name, _ in reversed(_COLUMNS):
+            batch.drop_column(name)
@@ -0,0 +1,35 @@
+"""Make candidate_scores.score NOT NULL
+
+Keyset pagination of a JD's scores compares (score, id) tuples, and rows
+with a NULL score never satisfy the comparison, so they silently dropped
+out of later pages. Scores without a value are set to 0, the lowest score.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table("candidate_scores"):
+        # Fresh database: init_db creates the full schema
+        return
+    op.execute("UPDATE candidate_scores SET score = 0 WHERE score IS NULL")
+    with op.batch_alter_table("candidate_scores") as batch:
+        batch.alter_column("score", existing_type=sa.Integer(), nullable=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("candidate_scores") as batch:
+        batch.alter_column("score", existing_type=sa.Integer(), nullable=True)
@@ -0,0 +1,119 @@
+"""
+Structured candidate profiles.
+
+``build_profile`` turns a ReadCVAgent extraction into the document stored in
+``DBCandidate.profile``: the extracted sections plus fields derived once at
+ingestion time so searches need neither the PDF nor the LLM again:
+
+- ``skill_names``: normalized skill names
+- ``skill_years``: years of experience per skill, taken from the skill's own
+  description ("3+ years", "2 năm") or from the work experience entries that
+  mention it, whichever is larger (0 when unknown)
+- ``experience_years``: total work experience, with overlapping jobs counted once
+- ``graduation_year``: the latest education end year
+"""
+import re
+from datetime import date
+from typing import List, Optional, Tuple
+
+from jd_assistants.tools.date_normalizer import PRESENT, normalize_date
+
+# Extracted sections kept in the stored profile
+PROFILE_SECTIONS = ("personal_info", "education", "work_experience", "skills")
+
+_YEARS_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*\+?\s*(?:years?|yrs?|năm)\b", re.IGNORECASE)
+_SPACES_RE = re.compile(r"\s+")
+
+
+def skill_key(name: str) -> str:
+    """Normalized form of a skill name used in skill_names/skill_years"""
+    return _SPACES_RE.sub(" ", name.strip().lower())
+
+
+def _as_date(value, last_date: bool) -> Optional[date]:
+    normalized = normalize_date(value, last_date)
+    if normalized == PRESENT:
+        return date.today()
+    try:
+        return date.fromisoformat(normalized) if isinstance(normalized, str) else None
+    except ValueError:
+        return None
+
+
+def _period(item: dict) -> Optional[Tuple[date, date]]:
+    start = _as_date(item.get("start_date"), False)
+    # A job with a start date but no end date is assumed to be ongoing
+    end = _as_date(item.get("end_date") or PRESENT, True)
+    if start is None or end is None or end < start:
+        return None
+    return start, end
+
+
+def _years(periods: List[Tuple[date, date]]) -> float:
+    """Total length of the periods in years, counting overlaps once"""
+    days = 0
+    current_start = current_end = None
+    for start, end in sorted(periods):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                days += (current_end - current_start).days
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        days += (current_end - current_start).days
+    return round(days / 365.25, 1)
+
+
+def _text(value) -> str:
+    if isinstance(value, list):
+        return " ".join(_text(v) for v in value)
+    if isinstance(value, dict):
+        return " ".join(_text(v) for v in value.values())
+    return str(value) if value is not None else ""
+
+
+def _stated_years(skill: dict) -> float:
+    text = _text([skill.get("levels"), skill.get("level"), skill.get("descriptions"), skill.get("years")])
+    years = [float(m.group(1).replace(",", ".")) for m in _YEARS_RE.finditer(text)]
+    if isinstance(skill.get("years"), (int, float)):
+        years.append(float(skill["years"]))
+    return max(years, default=0.0)
+
+
+def build_profile(extracted: dict) -> Optional[dict]:
+    """Profile document for an extraction, or None if there is nothing to store"""
+    if not isinstance(extracted, dict):
+        return None
+    profile = {section: extracted[section] for section in PROFILE_SECTIONS if section in extracted}
+
+    jobs = []
+    for item in extracted.get("work_experience") or []:
+        if isinstance(item, dict):
+            period = _period(item)
+            if period:
+                jobs.append((period, _text([item.get("position"), item.get("descriptions")]).lower()))
+
+    skill_years = {}
+    for skill in extracted.get("skills") or []:
+        name = skill.get("name") if isinstance(skill, dict) else skill
+        if not isinstance(name, str) or not name.strip():
+            continue
+        key = skill_key(name)
+        mention = re.compile(r"(?<![\w+#.])" + re.escape(key) + r"(?![\w+#])")
+        used = _years([period for period, text in jobs if mention.search(text)])
+        stated = _stated_years(skill) if isinstance(skill, dict) else 0.0
+        skill_years[key] = max(skill_years.get(key, 0.0), used, stated)
+
+    graduation_years = []
+    for item in extracted.get("education") or []:
+        if isinstance(item, dict):
+            end = normalize_date(item.get("end_date"), last_date=True)
+            if isinstance(end, str) and end != PRESENT and end[:4].isdigit():
+                graduation_years.append(int(end[:4]))
+
+    profile["skill_names"] = sorted(skill_years)
+    profile["skill_years"] = skill_years
+    profile["experience_years"] = _years([period for period, _ in jobs])
+    profile["graduation_year"] = max(graduation_years, default=None)
+    return profile
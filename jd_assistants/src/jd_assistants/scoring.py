@@ -0,0 +1,129 @@
+"""
+Scoring engine for running ScoreAgent over a whole candidate pool.
+
+Candidates are packed into batched ScoreAgent requests that share one copy
+of the JD. Batches fan out under a configurable concurrency cap and the
+collected scores are written to ``candidate_scores`` with a single bulk insert. Results
+are cached by a hash of the candidate and JD content, so unchanged pairs are
+never sent to the LLM twice.
+"""
+import asyncio
+import os
+from typing import Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from jd_assistants.cache import score_cache_key, cache_score_result, get_cached_score
+from jd_assistants.database import save_candidate_scores
+from jd_assistants.inference.scheduler import llm_priority, PRIORITY_BULK
+from jd_assistants.metrics import record_cache
+from jd_assistants.models import Candidate
+
+# Maximum number of ScoreAgent calls in flight at the same time
+SCORE_CONCURRENCY = int(os.getenv("SCORE_CONCURRENCY", "8"))
+# Candidates packed into one ScoreAgent request (1 disables batching)
+SCORE_BATCH_SIZE = int(os.getenv("SCORE_BATCH_SIZE", "10"))
+# Default semantic shortlist size for score-all (0 scores every candidate)
+SCORE_SHORTLIST_TOP_K = int(os.getenv("SCORE_SHORTLIST_TOP_K", "0"))
+
+
+def to_candidate(db_candidate) -> Candidate:
+    """Convert a DBCandidate row into the Candidate model used by agents"""
+    return Candidate(
+        id=db_candidate.candidate_id,
+        name=db_candidate.name or "",
+        email=db_candidate.email or "",
+        bio=db_candidate.bio or "",
+        skills=db_candidate.skills or ""
+    )
+
+
+class ScoringEngine:
+    """Score candidates against a job description with bounded concurrency"""
+
+    def __init__(self, score_agent, concurrency: int = SCORE_CONCURRENCY, batch_size: int = SCORE_BATCH_SIZE):
+        self.score_agent = score_agent
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+
+    def cache_key(self, candidate: Candidate, jd) -> str:
+        """Content hash for a candidate/JD pair under the current prompt and model"""
+        model = getattr(self.score_agent.llm, "model_name", "")
+        return score_cache_key(
+            candidate.bio, candidate.skills, jd.description, jd.skills,
+            self.score_agent.PROMPT_VERSION, model
+        )
+
+    async def _get_cached(self, key: str) -> Optional[dict]:
+        try:
+            return await get_cached_score(key)
+        except Exception as e:
+            print(f"⚠️ Score cache lookup failed: {e}")
+            return None
+
+    async def _set_cached(self, key: str, result: dict):
+        try:
+            await cache_score_result(key, result)
+        except Exception as e:
+            print(f"⚠️ Score cache write failed: {e}")
+
+    async def score_batch(self, candidates: List[Candidate], jd) -> Dict[str, dict]:
+        """Score a batch with one LLM request and cache each valid result"""
+        scores = await self.score_agent.aprocess_batch(candidates, jd.description, jd.skills)
+        results = {}
+        by_id = {c.id: c for c in candidates}
+        for score in scores:
+            result = {"score": score.score, "reason": score.reason}
+            await self._set_cached(self.cache_key(by_id[score.id], jd), result)
+            results[score.id] = {"id": score.id, "name": score.name, **result, "cached": False}
+        return results
+
+    async def score_all(self, candidates: List[Candidate], jd):
+        """Score every candidate and return (scores, errors).
+
+        Cached pairs are answered directly; the rest go to the LLM in batches
+        of ``batch_size`` candidates sharing one copy of the JD.
+        """
+        results: Dict[str, dict] = {}
+        failures: Dict[str, str] = {}
+        cached = await asyncio.gather(*[self._get_cached(self.cache_key(c, jd)) for c in candidates])
+        misses = []
+        for candidate, hit in zip(candidates, cached):
+            record_cache("score", isinstance(hit, dict))
+            if isinstance(hit, dict):
+                results[candidate.id] = {"id": candidate.id, "name": candidate.name, **hit, "cached": True}
+            else:
+                misses.append(candidate)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def _score(batch: List[Candidate]):
+            async with semaphore:
+                try:
+                    results.update(await self.score_batch(batch, jd))
+                except Exception as e:
+                    failures.update({c.id: str(e) for c in batch})
+
+        batches = [misses[i:i + self.batch_size] for i in range(0, len(misses), self.batch_size)]
+        # Bulk work yields the LLM budget to interactive requests
+        with llm_priority(PRIORITY_BULK):
+            await asyncio.gather(*[_score(b) for b in batches])
+
+        scores, errors = [], []
+        for candidate in candidates:
+            if candidate.id in results:
+                scores.append(results[candidate.id])
+            else:
+                errors.append(f"{candidate.name}: {failures.get(candidate.id) or 'Invalid score response'}")
+        return scores, errors
+
+    async def run(self, session: AsyncSession, jd, db_candidates) -> dict:
+        """Score DB candidates against a JD and bulk-save the results"""
+        candidates = [to_candidate(c) for c in db_candidates]
+        scores, errors = await self.score_all(candidates, jd)
+        await save_candidate_scores(session, scores, jd.id)
+        return {
+            "scores": scores,
+            "errors": errors,
+            "cache_hits": sum(1 for s in scores if s.get("cached"))
+        }
@@ -0,0 +1,214 @@
+"""
+Local semantic index over candidate bios and skills.
+
+Candidates are embedded at ingest time and stored in ``candidate_embeddings``.
+With EMBEDDING_MODEL set and sentence-transformers installed, a CPU embedding
+model is used; otherwise each candidate gets a BM25 term vector. ``shortlist``
+ranks the whole pool against a JD in process, so only the top-K candidates
+need to go through ScoreAgent.
+"""
+import asyncio
+import math
+import os
+import re
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from jd_assistants.database import DBCandidate, DBCandidateEmbedding
+
+# e.g. "sentence-transformers/all-MiniLM-L6-v2"; empty means BM25
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "")
+# Number of candidates embedded per batch when backfilling the index
+INDEX_BATCH_SIZE = int(os.getenv("INDEX_BATCH_SIZE", "256"))
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"[\w+#]+(?:\.[\w+#]+)*")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it",
+    "of", "on", "or", "our", "that", "the", "their", "this", "to", "we", "will", "with", "you", "your",
+    "và", "của", "các", "có", "cho", "với", "là", "trong", "được", "những", "một",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, keeping names like c++, c#, node.js"""
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if t not in _STOPWORDS and len(t) > 1]
+
+
+def candidate_text(bio: Optional[str], skills: Optional[str]) -> str:
+    """Text indexed for a candidate; skills are repeated to weigh them above the bio"""
+    return f"{skills or ''}\n{skills or ''}\n{bio or ''}"
+
+
+class BM25Embedder:
+    """Sparse term-count vectors ranked with BM25"""
+    name = "bm25"
+
+    def embed_many(self, texts: List[str]) -> list:
+        vectors = []
+        for text in texts:
+            tokens = tokenize(text)
+            vectors.append({"terms": dict(Counter(tokens)), "length": len(tokens)})
+        return vectors
+
+
+class DenseEmbedder:
+    """Normalized sentence-transformers embeddings ranked by cosine similarity"""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.name = f"st:{model_name}"
+
+    def embed_many(self, texts: List[str]) -> list:
+        vectors = self.model.encode(texts, normalize_embeddings=True, convert_to_numpy=True)
+        return [v.astype(float).round(6).tolist() for v in vectors]
+
+
+def get_embedder():
+    """Use the configured embedding model when available, BM25 otherwise"""
+    if EMBEDDING_MODEL:
+        try:
+            return DenseEmbedder(EMBEDDING_MODEL)
+        except Exception as e:
+            print(f"⚠️ Embedding model unavailable, falling back to BM25: {e}")
+    return BM25Embedder()
+
+
+class CandidateIndex:
+    """In-process ranking structures built from ``candidate_embeddings``"""
+
+    def __init__(self, embedder):
+        self.embedder = embedder
+        self._version = None
+        self._ids: List[str] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._postings = {}
+        self._doc_lengths: Optional[np.ndarray] = None
+
+    async def _current_version(self, session: AsyncSession):
+        stmt = select(func.count(DBCandidateEmbedding.id), func.max(DBCandidateEmbedding.updated_at)).where(
+            DBCandidateEmbedding.model == self.embedder.name
+        )
+        return tuple((await session.execute(stmt)).one())
+
+    async def load(self, session: AsyncSession):
+        """Reload vectors from the database if the table changed since the last load"""
+        version = await self._current_version(session)
+        if version == self._version:
+            return
+        stmt = (
+            select(DBCandidateEmbedding.candidate_id, DBCandidateEmbedding.vector)
+            .join(DBCandidate, DBCandidate.candidate_id == DBCandidateEmbedding.candidate_id)
+            .where(DBCandidateEmbedding.model == self.embedder.name)
+        )
+        rows = (await session.execute(stmt)).all()
+        await asyncio.to_thread(self._build, rows)
+        self._version = version
+
+    def _build(self, rows):
+        self._ids = [r[0] for r in rows]
+        if isinstance(self.embedder, BM25Embedder):
+            postings = {}
+            lengths = np.zeros(len(rows), dtype=np.float32)
+            for doc, (_, vector) in enumerate(rows):
+                lengths[doc] = vector.get("length", 0)
+                for term, tf in vector.get("terms", {}).items():
+                    postings.setdefault(term, ([], []))
+                    postings[term][0].append(doc)
+                    postings[term][1].append(tf)
+            self._postings = {
+                term: (np.asarray(docs, dtype=np.int32), np.asarray(tfs, dtype=np.float32))
+                for term, (docs, tfs) in postings.items()
+            }
+            self._doc_lengths = lengths
+        else:
+            self._matrix = np.asarray([r[1] for r in rows], dtype=np.float32) if rows else None
+
+    def _bm25_scores(self, query: str) -> np.ndarray:
+        n_docs = len(self._ids)
+        scores = np.zeros(n_docs, dtype=np.float32)
+        avg_len = float(self._doc_lengths.mean()) or 1.0
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_lengths / avg_len)
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            docs, tfs = posting
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += idf * tfs * (BM25_K1 + 1) / (tfs + norm[docs])
+        top = scores.max() if n_docs else 0
+        return scores / top if top > 0 else scores
+
+    def rank(self, query: str, top_k: int) -> List[Tuple[str, float]]:
+        """Top-K (candidate_id, similarity) pairs for a query text"""
+        if not self._ids:
+            return []
+        if isinstance(self.embedder, BM25Embedder):
+            scores = self._bm25_scores(query)
+        else:
+            query_vector = np.asarray(self.embedder.embed_many([query])[0], dtype=np.float32)
+            scores = self._matrix @ query_vector
+        top_k = min(top_k, len(scores))
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._ids[i], round(float(scores[i]), 4)) for i in top]
+
+
+candidate_index = CandidateIndex(get_embedder())
+
+
+async def index_candidates(session: AsyncSession, candidates: List[Tuple[str, str, str]]):
+    """Embed and store (candidate_id, bio, skills) tuples"""
+    if not candidates:
+        return
+    embedder = candidate_index.embedder
+    texts = [candidate_text(bio, skills) for _, bio, skills in candidates]
+    vectors = await asyncio.to_thread(embedder.embed_many, texts)
+
+    ids = [c[0] for c in candidates]
+    result = await session.execute(select(DBCandidateEmbedding).where(DBCandidateEmbedding.candidate_id.in_(ids)))
+    existing = {e.candidate_id: e for e in result.scalars().all()}
+    now = datetime.utcnow()
+    for candidate_id, vector in zip(ids, vectors):
+        row = existing.get(candidate_id)
+        if row:
+            row.model = embedder.name
+            row.vector = vector
+            row.updated_at = now
+        else:
+            session.add(DBCandidateEmbedding(
+                candidate_id=candidate_id, model=embedder.name, vector=vector, updated_at=now
+            ))
+    await session.commit()
+
+
+async def sync_index(session: AsyncSession) -> int:
+    """Embed candidates that have no vector yet or were edited since they were indexed"""
+    stmt = (
+        select(DBCandidate.candidate_id, DBCandidate.bio, DBCandidate.skills)
+        .outerjoin(DBCandidateEmbedding, DBCandidateEmbedding.candidate_id == DBCandidate.candidate_id)
+        .where(or_(
+            DBCandidateEmbedding.id.is_(None),
+            DBCandidateEmbedding.model != candidate_index.embedder.name,
+            DBCandidateEmbedding.updated_at < DBCandidate.updated_at,
+        ))
+    )
+    stale = [tuple(r) for r in (await session.execute(stmt)).all()]
+    for start in range(0, len(stale), INDEX_BATCH_SIZE):
+        await index_candidates(session, stale[start:start + INDEX_BATCH_SIZE])
+    return len(stale)
+
+
+async def shortlist(session: AsyncSession, jd_description: str, jd_skills: str, top_k: int) -> List[Tuple[str, float]]:
+    """Rank every indexed candidate against a JD and keep the top-K"""
+    await sync_index(session)
+    await candidate_index.load(session)
+    return candidate_index.rank(candidate_text(jd_description, jd_skills), top_k)
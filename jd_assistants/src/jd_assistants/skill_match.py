@@ -0,0 +1,242 @@
+"""
+Deterministic skill-match scoring.
+
+Candidate and JD skill strings are normalized into a shared vocabulary
+(aliases such as "reactjs" -> "react" or "k8s" -> "kubernetes"). Candidates
+become rows of a sparse binary matrix, so coverage and rarity-weighted match
+scores for a whole pool are a single sparse matrix-vector product.
+"""
+import asyncio
+import math
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from jd_assistants.database import DBCandidate
+
+# Upper bound on the extra weight a rare skill gets over a common one
+MAX_RARITY_BOOST = 2.0
+
+# canonical skill -> aliases
+SKILL_ALIASES: Dict[str, List[str]] = {
+    "javascript": ["js", "ecmascript", "es6", "java script"],
+    "typescript": ["ts"],
+    "react": ["reactjs", "react.js", "react js"],
+    "react native": ["react-native", "reactnative"],
+    "next.js": ["nextjs", "next js", "next"],
+    "node.js": ["nodejs", "node js", "node"],
+    "express": ["expressjs", "express.js"],
+    "vue": ["vuejs", "vue.js", "vue js"],
+    "angular": ["angularjs", "angular.js"],
+    "redux": ["redux toolkit", "rtk"],
+    "html": ["html5"],
+    "css": ["css3"],
+    "sass": ["scss"],
+    "tailwind css": ["tailwind", "tailwindcss"],
+    "python": ["py", "python3"],
+    "django": ["django rest framework", "drf"],
+    "fastapi": ["fast api"],
+    "java": ["java se", "java ee"],
+    "spring boot": ["spring", "springboot"],
+    "c#": ["csharp", "c sharp"],
+    ".net": ["dotnet", "asp.net", ".net core", "asp.net core"],
+    "c++": ["cpp"],
+    "golang": ["go", "go lang"],
+    "php": ["laravel php"],
+    "sql": ["t-sql", "tsql"],
+    "postgresql": ["postgres", "psql"],
+    "mysql": ["my sql"],
+    "mongodb": ["mongo"],
+    "redis": [],
+    "docker": ["docker compose", "docker-compose"],
+    "kubernetes": ["k8s"],
+    "aws": ["amazon web services"],
+    "gcp": ["google cloud", "google cloud platform"],
+    "azure": ["microsoft azure"],
+    "ci/cd": ["cicd", "ci cd", "continuous integration"],
+    "git": ["github", "gitlab"],
+    "rest api": ["rest", "restful", "restful api", "restful apis", "rest apis"],
+    "graphql": ["graph ql"],
+    "machine learning": ["ml"],
+    "deep learning": ["dl"],
+    "natural language processing": ["nlp"],
+    "computer vision": ["cv"],
+    "ui/ux": ["ui", "ux", "ui ux", "ux/ui"],
+    "figma": [],
+    "agile": ["scrum", "kanban"],
+    "english": ["tiếng anh", "english communication"],
+    "microsoft excel": ["excel", "ms excel"],
+}
+
+_ALIAS_TO_CANONICAL = {alias: canonical for canonical, aliases in SKILL_ALIASES.items() for alias in aliases}
+_ALIAS_TO_CANONICAL.update({canonical: canonical for canonical in SKILL_ALIASES})
+
+# Aliases that are also everyday words ("go the extra mile", "the rest of the
+# team"). Like every alias of two letters or fewer, they only count when they
+# are a whole skill item and are never picked out of a longer phrase.
+_EXACT_ONLY_ALIASES = frozenset(("next", "node", "rest", "spring", "excel"))
+
+# Vocabulary terms that are safe to look for inside longer phrases
+_SCAN_TERMS = [
+    term for term, canonical in _ALIAS_TO_CANONICAL.items()
+    if term == canonical or (len(term) > 2 and term not in _EXACT_ONLY_ALIASES)
+]
+
+_SPLIT_RE = re.compile(r"[,;|\n•·]+|\s+/\s+|\band\b|\bvà\b")
+_VERSION_RE = re.compile(r"\s*v?\d+(\.\d+)*(\+)?$")
+_PAREN_RE = re.compile(r"\([^)]*\)")
+# Longest terms first so "react native" wins over "react"
+_KNOWN_TERMS_RE = re.compile(
+    r"(?<![\w+#.])(" + "|".join(re.escape(t) for t in sorted(_SCAN_TERMS, key=len, reverse=True)) + r")(?![\w+#])"
+)
+
+
+@lru_cache(maxsize=8192)
+def normalize_skill(skill: str) -> str:
+    """Map one skill name to its canonical vocabulary form"""
+    s = _PAREN_RE.sub(" ", skill.lower())
+    s = re.sub(r"\s+", " ", s).strip(" -:*").rstrip(".")
+    if s in _ALIAS_TO_CANONICAL:
+        return _ALIAS_TO_CANONICAL[s]
+    # "python 3.11", "react 18" -> "python", "react"
+    s = _VERSION_RE.sub("", s).strip()
+    return _ALIAS_TO_CANONICAL.get(s, s)
+
+
+def parse_skills(text: Optional[str]) -> List[str]:
+    """Split a free-text skills string into unique canonical skills.
+
+    Known skills and short items are normalized directly; longer phrases are
+    scanned for known vocabulary terms, leaving out short or ambiguous aliases.
+    """
+    skills = []
+    for piece in _SPLIT_RE.split((text or "").lower()):
+        piece = piece.strip()
+        if not piece:
+            continue
+        skill = normalize_skill(piece)
+        if skill in SKILL_ALIASES:
+            skills.append(skill)
+            continue
+        found = _KNOWN_TERMS_RE.findall(piece)
+        if found:
+            skills.extend(_ALIAS_TO_CANONICAL[m] for m in found)
+        elif len(piece.split()) <= 3:
+            skills.append(skill)
+    return list(dict.fromkeys(s for s in skills if s))
+
+
+class SkillMatrix:
+    """Sparse candidate x skill matrix over a shared vocabulary"""
+
+    def __init__(self, candidate_ids: List[str], candidate_skills: Iterable[List[str]]):
+        self.candidate_ids = candidate_ids
+        self._rows = {cid: i for i, cid in enumerate(candidate_ids)}
+        self.vocabulary: Dict[str, int] = {}
+        rows, cols = [], []
+        for row, skills in enumerate(candidate_skills):
+            for skill in skills:
+                col = self.vocabulary.setdefault(skill, len(self.vocabulary))
+                rows.append(row)
+                cols.append(col)
+        self.matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(candidate_ids), max(len(self.vocabulary), 1))
+        )
+        self.matrix.sum_duplicates()
+        self.matrix.data[:] = 1.0
+        # Number of candidates having each skill, for rarity weighting
+        self.document_frequency = np.asarray((self.matrix > 0).sum(axis=0)).ravel()
+
+    @classmethod
+    def from_strings(cls, candidates: List[Tuple[str, Optional[str]]]) -> "SkillMatrix":
+        return cls([c[0] for c in candidates], (parse_skills(c[1]) for c in candidates))
+
+    def _jd_vector(self, jd_skills: List[str]) -> Tuple[np.ndarray, np.ndarray, float]:
+        """Column indices and weights of the JD skills present in the vocabulary"""
+        n = max(len(self.candidate_ids), 1)
+        cols, weights = [], []
+        total_weight = 0.0
+        for skill in jd_skills:
+            col = self.vocabulary.get(skill)
+            df = self.document_frequency[col] if col is not None else 0
+            # Rarer skills in the pool count for more; skills nobody has still count as missing
+            weight = 1.0 + min(max(math.log(n / (1 + df)), 0.0), MAX_RARITY_BOOST)
+            total_weight += weight
+            if col is not None:
+                cols.append(col)
+                weights.append(weight)
+        return np.asarray(cols, dtype=np.int64), np.asarray(weights, dtype=np.float32), total_weight
+
+    def score(self, jd_skills: List[str]) -> dict:
+        """Coverage and weighted match (0-1) of every candidate against the JD skills"""
+        n_candidates = len(self.candidate_ids)
+        if not jd_skills or not n_candidates:
+            zeros = np.zeros(n_candidates, dtype=np.float32)
+            return {"coverage": zeros, "weighted": zeros, "score": zeros.astype(np.int32)}
+        cols, weights, total_weight = self._jd_vector(jd_skills)
+        if len(cols):
+            sub = self.matrix[:, cols]
+            matched = np.asarray(sub.sum(axis=1)).ravel()
+            weighted = np.asarray(sub @ weights).ravel() / total_weight
+        else:
+            matched = np.zeros(n_candidates, dtype=np.float32)
+            weighted = matched
+        coverage = matched / len(jd_skills)
+        return {
+            "coverage": coverage,
+            "weighted": weighted,
+            "score": np.rint(100 * weighted).astype(np.int32),
+        }
+
+    def scores_by_id(self, jd_skills: List[str]) -> Dict[str, int]:
+        """0-100 skill score per candidate_id"""
+        scores = self.score(jd_skills)["score"].tolist()
+        return dict(zip(self.candidate_ids, scores))
+
+    def rank(self, jd_skills: List[str], top_k: Optional[int] = None) -> List[dict]:
+        """Candidates ordered by weighted skill match"""
+        scores = self.score(jd_skills)
+        weighted = scores["weighted"]
+        if top_k and top_k < len(weighted):
+            order = np.argpartition(-weighted, top_k - 1)[:top_k]
+            order = order[np.argsort(-weighted[order], kind="stable")]
+        else:
+            order = np.argsort(-weighted, kind="stable")
+        return [{
+            "candidate_id": self.candidate_ids[i],
+            "skill_score": int(scores["score"][i]),
+            "coverage": round(float(scores["coverage"][i]), 4),
+            "weighted_match": round(float(scores["weighted"][i]), 4),
+        } for i in order]
+
+    def explain(self, candidate_id: str, jd_skills: List[str]) -> dict:
+        """Matched and missing JD skills for one candidate"""
+        row = self._rows.get(candidate_id)
+        cols = set(self.matrix[row].indices.tolist()) if row is not None else set()
+        matched = [s for s in jd_skills if self.vocabulary.get(s) in cols]
+        return {"matched": matched, "missing": [s for s in jd_skills if s not in matched]}
+
+
+_cached_matrix: Optional[SkillMatrix] = None
+_cached_version = None
+
+
+async def load_skill_matrix(session: AsyncSession) -> SkillMatrix:
+    """Build the candidate skill matrix, reusing it until candidates change"""
+    global _cached_matrix, _cached_version
+    version = tuple((await session.execute(
+        select(func.count(DBCandidate.id), func.max(DBCandidate.updated_at))
+    )).one())
+    if _cached_matrix is None or version != _cached_version:
+        rows = (await session.execute(
+            select(DBCandidate.candidate_id, DBCandidate.skills).order_by(DBCandidate.id)
+        )).all()
+        _cached_matrix = await asyncio.to_thread(SkillMatrix.from_strings, [tuple(r) for r in rows])
+        _cached_version = version
+    return _cached_matrix
@@ -0,0 +1,192 @@
+"""
+Server-sent event framing for streamed LLM output.
+
+The default "delta" protocol sends only the new text of each frame with a
+sequence number, ``{"seq":3,"d":"..."}``, and clients rebuild the full text
+by concatenating deltas in ``seq`` order. Fields and array items of the
+structured result are also sent as soon as the model has finished them
+(``{"seq":4,"type":"item","name":"improvements","index":0,"value":...}``),
+so clients can render results before the final frame. Tokens that arrive
+within ``SSE_FRAME_INTERVAL_MS`` of each other are merged into one frame,
+and frames are compact JSON with a fixed key order so they compress well
+behind a gzip-enabled proxy. The "legacy" protocol keeps the original
+``{"type":"thinking","content":...,"accumulated":...}`` frames for older
+clients.
+"""
+import asyncio
+import contextlib
+import json
+import os
+import traceback
+from typing import AsyncIterator, Callable, Optional
+
+from fastapi.responses import StreamingResponse
+
+# Merge tokens arriving within this window into one frame (0 = one frame per token)
+SSE_FRAME_INTERVAL_MS = int(os.getenv("SSE_FRAME_INTERVAL_MS", "50"))
+
+STREAM_PROTOCOLS = ("delta", "legacy")
+
+_END = object()
+
+
+async def coalesce_progress(chunks: AsyncIterator[dict], interval: float) -> AsyncIterator[dict]:
+    """Merge progress chunks arriving within ``interval`` seconds into one.
+
+    The first chunk is passed through immediately so the time to first token
+    is not delayed. The source is consumed by a single background task, so
+    the LLM stream stays in one task while frames are flushed on a timer.
+    """
+    if interval <= 0:
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump():
+        try:
+            async for chunk in chunks:
+                queue.put_nowait(chunk)
+        except Exception as e:
+            queue.put_nowait(e)
+        finally:
+            queue.put_nowait(_END)
+
+    loop = asyncio.get_running_loop()
+    producer = asyncio.create_task(pump())
+    parts = []
+    deadline: Optional[float] = None
+    first = True
+    try:
+        while True:
+            try:
+                timeout = None if deadline is None else max(deadline - loop.time(), 0)
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                yield {"type": "progress", "content": "".join(parts)}
+                parts, deadline = [], None
+                continue
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            if item.get("type") == "progress":
+                if first:
+                    first = False
+                    yield item
+                    continue
+                parts.append(item.get("content", ""))
+                if deadline is None:
+                    deadline = loop.time() + interval
+                continue
+            if parts:
+                yield {"type": "progress", "content": "".join(parts)}
+                parts, deadline = [], None
+            yield item
+        if parts:
+            yield {"type": "progress", "content": "".join(parts)}
+    finally:
+        producer.cancel()
+        # Let the source stream close before the caller moves on
+        with contextlib.suppress(asyncio.CancelledError):
+            await producer
+
+
+class SSEEncoder:
+    """Encodes progress, final and error events for one stream"""
+
+    def __init__(self, protocol: str = "delta"):
+        if protocol not in STREAM_PROTOCOLS:
+            raise ValueError(f"Unknown stream protocol: {protocol}")
+        self.protocol = protocol
+        self.seq = 0
+        # Legacy frames repeat the whole text so far
+        self._parts = []
+
+    @staticmethod
+    def _frame(payload: dict) -> str:
+        return "data: " + json.dumps(payload, ensure_ascii=False, separators=(",", ":")) + "\n\n"
+
+    def _next(self) -> int:
+        self.seq += 1
+        return self.seq
+
+    def progress(self, text: str) -> str:
+        if self.protocol == "legacy":
+            self._parts.append(text)
+            return self._frame({"type": "thinking", "content": text, "accumulated": "".join(self._parts)})
+        return self._frame({"seq": self._next(), "d": text})
+
+    def partial(self, event: dict) -> Optional[str]:
+        """A completed field or array item; legacy clients do not receive these"""
+        if self.protocol == "legacy":
+            return None
+        return self._frame({"seq": self._next(), **event})
+
+    def final(self, data: dict, repaired: bool = False) -> str:
+        if self.protocol == "legacy":
+            return self._frame({"type": "final", "data": data})
+        payload = {"seq": self._next(), "type": "final", "data": data}
+        if repaired:
+            payload["repaired"] = True
+        return self._frame(payload)
+
+    def error(self, error: str, raw_content: str = "", **extra) -> str:
+        if self.protocol == "legacy":
+            return self._frame({"type": "error", "error": error, "raw_content": raw_content, **extra})
+        # Delta clients already hold the raw content
+        return self._frame({"seq": self._next(), "type": "error", "error": error, **extra})
+
+
+async def sse_events(
+    chunks: AsyncIterator[dict],
+    to_final: Callable[[object], dict],
+    protocol: str = "delta",
+    interval_ms: int = SSE_FRAME_INTERVAL_MS,
+    to_partial: Optional[Callable[[dict], Optional[dict]]] = None,
+) -> AsyncIterator[str]:
+    """SSE frames for an ``astream_structured`` chunk stream.
+
+    ``to_partial`` can trim field/item events to match ``to_final``, or
+    return None to drop them.
+    """
+    encoder = SSEEncoder(protocol)
+    # Legacy clients expect one frame per token
+    interval = interval_ms / 1000 if protocol == "delta" else 0
+    try:
+        async for chunk in coalesce_progress(chunks, interval):
+            kind = chunk.get("type")
+            if kind == "progress":
+                if chunk.get("content"):
+                    yield encoder.progress(chunk["content"])
+            elif kind in ("field", "item"):
+                event = to_partial(chunk) if to_partial else chunk
+                frame = encoder.partial(event) if event else None
+                if frame:
+                    yield frame
+            elif kind == "final":
+                data = chunk.get("data")
+                if data:
+                    yield encoder.final(to_final(data), chunk.get("repaired", False))
+                else:
+                    yield encoder.error("No data in final chunk")
+            elif kind == "error":
+                yield encoder.error(
+                    chunk.get("error", "Unknown error"), chunk.get("raw_content", ""),
+                    partial=chunk.get("partial") or {}
+                )
+    except Exception as e:
+        yield encoder.error(str(e), traceback=traceback.format_exc())
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
+        }
+    )
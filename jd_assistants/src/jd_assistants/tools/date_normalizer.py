@@ -0,0 +1,150 @@
+"""
+Table-driven normalization of CV dates.
+
+Dates extracted from CVs come in many shapes ("2020-3", "Mar. 2020",
+"T6/2023", "Tháng 6 năm 2023", "12/05/2021", "Present"...). Every supported
+shape is one precompiled pattern in ``_RULES``, tried in order; the first
+match gives a (year, month, day) triple, which is rendered as YYYY-MM-DD.
+Missing parts are filled in as the first day of the period for start dates
+and the last day for end dates. Ongoing periods ("Present", "Hiện tại",
+"nay" or a year from 9000 on) become ``PRESENT``. Strings that match no
+rule are returned unchanged.
+"""
+import calendar
+import re
+from functools import lru_cache
+from typing import Callable, List, Pattern, Tuple
+
+PRESENT = "Hiện tại"
+
+# Profile sections whose items carry start_date / end_date
+DATED_SECTIONS = (
+    "education", "work_experience", "certificates", "awards",
+    "courses", "projects", "products", "activities",
+)
+
+# Years from here on are placeholders for "still ongoing"
+_PRESENT_YEAR = 9000
+
+
+def _month_table() -> dict:
+    table = {}
+    for number, name in enumerate(calendar.month_name):
+        if not name:
+            continue
+        name = name.lower()
+        for form in (name, name[:3], name[:4]):
+            table[form] = number
+    # Vietnamese month names ("tháng một"...); numeric forms ("thg 6") are handled by _RULES
+    vietnamese = ("một", "hai", "ba", "tư", "năm", "sáu", "bảy", "tám", "chín", "mười", "mười một", "mười hai")
+    for number, word in enumerate(vietnamese, start=1):
+        table[f"tháng {word}"] = number
+    table["tháng giêng"] = 1
+    table["tháng chạp"] = 12
+    return table
+
+
+# Lower-case month forms (English full names and abbreviations, Vietnamese words) -> month number
+MONTHS = _month_table()
+
+_PRESENT_WORDS = frozenset((
+    "present", "current", "currently", "now", "today", "ongoing", "to date", "till now", "until now",
+    "hiện tại", "hiện nay", "nay", "đến nay", "tới nay", "bây giờ", "đang làm", "đang học",
+))
+
+_MONTH_NAME = "(?P<name>" + "|".join(sorted((re.escape(m) for m in MONTHS), key=len, reverse=True)) + r")\.?"
+_VI_MONTH = r"(?:tháng|thg|th|t)\.?\s*(?P<month>\d{1,2})"
+_SEP = r"\s*[-/.,]?\s*"
+_YEAR = r"(?P<year>\d{4})"
+_DAY = r"(?P<day>\d{1,2})"
+_VI_YEAR_SEP = r"(?:\s*năm\s*|" + _SEP + ")"
+
+
+def _ymd(groups: dict) -> Tuple[int, int, int]:
+    return int(groups["year"]), int(groups.get("month") or 0), int(groups.get("day") or 0)
+
+
+def _named(groups: dict) -> Tuple[int, int, int]:
+    return int(groups["year"]), MONTHS[groups["name"].lower()], int(groups.get("day") or 0)
+
+
+# (pattern, groups -> (year, month, day)) tried in order; the first full match wins.
+# A month or day of 0 means that part is missing.
+_RULES: List[Tuple[Pattern, Callable[[dict], Tuple[int, int, int]]]] = [(re.compile(p, re.IGNORECASE), f) for p, f in (
+    # 2020, 2020-3, 2020-03-15, 2020/03, 2020.03.15
+    (r"(?P<year>\d{4})(?:\s*[-/.]\s*(?P<month>\d{1,2})(?:\s*[-/.]\s*(?P<day>\d{1,2}))?)?", _ymd),
+    # 15/03/2020, 15-03-2020, 15.03.2020 (day first)
+    (r"(?P<day>\d{1,2})([-/.])(?P<month>\d{1,2})\2(?P<year>\d{4})", _ymd),
+    # 3/2020, 03-2020, 03.2020
+    (r"(?P<month>\d{1,2})\s*[-/.]\s*" + _YEAR, _ymd),
+    # T6/2023, Tháng 6/2023, tháng 06 năm 2023, Thg 6, 2023
+    (_VI_MONTH + _VI_YEAR_SEP + _YEAR, _ymd),
+    # 15 tháng 6 năm 2023, ngày 15 tháng 6 năm 2023
+    (r"(?:ngày\s*)?" + _DAY + r"\s+" + _VI_MONTH + _VI_YEAR_SEP + _YEAR, _ymd),
+    # March 2020, Mar. 2020, Sept-2020, tháng sáu 2023
+    (_MONTH_NAME + _SEP + _YEAR, _named),
+    # March 15, 2020
+    (_MONTH_NAME + r"\s*" + _DAY + r"(?:st|nd|rd|th)?" + _SEP + _YEAR, _named),
+    # 15 March 2020, 15th Mar 2020
+    (_DAY + r"(?:st|nd|rd|th)?" + _SEP + _MONTH_NAME + _SEP + _YEAR, _named),
+)]
+
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalize_date(value, last_date: bool = False):
+    """Normalize one date string to YYYY-MM-DD, PRESENT, or the input if unrecognized.
+
+    ``last_date`` selects the end of an incomplete period (2020 -> 2020-12-31)
+    instead of its start (2020 -> 2020-01-01).
+    """
+    if not isinstance(value, str):
+        return value
+    return _normalize(value, last_date)
+
+
+# The same few dates recur across a profile and across CVs
+@lru_cache(maxsize=4096)
+def _normalize(value: str, last_date: bool) -> str:
+    text = _SPACES_RE.sub(" ", value.strip())
+    if text.lower() in _PRESENT_WORDS:
+        return PRESENT
+    for pattern, fields in _RULES:
+        match = pattern.fullmatch(text)
+        if match:
+            year, month, day = fields(match.groupdict())
+            return _render(year, month, day, last_date, value)
+    return value
+
+
+def _render(year: int, month: int, day: int, last_date: bool, original: str) -> str:
+    if year >= _PRESENT_YEAR:
+        return PRESENT if last_date else original
+    if year < 1 or not 0 <= month <= 12:
+        return original
+    if month == 0:
+        month = 12 if last_date else 1
+    days_in_month = calendar.monthrange(year, month)[1]
+    if day == 0:
+        day = days_in_month if last_date else 1
+    elif day > days_in_month:
+        return original
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+
+def normalize_profile_dates(profile: dict) -> dict:
+    """Normalize start_date/end_date of every dated section of an extracted profile in place"""
+    if not isinstance(profile, dict):
+        return profile
+    for section in DATED_SECTIONS:
+        items = profile.get(section)
+        if not isinstance(items, list):
+            continue
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            if "start_date" in item:
+                item["start_date"] = normalize_date(item["start_date"])
+            if "end_date" in item:
+                item["end_date"] = normalize_date(item["end_date"], last_date=True)
+    return profile
@@ -0,0 +1,330 @@
+"""
+PDF text extraction in a pool of worker processes.
+
+PyMuPDF and pdfplumber are CPU-bound and hold the GIL, so async handlers
+hand extraction to ``PDFExtractionPool`` instead of parsing in-process.
+Sources are file paths or in-memory PDF bytes; short in-memory documents
+are parsed without touching the disk.
+
+Short documents are read by one worker; documents with at least
+``PDF_PARALLEL_MIN_PAGES`` pages are split into page ranges read by several
+workers at once; in-memory documents are written to one temporary file
+first, so each page-range task only sends its path to the worker. Each
+worker process has its address space capped at ``PDF_WORKER_MAX_MEMORY_MB``
+and, on Python 3.11+, is replaced after ``PDF_WORKER_MAX_TASKS`` tasks.
+
+A file that a worker spends more than ``PDF_EXTRACT_TIMEOUT`` seconds on is
+abandoned; the clock starts when a worker picks a task up, so time spent
+queued behind other files does not count. A worker stuck in native code,
+where the timeout alarm cannot interrupt it, exits by itself shortly after.
+ProcessPoolExecutor then fails every task still running in the pool, so the
+pool is replaced. Each task leaves a marker file while it runs, which tells
+the file whose worker overran its deadline apart from the files that were
+only collateral damage; those are submitted again.
+"""
+import asyncio
+import faulthandler
+import io
+import multiprocessing
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO, List, Optional, Tuple, Union
+
+import fitz
+import pdfplumber
+
+# Worker processes for PDF extraction
+PDF_POOL_WORKERS = int(os.getenv("PDF_POOL_WORKERS", str(os.cpu_count() or 4)))
+# Seconds allowed for extracting one file
+PDF_EXTRACT_TIMEOUT = float(os.getenv("PDF_EXTRACT_TIMEOUT", "60"))
+# Documents with at least this many pages are split across workers
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "32"))
+# Pages per task when a document is split
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+# Address space limit per worker process in MB (0 = unlimited)
+PDF_WORKER_MAX_MEMORY_MB = int(os.getenv("PDF_WORKER_MAX_MEMORY_MB", "2048"))
+# Replace a worker process after this many tasks (0 = never; needs Python 3.11+)
+PDF_WORKER_MAX_TASKS = int(os.getenv("PDF_WORKER_MAX_TASKS", "200"))
+
+# Extra time given to a worker to stop on its own before it exits
+_HARD_TIMEOUT_GRACE = 5.0
+# Submissions of a file whose pool broke because another worker died
+_BROKEN_POOL_ATTEMPTS = 2
+
+# A file path or the PDF itself
+PDFSource = Union[str, bytes]
+
+
+class PDFExtractionTimeout(Exception):
+    """Raised in a worker when its extraction deadline has passed"""
+
+
+def as_pdf_source(source: Union[str, bytes, bytearray, memoryview, BinaryIO]) -> PDFSource:
+    """Path or bytes for a path, bytes-like object or binary file object"""
+    if isinstance(source, (str, bytes)):
+        return source
+    if isinstance(source, (bytearray, memoryview)):
+        return bytes(source)
+    if hasattr(source, "read"):
+        if hasattr(source, "seek"):
+            source.seek(0)
+        return source.read()
+    raise TypeError(f"Unsupported PDF source: {type(source).__name__}")
+
+
+def _open_fitz(source: PDFSource):
+    if isinstance(source, bytes):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+def read_pages(source: PDFSource, start: int = 0, stop: Optional[int] = None) -> List[str]:
+    """Text of pages [start, stop) with PyMuPDF, falling back to pdfplumber"""
+    try:
+        with _open_fitz(source) as document:
+            stop = document.page_count if stop is None else min(stop, document.page_count)
+            return [document.load_page(n).get_text() for n in range(start, stop)]
+    except PDFExtractionTimeout:
+        raise
+    except Exception:
+        with pdfplumber.open(io.BytesIO(source) if isinstance(source, bytes) else source) as document:
+            return [page.extract_text() or "" for page in document.pages[start:stop]]
+
+
+def _init_worker(max_memory_mb: int):
+    if max_memory_mb > 0:
+        try:
+            import resource
+            limit = max_memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError) as e:
+            print(f"⚠️ Could not cap PDF worker memory: {e}")
+
+
+def _on_deadline(signum, frame):
+    raise PDFExtractionTimeout("PDF extraction timed out")
+
+
+def _with_deadline(timeout: float, marker: Optional[str], func, *args):
+    """Run ``func`` in the worker, interrupting it once ``timeout`` seconds have passed.
+
+    ``marker`` is a file that exists while the task runs and holds its
+    timeout; it is left behind if the worker dies.
+    """
+    if marker:
+        with open(marker, "w") as f:
+            f.write(str(timeout))
+    try:
+        return _run_with_deadline(timeout, func, *args)
+    finally:
+        if marker:
+            os.unlink(marker)
+
+
+def _run_with_deadline(timeout: float, func, *args):
+    if timeout <= 0:
+        return func(*args)
+    # The alarm only fires between Python bytecodes; if native code keeps
+    # running past the grace period, faulthandler's own thread ends the process
+    faulthandler.dump_traceback_later(timeout + _HARD_TIMEOUT_GRACE, exit=True)
+    alarm = hasattr(signal, "setitimer")
+    if alarm:
+        previous = signal.signal(signal.SIGALRM, _on_deadline)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return func(*args)
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+        faulthandler.cancel_dump_traceback_later()
+
+
+def _open_document(source: PDFSource, max_pages: int) -> Tuple[Optional[List[str]], int]:
+    """All page texts of a short document, or (None, page_count) for a long one"""
+    try:
+        with _open_fitz(source) as document:
+            page_count = document.page_count
+            if page_count >= max_pages:
+                return None, page_count
+    except Exception:
+        # Unreadable by PyMuPDF: let read_pages fall back to pdfplumber
+        pass
+    return read_pages(source), 0
+
+
+def _worker_open(source: PDFSource, max_pages: int, timeout: float, marker: str):
+    """_open_document result and the seconds the worker spent on it"""
+    started = time.monotonic()
+    pages, page_count = _with_deadline(timeout, marker, _open_document, source, max_pages)
+    return pages, page_count, time.monotonic() - started
+
+
+def _worker_pages(source: PDFSource, start: int, stop: int, timeout: float, marker: str):
+    return _with_deadline(timeout, marker, read_pages, source, start, stop)
+
+
+def _write_temp_pdf(data: bytes) -> str:
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+        f.write(data)
+    return f.name
+
+
+class PDFExtractionPool:
+    """Process pool extracting PDF text with per-file timeouts"""
+
+    def __init__(
+        self,
+        workers: int = PDF_POOL_WORKERS,
+        timeout: float = PDF_EXTRACT_TIMEOUT,
+        parallel_min_pages: int = PDF_PARALLEL_MIN_PAGES,
+        pages_per_task: int = PDF_PAGES_PER_TASK,
+        max_memory_mb: int = PDF_WORKER_MAX_MEMORY_MB,
+        max_tasks_per_worker: int = PDF_WORKER_MAX_TASKS,
+    ):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.parallel_min_pages = max(1, parallel_min_pages)
+        self.pages_per_task = max(1, pages_per_task)
+        self.max_memory_mb = max_memory_mb
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._marker_dir: Optional[str] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Forking a process that runs an event loop and threads is unsafe
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                options = {}
+                # Worker recycling is not available before Python 3.11
+                if sys.version_info >= (3, 11) and self.max_tasks_per_worker:
+                    options["max_tasks_per_child"] = self.max_tasks_per_worker
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(method),
+                    initializer=_init_worker,
+                    initargs=(self.max_memory_mb,),
+                    **options,
+                )
+            return self._executor
+
+    def _replace(self, executor: ProcessPoolExecutor):
+        """Send new tasks to a fresh pool; tasks running in the old one are left to finish"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    async def _submit(self, executor: ProcessPoolExecutor, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, func, *args)
+
+    def _markers(self, attempt_id: str) -> str:
+        """Path prefix of the marker files of one extraction attempt"""
+        with self._lock:
+            if self._marker_dir is None:
+                self._marker_dir = tempfile.mkdtemp(prefix="pdf-tasks-")
+            return os.path.join(self._marker_dir, attempt_id)
+
+    @staticmethod
+    def _overran(prefix: str) -> bool:
+        """Whether a task of the attempt was still running past its deadline when its worker died.
+
+        Also removes the attempt's leftover markers.
+        """
+        directory, name = os.path.split(prefix)
+        overran = False
+        for entry in os.scandir(directory):
+            if not entry.name.startswith(name):
+                continue
+            try:
+                with open(entry.path) as f:
+                    timeout = float(f.read() or 0)
+                overran = overran or time.time() - entry.stat().st_mtime >= timeout
+                os.unlink(entry.path)
+            except (OSError, ValueError):
+                pass
+        return overran
+
+    async def _extract(self, executor: ProcessPoolExecutor, source: PDFSource, markers: str) -> str:
+        pages, page_count, elapsed = await self._submit(
+            executor, _worker_open, source, self.parallel_min_pages, self.timeout, f"{markers}-open"
+        )
+        if pages is None:
+            # Every page-range task would otherwise pickle the whole document
+            path = await asyncio.to_thread(_write_temp_pdf, source) if isinstance(source, bytes) else source
+            try:
+                # What is left of the file's worker time, however long the tasks wait in the queue
+                remaining = max(self.timeout - elapsed, 0.001)
+                ranges = [
+                    (start, min(start + self.pages_per_task, page_count))
+                    for start in range(0, page_count, self.pages_per_task)
+                ]
+                chunks = await asyncio.gather(*[
+                    self._submit(executor, _worker_pages, path, start, stop, remaining, f"{markers}-{start}")
+                    for start, stop in ranges
+                ])
+            finally:
+                if path is not source:
+                    os.unlink(path)
+            pages = [text for chunk in chunks for text in chunk]
+        return "\n\n".join(pages).strip()
+
+    async def extract(self, source: Union[str, bytes, bytearray, memoryview, BinaryIO]) -> str:
+        """Text of a PDF path or in-memory PDF; raises ValueError if it cannot be read in time"""
+        source = as_pdf_source(source)
+        for attempt in range(1, _BROKEN_POOL_ATTEMPTS + 1):
+            executor = self._get_executor()
+            markers = self._markers(uuid.uuid4().hex)
+            # No timeout here: deadlines run in the workers from the moment they start a
+            # task, and a worker that cannot stop in time exits, which breaks the pool
+            try:
+                return await self._extract(executor, source, markers)
+            except PDFExtractionTimeout:
+                raise ValueError("PDF extraction timed out")
+            except BrokenProcessPool:
+                # A worker died: this file's own stuck or crashed worker (e.g. the memory cap),
+                # or another file's, which takes every task running in the pool down with it
+                self._replace(executor)
+                if await asyncio.to_thread(self._overran, markers):
+                    name = source if isinstance(source, str) else f"<{len(source)} bytes>"
+                    print(f"⚠️ PDF extraction did not stop after {self.timeout}s, its worker exited: {name}")
+                    raise ValueError("PDF extraction timed out")
+                if attempt == _BROKEN_POOL_ATTEMPTS:
+                    raise ValueError("PDF extraction worker crashed")
+            except MemoryError:
+                raise ValueError("PDF extraction exceeded the worker memory limit")
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            marker_dir, self._marker_dir = self._marker_dir, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if marker_dir is not None:
+            shutil.rmtree(marker_dir, ignore_errors=True)
+
+
+_pool: Optional[PDFExtractionPool] = None
+
+
+def get_pdf_pool() -> PDFExtractionPool:
+    global _pool
+    if _pool is None:
+        _pool = PDFExtractionPool()
+    return _pool
+
+
+def shutdown_pdf_pool():
+    if _pool is not None:
+        _pool.shutdown()
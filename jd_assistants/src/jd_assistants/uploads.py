@@ -0,0 +1,168 @@
+"""
+Streaming multipart uploads.
+
+The request body is parsed as it arrives. Each file is spooled to a
+temporary file (kept in memory up to UPLOAD_SPOOL_MAX_MEMORY, then moved to
+disk) while its SHA-256 is computed chunk by chunk. The per-file
+(MAX_UPLOAD_SIZE) and per-request (MAX_UPLOAD_REQUEST_SIZE) limits are
+checked on every chunk, so an oversized upload is rejected with 413 before
+it has been buffered. A request whose Content-Length is already over the
+limit is rejected without reading the body.
+"""
+import hashlib
+import os
+from typing import AsyncIterator, List, Optional
+
+from fastapi import HTTPException, Request
+from starlette.datastructures import Headers, UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
+
+# Largest accepted file, in bytes
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(10 * 1024 * 1024)))
+# Largest accepted request body (all files together), in bytes
+MAX_UPLOAD_REQUEST_SIZE = int(os.getenv("MAX_UPLOAD_REQUEST_SIZE", str(512 * 1024 * 1024)))
+# Most files accepted in one request
+MAX_UPLOAD_FILES = int(os.getenv("MAX_UPLOAD_FILES", "500"))
+# Bytes of each file kept in memory before spooling to a temporary file
+UPLOAD_SPOOL_MAX_MEMORY = int(os.getenv("UPLOAD_SPOOL_MAX_MEMORY", str(1024 * 1024)))
+
+
+def is_pdf_filename(filename: Optional[str]) -> bool:
+    """Whether a file is accepted as a CV, judged by its extension in any case"""
+    return (filename or "").lower().endswith(".pdf")
+
+
+# Request body schema for endpoints that read files with receive_uploads
+UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"files": {"type": "array", "items": {"type": "string", "format": "binary"}}},
+                    "required": ["files"],
+                }
+            }
+        },
+    }
+}
+
+
+class UploadTooLarge(MultiPartException):
+    """An upload went over the per-file or per-request size limit"""
+
+
+class StreamedUpload:
+    """An uploaded file spooled to a temporary file, with its size and SHA-256"""
+
+    def __init__(self, field: str, upload: UploadFile):
+        self.field = field
+        self.filename = upload.filename or ""
+        self.upload = upload
+        self.size = 0
+        self.sha256 = ""
+        self._digest = hashlib.sha256()
+
+    @property
+    def file(self):
+        """The underlying binary file object"""
+        return self.upload.file
+
+    def update(self, data: bytes):
+        self.size += len(data)
+        self._digest.update(data)
+
+    def finish(self):
+        self.sha256 = self._digest.hexdigest()
+
+    def read(self) -> bytes:
+        """Whole file content (blocking; may read from disk)"""
+        self.file.seek(0)
+        return self.file.read()
+
+    def close(self):
+        self.file.close()
+
+
+class StreamingUploadParser(MultiPartParser):
+    """Multipart parser that hashes files and enforces size limits while reading"""
+
+    spool_max_size = UPLOAD_SPOOL_MAX_MEMORY
+
+    def __init__(self, headers: Headers, stream: AsyncIterator[bytes], max_file_size: int, max_files: int):
+        super().__init__(headers, stream, max_files=max_files, max_fields=100)
+        self.max_file_size = max_file_size
+        self.uploads: List[StreamedUpload] = []
+        self._current_upload: Optional[StreamedUpload] = None
+
+    def on_headers_finished(self) -> None:
+        super().on_headers_finished()
+        part = self._current_part
+        self._current_upload = StreamedUpload(part.field_name, part.file) if part.file is not None else None
+        if self._current_upload is not None:
+            self.uploads.append(self._current_upload)
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        upload = self._current_upload
+        if upload is not None:
+            upload.update(data[start:end])
+            if upload.size > self.max_file_size:
+                raise UploadTooLarge(
+                    f"{upload.filename} is larger than the {self.max_file_size // (1024 * 1024)} MB file limit"
+                )
+        super().on_part_data(data, start, end)
+
+    def on_part_end(self) -> None:
+        if self._current_upload is not None:
+            self._current_upload.finish()
+        super().on_part_end()
+
+
+async def _limit_body(stream: AsyncIterator[bytes], limit: int) -> AsyncIterator[bytes]:
+    received = 0
+    async for chunk in stream:
+        received += len(chunk)
+        if received > limit:
+            raise UploadTooLarge(f"Request body is larger than the {limit // (1024 * 1024)} MB limit")
+        yield chunk
+
+
+async def receive_uploads(
+    request: Request,
+    field: str = "files",
+    max_file_size: int = MAX_UPLOAD_SIZE,
+    max_request_size: int = MAX_UPLOAD_REQUEST_SIZE,
+    max_files: int = MAX_UPLOAD_FILES,
+) -> List[StreamedUpload]:
+    """Stream the files of a multipart request into spooled temporary files.
+
+    Raises 413 when a size limit is exceeded and 400 for malformed bodies.
+    Callers must ``close()`` the returned uploads.
+    """
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_request_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Request body is larger than the {max_request_size // (1024 * 1024)} MB limit"
+        )
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+
+    parser = StreamingUploadParser(
+        request.headers, _limit_body(request.stream(), max_request_size), max_file_size, max_files
+    )
+    try:
+        await parser.parse()
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=e.message)
+    except MultiPartException as e:
+        raise HTTPException(status_code=400, detail=e.message)
+
+    uploads = []
+    for upload in parser.uploads:
+        if upload.field == field:
+            uploads.append(upload)
+        else:
+            upload.close()
+    return uploads
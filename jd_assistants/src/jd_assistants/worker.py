@@ -0,0 +1,48 @@
+"""
+Standalone worker for background CV upload jobs.
+
+Start API processes with JOB_INLINE_WORKER=0 and run one or more of these
+next to them (``jd_assistants_worker`` or ``python -m jd_assistants.worker``).
+The upload directory must be shared with the API processes.
+"""
+import asyncio
+import os
+from pathlib import Path
+
+from jd_assistants.database import init_db
+from jd_assistants.inference.groq import ChatGroq
+from jd_assistants.agent.read_cv import ReadCVAgent
+from jd_assistants.agent.summarization import SummarizationAgent
+from jd_assistants.tools.read_pdf_tool import ReadPDFTool
+from jd_assistants.ingestion import CVIngestionPipeline
+from jd_assistants.jobs import run_worker, get_job_store, LocalJobStore
+from jd_assistants.artifacts import close_artifact_writer
+
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "/app/uploads"))
+
+
+async def main():
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise ValueError("GROQ_API_KEY not set")
+
+    llm = ChatGroq(model='llama-3.3-70b-versatile', api_key=api_key, temperature=0)
+    pipeline = CVIngestionPipeline(ReadPDFTool(), ReadCVAgent(llm), SummarizationAgent(llm), UPLOAD_DIR)
+
+    await init_db()
+    store = await get_job_store()
+    if isinstance(store, LocalJobStore):
+        raise RuntimeError("Standalone workers require Redis (REDIS_URL)")
+    print("✅ CV upload worker started")
+    try:
+        await run_worker(pipeline, store)
+    finally:
+        await close_artifact_writer()
+
+
+def run():
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    run()